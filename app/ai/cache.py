@@ -0,0 +1,245 @@
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Any, Optional, Tuple
+from ..core.serialization import canonical_dumps, dumps, loads
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # pragma: no cover - redis is optional
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+def cache_key(**inputs) -> str:
+    """SHA-256 of the canonical JSON form of a request's inputs"""
+    return hashlib.sha256(canonical_dumps(inputs)).hexdigest()
+
+class CacheStore(ABC):
+    """Second cache tier, shared between restarts or workers"""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    async def set(self, key: str, value: Dict[str, Any], ttl: float) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+class DiskCacheStore(CacheStore):
+    """One JSON file per entry in a directory; expired entries are removed when read"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self._read, self.path / f"{key}.json")
+
+    async def set(self, key: str, value: Dict[str, Any], ttl: float) -> None:
+        await asyncio.to_thread(self._write, self.path / f"{key}.json",
+                                dumps({"expires": time.time() + ttl, "value": value}))
+
+    def _read(self, file: Path) -> Optional[Dict[str, Any]]:
+        try:
+            entry = loads(file.read_bytes())
+        except FileNotFoundError:
+            return None
+        if entry["expires"] <= time.time():
+            file.unlink(missing_ok=True)
+            return None
+        return entry["value"]
+
+    def _write(self, file: Path, payload: bytes) -> None:
+        # Write then rename, so readers never see a partial entry
+        tmp = file.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(payload)
+        os.replace(tmp, file)
+
+class RedisCacheStore(CacheStore):
+    """Entries in Redis strings that expire with the cache TTL"""
+
+    def __init__(self, url: str, prefix: str = "insightflow:ai_cache:"):
+        if redis is None:
+            raise ImportError("The redis package is required for a Redis cache store")
+        self.client = redis.from_url(url)
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        payload = await self.client.get(self.prefix + key)
+        return loads(payload) if payload is not None else None
+
+    async def set(self, key: str, value: Dict[str, Any], ttl: float) -> None:
+        await self.client.set(self.prefix + key, dumps(value), ex=max(int(ttl), 1))
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+def create_cache_store(location: Optional[str]) -> Optional[CacheStore]:
+    """Redis store for redis:// URLs, a disk store for a directory, none when unset"""
+    if not location:
+        return None
+    if location.startswith(("redis://", "rediss://", "unix://")):
+        return RedisCacheStore(location)
+    return DiskCacheStore(location)
+
+class ResponseCache:
+    """TTL and LRU cache of AI responses with request coalescing.
+
+    Entries live in memory, bounded by ``max_entries`` and ``max_bytes`` of
+    encoded responses, and expire ``ttl`` seconds after they were computed.
+    An optional ``store`` is consulted on a memory miss and written through,
+    so responses survive restarts or are shared by workers. Concurrent
+    calls for a key that is being computed wait for that computation
+    instead of starting their own; failures are not cached.
+    """
+
+    def __init__(self, ttl: float = 300, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024,
+                 store: Optional[CacheStore] = None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.store = store
+        # key -> (expires at, size in bytes, value), least recently used first
+        self._entries: "OrderedDict[str, Tuple[float, int, Dict[str, Any]]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.bytes = 0
+        self.hits = 0
+        self.store_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.store_errors = 0
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Return the cached response for key, computing it at most once"""
+        value = self._get(key)
+        if value is not None:
+            self.hits += 1
+            return dict(value)
+        task = self._inflight.get(key)
+        if task is None:
+            # The upstream call runs in its own task, so a caller that is
+            # cancelled does not cancel it for the others waiting on it
+            task = self._inflight[key] = asyncio.create_task(self._fill(key, compute))
+            task.add_done_callback(lambda done: self._fill_done(key, done))
+        else:
+            self.coalesced += 1
+        return dict(await asyncio.shield(task))
+
+    async def _fill(self, key: str, compute: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        value = await self._load(key)
+        if value is not None:
+            self.store_hits += 1
+        else:
+            self.misses += 1
+            value = await compute()
+            await self._save(key, value)
+        self._put(key, value)
+        return value
+
+    def _fill_done(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark a failure retrieved even when every caller has gone
+            task.exception()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up a response without computing it on a miss"""
+        value = self._get(key)
+        if value is not None:
+            self.hits += 1
+            return dict(value)
+        value = await self._load(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.store_hits += 1
+        self._put(key, value)
+        return dict(value)
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Cache a response computed outside get_or_compute"""
+        await self._save(key, value)
+        self._put(key, value)
+
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            self.expirations += 1
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[2]
+
+    def _put(self, key: str, value: Dict[str, Any]) -> None:
+        size = len(dumps(value))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + self.ttl, size, value)
+        self.bytes += size
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self.bytes -= size
+
+    async def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.store is None:
+            return None
+        try:
+            return await self.store.get(key)
+        except Exception as e:
+            self.store_errors += 1
+            logger.warning(f"Error reading AI cache store: {str(e)}")
+            return None
+
+    async def _save(self, key: str, value: Dict[str, Any]) -> None:
+        if self.store is None:
+            return
+        try:
+            await self.store.set(key, value, self.ttl)
+        except Exception as e:
+            self.store_errors += 1
+            logger.warning(f"Error writing AI cache store: {str(e)}")
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.bytes = 0
+
+    async def close(self) -> None:
+        if self.store is not None:
+            await self.store.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit rates, coalesced requests and memory use"""
+        lookups = self.hits + self.store_hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "store_hits": self.store_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": (lookups - self.misses) / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "store_errors": self.store_errors,
+            "inflight": len(self._inflight),
+        }
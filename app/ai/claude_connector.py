@@ -1,42 +1,93 @@
-from typing import Dict, Optional, List
-import anthropic
+from typing import AsyncIterator, Dict, Optional, List
 from pydantic import BaseModel
-import json
+from datetime import datetime
 import asyncio
+from ..config import config
+from ..models.schema import AIModelConfig
+from .cache import ResponseCache, cache_key, create_cache_store
+from .client import AIClient, get_ai_client
+from .prompt import PromptBuilder, estimate_tokens
 
 class ClaudeConnector:
-    def __init__(self, api_key: str):
-        self.client = anthropic.Client(api_key)
+    def __init__(self, ai_client: Optional[AIClient] = None, ai_config: Optional[AIModelConfig] = None,
+                 cache: Optional[ResponseCache] = None, prompt_builder: Optional[PromptBuilder] = None):
+        self.client = ai_client or get_ai_client()
+        self.ai_config = ai_config or config.get_config().ai
+        if cache is None:
+            analytics_config = config.get_config().analytics
+            cache = ResponseCache(ttl=analytics_config.cache_ttl, max_entries=analytics_config.cache_max_entries,
+                                  store=create_cache_store(analytics_config.cache_store))
+        self.cache = cache
         self.system_prompt = """You are an AI analytics assistant for InsightFlow.
         Your role is to help analyze data, generate insights, and answer queries.
         Use the available tools and data to provide accurate and helpful responses."""
+        self.prompt_builder = prompt_builder or PromptBuilder(self.ai_config,
+                                                              reserved_tokens=estimate_tokens(self.system_prompt))
 
     async def generate_insight(self, data: Dict, context: Optional[Dict] = None) -> Dict:
         """Generate insights from provided data using Claude"""
+        try:
+            # The budgeted prompt is small whatever the data size, so it is
+            # cheaper to key on than the raw data it summarizes
+            prompt = self._build_insight_prompt(data, context)
+
+            async def compute():
+                return self._parse_insight_response(await self._get_claude_response(prompt))
+
+            return await self.cache.get_or_compute(self._cache_key("insight", prompt=prompt), compute)
+        except Exception as e:
+            raise Exception(f"Error generating insight: {str(e)}")
+
+    async def stream_insight(self, data: Dict, context: Optional[Dict] = None) -> AsyncIterator[Dict]:
+        """Generate insights, yielding {"type": "delta", "text"} events as the
+        model writes and a final {"type": "result", "result"} event"""
         try:
             prompt = self._build_insight_prompt(data, context)
-            response = await self._get_claude_response(prompt)
-            return self._parse_insight_response(response)
         except Exception as e:
             raise Exception(f"Error generating insight: {str(e)}")
+        key = self._cache_key("insight", prompt=prompt)
+        result = await self.cache.get(key)
+        if result is None:
+            try:
+                chunks = []
+                async for text in self.client.stream_message(
+                    model=self.ai_config.model_name,
+                    max_tokens=self.ai_config.max_tokens,
+                    system=self.system_prompt,
+                    messages=[
+                        {"role": "user", "content": prompt}
+                    ]
+                ):
+                    chunks.append(text)
+                    yield {"type": "delta", "text": text}
+                result = self._parse_insight_response("".join(chunks))
+            except Exception as e:
+                raise Exception(f"Error generating insight: {str(e)}")
+            # Only complete responses are cached
+            await self.cache.set(key, result)
+        yield {"type": "result", "result": result}
 
     async def process_query(self, query: str, context: Optional[Dict] = None) -> Dict:
         """Process natural language queries using Claude"""
         try:
-            prompt = self._build_query_prompt(query, context)
-            response = await self._get_claude_response(prompt)
-            return self._parse_query_response(response)
+            async def compute():
+                prompt = self._build_query_prompt(query, context)
+                return self._parse_query_response(await self._get_claude_response(prompt))
+
+            # Queries differing only in case or spacing share an answer
+            key = self._cache_key("query", query=" ".join(query.split()).casefold(), context=context)
+            return await self.cache.get_or_compute(key, compute)
         except Exception as e:
             raise Exception(f"Error processing query: {str(e)}")
 
     async def _get_claude_response(self, prompt: str) -> str:
         """Get response from Claude API"""
         try:
-            response = await self.client.messages.create(
-                model="claude-2",
-                max_tokens=1000,
+            response = await self.client.create_message(
+                model=self.ai_config.model_name,
+                max_tokens=self.ai_config.max_tokens,
+                system=self.system_prompt,
                 messages=[
-                    {"role": "system", "content": self.system_prompt},
                     {"role": "user", "content": prompt}
                 ]
             )
@@ -44,20 +95,24 @@ class ClaudeConnector:
         except Exception as e:
             raise Exception(f"Claude API error: {str(e)}")
 
+    def _cache_key(self, kind: str, **inputs) -> str:
+        """Key on the request inputs and every model setting that shapes the answer"""
+        return cache_key(kind=kind, system=self.system_prompt, model=self.ai_config.model_name,
+                         max_tokens=self.ai_config.max_tokens, temperature=self.ai_config.temperature,
+                         **inputs)
+
+    def get_stats(self) -> Dict:
+        """Get AI client and response cache metrics"""
+        return {"client": self.client.get_stats(), "cache": self.cache.get_stats(),
+                "prompt": self.prompt_builder.get_stats()}
+
     def _build_insight_prompt(self, data: Dict, context: Optional[Dict] = None) -> str:
-        """Build prompt for insight generation"""
-        prompt = "Analyze the following data and generate insights:\n\n"
-        prompt += json.dumps(data, indent=2)
-        if context:
-            prompt += "\n\nContext:\n" + json.dumps(context, indent=2)
-        return prompt
+        """Build prompt for insight generation, summarizing data too large for the context window"""
+        return self.prompt_builder.build_insight(data, context)
 
     def _build_query_prompt(self, query: str, context: Optional[Dict] = None) -> str:
         """Build prompt for query processing"""
-        prompt = f"Process the following analytics query:\n{query}\n\n"
-        if context:
-            prompt += "Context:\n" + json.dumps(context, indent=2)
-        return prompt
+        return self.prompt_builder.build_query(query, context)
 
     def _parse_insight_response(self, response: str) -> Dict:
         """Parse and structure Claude's insight response"""
@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import random
+import time
+from typing import AsyncIterator, Dict, Any, Optional
+import anthropic
+from ..config import config
+from ..core.metrics import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+# Statuses worth retrying after a pause: rate limited, unavailable, overloaded
+RETRYABLE_STATUS = (429, 503, 529)
+
+class AIClient:
+    """Shared async Claude client for every AI component of a worker.
+
+    One AsyncAnthropic instance keeps a single pool of HTTP connections.
+    At most ``max_concurrency`` requests run at once; the rest wait on a
+    semaphore, and that wait is measured separately from request latency.
+    Every request is bounded by ``timeout`` seconds, and rate-limit or
+    overloaded responses are retried up to ``max_retries`` times with
+    jittered exponential backoff, honouring the API's retry-after header.
+    """
+
+    def __init__(self, api_key: str, base_url: Optional[str] = None, max_concurrency: int = 8,
+                 timeout: float = 30.0, max_retries: int = 3, backoff: float = 0.5,
+                 max_backoff: float = 20.0):
+        # Retries are done here so they are counted and share the semaphore
+        self.client = anthropic.AsyncAnthropic(api_key=api_key, base_url=base_url,
+                                               timeout=timeout, max_retries=0)
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.queue_wait = LatencyHistogram()
+        self.latency = LatencyHistogram()
+        # Request start to first streamed text
+        self.first_token = LatencyHistogram()
+        self.requests = 0
+        self.retries = 0
+        self.errors = 0
+        self.waiting = 0
+        self.in_flight = 0
+
+    async def create_message(self, **params) -> Any:
+        """Create a message, waiting for a free slot and retrying rate limits"""
+        attempt = 0
+        while True:
+            started = await self._acquire()
+            try:
+                return await self.client.messages.create(**params)
+            except anthropic.APIStatusError as e:
+                delay = self._on_status_error(attempt, e)
+            except Exception:
+                self.errors += 1
+                raise
+            finally:
+                self._release(started)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def stream_message(self, **params) -> AsyncIterator[str]:
+        """Yield a message's text as the model produces it.
+
+        Rate limits are retried until the stream opens. Closing the
+        iterator, for example when its task is cancelled, closes the HTTP
+        stream so the model stops generating.
+        """
+        attempt = 0
+        while True:
+            started = await self._acquire()
+            try:
+                stream = await self.client.messages.create(stream=True, **params)
+            except anthropic.APIStatusError as e:
+                self._release(started)
+                delay = self._on_status_error(attempt, e)
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                self._release(started)
+                self.errors += 1
+                raise
+            break
+
+        first = True
+        try:
+            async for event in stream:
+                if event.type != "content_block_delta" or getattr(event.delta, "text", None) is None:
+                    continue
+                if first:
+                    self.first_token.observe(time.perf_counter() - started)
+                    first = False
+                yield event.delta.text
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            await stream.close()
+            self._release(started)
+
+    async def _acquire(self) -> float:
+        """Wait for a free request slot and return when it was granted"""
+        queued = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        started = time.perf_counter()
+        self.queue_wait.observe(started - queued)
+        self.in_flight += 1
+        self.requests += 1
+        return started
+
+    def _release(self, started: float) -> None:
+        self.in_flight -= 1
+        self._semaphore.release()
+        self.latency.observe(time.perf_counter() - started)
+
+    def _on_status_error(self, attempt: int, error: anthropic.APIStatusError) -> float:
+        """Delay before retrying a failed request, or re-raise when it is final"""
+        if error.status_code not in RETRYABLE_STATUS or attempt >= self.max_retries:
+            self.errors += 1
+            raise error
+        delay = self._retry_delay(attempt, error)
+        self.retries += 1
+        logger.warning(f"Claude API {type(error).__name__}, retry {attempt + 1} in {delay:.2f}s")
+        return delay
+
+    def _retry_delay(self, attempt: int, error: Exception) -> float:
+        """Full-jitter exponential backoff, at least the server's retry-after"""
+        delay = random.uniform(0, min(self.backoff * 2 ** attempt, self.max_backoff))
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        try:
+            delay = max(delay, min(float(retry_after), self.max_backoff))
+        except (TypeError, ValueError):
+            pass
+        return delay
+
+    async def close(self) -> None:
+        """Close the pooled HTTP connections"""
+        await self.client.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get request counters, concurrency and latency histograms"""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "requests": self.requests,
+            "retries": self.retries,
+            "errors": self.errors,
+            "queue_wait": self.queue_wait.to_dict(),
+            "latency": self.latency.to_dict(),
+            "first_token": self.first_token.to_dict(),
+        }
+
+_ai_client: Optional[AIClient] = None
+
+def get_ai_client() -> AIClient:
+    """Get the process-wide AI client configured from AIModelConfig"""
+    global _ai_client
+    if _ai_client is None:
+        ai_config = config.get_config().ai
+        _ai_client = AIClient(api_key=ai_config.api_key, base_url=ai_config.base_url,
+                              max_concurrency=ai_config.max_concurrency,
+                              timeout=config.get_config().server.request_timeout,
+                              max_retries=ai_config.max_retries)
+    return _ai_client
+
+async def close_ai_client() -> None:
+    """Close the process-wide AI client"""
+    global _ai_client
+    if _ai_client is not None:
+        await _ai_client.close()
+        _ai_client = None
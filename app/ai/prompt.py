@@ -0,0 +1,181 @@
+import logging
+import math
+from typing import Dict, Any, List, Optional
+import numpy as np
+import pandas as pd
+from ..core.serialization import dumps_str
+from ..models.schema import AIModelConfig
+
+logger = logging.getLogger(__name__)
+
+# Conservative for JSON full of digits and punctuation, which tokenizes
+# more densely than prose
+CHARS_PER_TOKEN = 3
+# Share of the budget left free for estimation error
+HEADROOM = 0.1
+TRUNCATED = "\n... [truncated to fit the context window]"
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of a prompt"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+def _count_values(value: Any, limit: int) -> int:
+    """Number of scalar values in value, counting no further than limit"""
+    if isinstance(value, (pd.DataFrame, pd.Series, np.ndarray)):
+        return value.size
+    if isinstance(value, dict):
+        value = list(value.values())
+    if not isinstance(value, (list, tuple)):
+        return 1
+    count = 0
+    for item in value:
+        count += _count_values(item, limit - count)
+        if count > limit:
+            break
+    return count
+
+class PromptBuilder:
+    """Builds insight and query prompts that fit the model's context window.
+
+    Data that fits the token budget is sent as compact JSON. Larger data is
+    summarized locally first: every DataFrame, Series, array or long list
+    becomes its row count, per-column statistics, the rows furthest from
+    their column means and an evenly spaced sample. If that is still too
+    large the samples shrink, and as a last resort the prompt is cut.
+    """
+
+    def __init__(self, ai_config: AIModelConfig, reserved_tokens: int = 0, sample_rows: int = 20,
+                 top_anomalies: int = 10, max_list_items: int = 50):
+        self.ai_config = ai_config
+        self.budget = self._budget(ai_config, reserved_tokens)
+        self.sample_rows = sample_rows
+        self.top_anomalies = top_anomalies
+        self.max_list_items = max_list_items
+        self.prompts = 0
+        self.summarized = 0
+        self.truncated = 0
+        self.last_tokens = 0
+
+    def _budget(self, ai_config: AIModelConfig, reserved_tokens: int) -> int:
+        """Prompt tokens left after the response and the system prompt"""
+        budget = ai_config.prompt_budget or ai_config.context_window - ai_config.max_tokens
+        return max(int((budget - reserved_tokens) * (1 - HEADROOM)), 256)
+
+    def build_insight(self, data: Any, context: Optional[Dict] = None) -> str:
+        """Prompt asking for insights on data, within the token budget"""
+        return self._fit("Analyze the following data and generate insights:\n\n", data, context)
+
+    def build_query(self, query: str, context: Optional[Dict] = None) -> str:
+        """Prompt for an analytics query, within the token budget"""
+        prompt = f"Process the following analytics query:\n{query}\n\n"
+        if not context:
+            return self._finish(prompt)
+        return self._fit(prompt + "Context:\n", context, None)
+
+    def _fit(self, header: str, data: Any, context: Optional[Dict]) -> str:
+        # Every value encodes to at least two characters, so data with more
+        # values than that allows is summarized without encoding it first
+        limit = self.budget * CHARS_PER_TOKEN // 2
+        if _count_values([data, context], limit) <= limit:
+            prompt = self._render(header, data, context)
+            if estimate_tokens(prompt) <= self.budget:
+                return self._finish(prompt)
+
+        self.summarized += 1
+        sample_rows, top_anomalies, max_list_items = self.sample_rows, self.top_anomalies, self.max_list_items
+        while True:
+            prompt = self._render(header, self.summarize(data, sample_rows, top_anomalies, max_list_items),
+                                  self.summarize(context, sample_rows, top_anomalies, max_list_items))
+            if estimate_tokens(prompt) <= self.budget or not (sample_rows or top_anomalies or max_list_items > 1):
+                break
+            sample_rows, top_anomalies, max_list_items = sample_rows // 2, top_anomalies // 2, max(max_list_items // 2, 1)
+
+        if estimate_tokens(prompt) > self.budget:
+            self.truncated += 1
+            logger.warning(f"Prompt of ~{estimate_tokens(prompt)} tokens cut to the {self.budget} token budget")
+            prompt = prompt[:self.budget * CHARS_PER_TOKEN - len(TRUNCATED)] + TRUNCATED
+        return self._finish(prompt)
+
+    def _render(self, header: str, data: Any, context: Any) -> str:
+        # Sources in a fixed order, so the same data gives the same prompt
+        # and the same response cache key
+        if isinstance(data, dict):
+            data = dict(sorted(data.items(), key=lambda item: str(item[0])))
+        prompt = header + dumps_str(data)
+        if context:
+            prompt += "\n\nContext:\n" + dumps_str(context)
+        return prompt
+
+    def _finish(self, prompt: str) -> str:
+        self.prompts += 1
+        self.last_tokens = estimate_tokens(prompt)
+        return prompt
+
+    def summarize(self, value: Any, sample_rows: Optional[int] = None, top_anomalies: Optional[int] = None,
+                  max_list_items: Optional[int] = None) -> Any:
+        """Replace tabular data inside value with compact summaries"""
+        sample_rows = self.sample_rows if sample_rows is None else sample_rows
+        top_anomalies = self.top_anomalies if top_anomalies is None else top_anomalies
+        max_list_items = self.max_list_items if max_list_items is None else max_list_items
+
+        if isinstance(value, pd.DataFrame):
+            return self._summarize_frame(value, sample_rows, top_anomalies)
+        if isinstance(value, (pd.Series, np.ndarray)):
+            return self._summarize_frame(pd.DataFrame({"value": np.asarray(value).ravel()}),
+                                         sample_rows, top_anomalies)
+        if isinstance(value, dict):
+            return {key: self.summarize(item, sample_rows, top_anomalies, max_list_items)
+                    for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            if len(value) <= max_list_items:
+                return [self.summarize(item, sample_rows, top_anomalies, max_list_items) for item in value]
+            if all(isinstance(item, dict) for item in value):
+                return self._summarize_frame(pd.DataFrame(value), sample_rows, top_anomalies)
+            if all(isinstance(item, (int, float)) and not isinstance(item, bool) for item in value):
+                return self._summarize_frame(pd.DataFrame({"value": value}), sample_rows, top_anomalies)
+            return {"items": len(value), "first": value[:max_list_items]}
+        if isinstance(value, str) and len(value) > max_list_items * 20:
+            return value[:max_list_items * 20] + "..."
+        return value
+
+    def _summarize_frame(self, frame: pd.DataFrame, sample_rows: int, top_anomalies: int) -> Dict[str, Any]:
+        numeric = frame.select_dtypes("number")
+        summary: Dict[str, Any] = {
+            "rows": len(frame),
+            "columns": {column: str(dtype) for column, dtype in frame.dtypes.items()},
+        }
+        if len(numeric.columns) and len(frame):
+            stats = numeric.describe().T
+            summary["stats"] = {column: {name: (None if pd.isna(v) else float(v)) for name, v in row.items()}
+                                for column, row in stats.iterrows()}
+            if top_anomalies:
+                summary["top_anomalies"] = self._top_anomalies(frame, numeric, top_anomalies)
+        if sample_rows and len(frame):
+            positions = np.unique(np.linspace(0, len(frame) - 1, min(sample_rows, len(frame))).astype(int))
+            summary["sample"] = frame.iloc[positions].to_dict("records")
+        return summary
+
+    def _top_anomalies(self, frame: pd.DataFrame, numeric: pd.DataFrame, limit: int) -> List[Dict[str, Any]]:
+        """Rows with the largest z-score in any numeric column"""
+        values = numeric.to_numpy(dtype=np.float64)
+        std = np.nanstd(values, axis=0)
+        std[std == 0] = np.nan
+        with np.errstate(invalid="ignore"):
+            z = np.abs(values - np.nanmean(values, axis=0)) / std
+        scores = np.nan_to_num(np.nanmax(z, axis=1, initial=0.0), nan=0.0)
+        limit = min(limit, len(scores))
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top])]
+        rows = frame.iloc[top].to_dict("records")
+        for row, score in zip(rows, scores[top]):
+            row["z_score"] = round(float(score), 2)
+        return [row for row, score in zip(rows, scores[top]) if score > 0]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "budget_tokens": self.budget,
+            "prompts": self.prompts,
+            "summarized": self.summarized,
+            "truncated": self.truncated,
+            "last_tokens": self.last_tokens,
+        }
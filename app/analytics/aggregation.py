@@ -0,0 +1,306 @@
+import math
+from datetime import datetime, timezone
+from uuid import uuid4
+from typing import Dict, Any, List, Optional, Tuple, Union, TYPE_CHECKING
+import numpy as np
+import pandas as pd
+from .sketches import ColumnSketch
+from ..core.serialization import dumps_str, loads
+
+if TYPE_CHECKING:
+    from ..data.storage import DataStorage
+
+class RunningStats:
+    """Mergeable running moments (Welford) with count, sum, min and max"""
+
+    METRICS = ("count", "sum", "average", "min", "max", "std", "variance")
+
+    __slots__ = ("count", "sum", "mean", "m2", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, value: float) -> None:
+        """Add a single value"""
+        self.count += 1
+        self.sum += value
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def update_many(self, values: np.ndarray) -> None:
+        """Add an array of values in one vectorized step"""
+        if len(values) == 0:
+            return
+        chunk = RunningStats()
+        chunk.count = len(values)
+        chunk.sum = float(np.sum(values))
+        chunk.mean = chunk.sum / chunk.count
+        chunk.m2 = float(np.var(values)) * chunk.count
+        chunk.min = float(np.min(values))
+        chunk.max = float(np.max(values))
+        self.merge(chunk)
+
+    def merge(self, other: "RunningStats") -> "RunningStats":
+        """Combine another set of moments into this one (Chan et al.)"""
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            for name in self.__slots__:
+                setattr(self, name, getattr(other, name))
+            return self
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / count
+        self.count = count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def variance(self, ddof: int = 0) -> Optional[float]:
+        if self.count <= ddof:
+            return None
+        return self.m2 / (self.count - ddof)
+
+    def std(self, ddof: int = 0) -> Optional[float]:
+        variance = self.variance(ddof)
+        return math.sqrt(variance) if variance is not None else None
+
+    def result(self, metric: str) -> Any:
+        """Get the value of a metric from the maintained state"""
+        if metric == "count":
+            return self.count
+        if metric == "sum":
+            return self.sum
+        if self.count == 0:
+            return None
+        if metric == "average":
+            return self.mean
+        if metric == "min":
+            return self.min
+        if metric == "max":
+            return self.max
+        if metric == "std":
+            return self.std()
+        if metric == "variance":
+            return self.variance()
+        raise ValueError(f"Unsupported incremental metric: {metric}")
+
+    def to_dict(self) -> Dict[str, float]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, float]) -> "RunningStats":
+        stats = cls()
+        for name in cls.__slots__:
+            setattr(stats, name, state[name])
+        return stats
+
+    @classmethod
+    def from_array(cls, values: np.ndarray) -> "RunningStats":
+        stats = cls()
+        stats.update_many(values)
+        return stats
+
+class IncrementalAggregator:
+    """Running aggregates keyed by source and column.
+
+    Numeric columns keep exact moments; with ``sketches`` enabled every
+    numeric or string column also keeps quantile, distinct count and heavy
+    hitter sketches. Values arriving one record at a time are buffered and
+    folded into the sketches ``sketch_batch`` at a time, or before the
+    sketches are read. Saved snapshots are keyed by ``worker_id``.
+    """
+
+    METRICS = RunningStats.METRICS + ColumnSketch.METRICS
+
+    def __init__(self, sketches: bool = True, sketch_batch: int = 1024, worker_id: Optional[str] = None):
+        self.worker_id = worker_id or uuid4().hex
+        self._stats: Dict[Tuple[str, str], RunningStats] = {}
+        self.sketches = sketches
+        self.sketch_batch = sketch_batch
+        self._sketches: Dict[Tuple[str, str], ColumnSketch] = {}
+        # Numbers and strings awaiting a vectorized sketch update, per key
+        self._pending: Dict[Tuple[str, str], Tuple[List[float], List[str]]] = {}
+
+    def update(self, source_id: str, record: Union[Dict[str, Any], List[Dict[str, Any]]]) -> None:
+        """Fold the numeric fields of one record (or a list of records) into the aggregates"""
+        records = record if isinstance(record, list) else [record]
+        for item in records:
+            for column, value in item.items():
+                if isinstance(value, bool):
+                    continue
+                key = (source_id, column)
+                if isinstance(value, (int, float)):
+                    stats = self._stats.get(key)
+                    if stats is None:
+                        stats = self._stats[key] = RunningStats()
+                    stats.update(value)
+                    if self.sketches:
+                        pending = self._pending.get(key)
+                        if pending is None:
+                            pending = self._pending[key] = ([], [])
+                        pending[0].append(value)
+                elif isinstance(value, str) and column != "timestamp" and self.sketches:
+                    pending = self._pending.get(key)
+                    if pending is None:
+                        pending = self._pending[key] = ([], [])
+                    pending[1].append(value)
+                else:
+                    continue
+                if self.sketches and len(pending[0]) + len(pending[1]) >= self.sketch_batch:
+                    self._flush_key(key)
+
+    def _flush_key(self, key: Tuple[str, str]) -> None:
+        """Fold a key's buffered values into its sketch"""
+        numbers, strings = self._pending.pop(key, ((), ()))
+        if not numbers and not strings:
+            return
+        sketch = self._sketches.get(key)
+        if sketch is None:
+            sketch = self._sketches[key] = ColumnSketch()
+        if numbers:
+            sketch.update_many(np.array(numbers, dtype=np.float64))
+        if strings:
+            sketch.update_many(np.array(strings, dtype=object))
+
+    def flush_sketches(self) -> None:
+        """Fold every buffered value into the sketches"""
+        for key in list(self._pending):
+            self._flush_key(key)
+
+    def update_array(self, source_id: str, column: str, values: np.ndarray) -> None:
+        """Fold a column of values into the aggregates"""
+        if len(values) == 0:
+            return
+        key = (source_id, column)
+        if values.dtype.kind in "iuf":
+            self._stats.setdefault(key, RunningStats()).update_many(values)
+        if self.sketches:
+            self._sketches.setdefault(key, ColumnSketch()).update_many(values)
+
+    def update_frame(self, source_id: str, df: pd.DataFrame) -> None:
+        """Fold the numeric and string columns of a batch into the aggregates"""
+        for column, values in df.items():
+            if column == "timestamp" or values.dtype.kind in "bmM":
+                continue
+            values = values.dropna()
+            if values.dtype.kind in "iuf":
+                self.update_array(source_id, column, values.to_numpy(dtype=np.float64))
+            elif self.sketches and pd.api.types.infer_dtype(values, skipna=True) == "string":
+                self.update_array(source_id, column, values.to_numpy(dtype=object))
+
+    def get(self, source_id: str, column: str) -> Optional[RunningStats]:
+        return self._stats.get((source_id, column))
+
+    def get_sketch(self, source_id: str, column: str) -> Optional[ColumnSketch]:
+        key = (source_id, column)
+        self._flush_key(key)
+        return self._sketches.get(key)
+
+    def query(self, source_id: str, column: str, metrics: List[str]) -> Dict[str, Any]:
+        """Answer metric queries from the maintained state"""
+        stats = self.get(source_id, column) or RunningStats()
+        sketch = self.get_sketch(source_id, column) or ColumnSketch()
+        return {
+            metric: sketch.result(metric) if metric in ColumnSketch.METRICS else stats.result(metric)
+            for metric in metrics
+        }
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Serialize all aggregates, e.g. to ship them to another worker"""
+        self.flush_sketches()
+        entries = []
+        for key in dict.fromkeys(list(self._stats) + list(self._sketches)):
+            source_id, column = key
+            entry = {"source": source_id, "column": column}
+            if key in self._stats:
+                entry["stats"] = self._stats[key].to_dict()
+            if key in self._sketches:
+                entry["sketch"] = self._sketches[key].to_dict()
+            entries.append(entry)
+        return entries
+
+    def merge(self, other: Union["IncrementalAggregator", List[Dict[str, Any]]]) -> None:
+        """Merge partial aggregates from another aggregator or a snapshot"""
+        entries = other.snapshot() if isinstance(other, IncrementalAggregator) else other
+        for entry in entries:
+            key = (entry["source"], entry["column"])
+            if entry.get("stats"):
+                self._stats.setdefault(key, RunningStats()).merge(RunningStats.from_dict(entry["stats"]))
+            if entry.get("sketch") and self.sketches:
+                sketch = ColumnSketch.from_dict(entry["sketch"])
+                if key in self._sketches:
+                    self._sketches[key].merge(sketch)
+                else:
+                    self._sketches[key] = sketch
+
+    async def save(self, storage: "DataStorage", table: str = "aggregates") -> None:
+        """Write a snapshot of all aggregates to storage, one row per key,
+        replacing this worker's earlier snapshots"""
+        timestamp = datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
+        rows = [{
+            "timestamp": timestamp,
+            "worker": self.worker_id,
+            "source": entry["source"],
+            "column": entry["column"],
+            "state": dumps_str({name: entry[name] for name in ("stats", "sketch") if name in entry}),
+        } for entry in self.snapshot()]
+        if rows:
+            await storage.store(rows, table)
+            await storage.flush(table)
+            await storage.execute(f"DELETE FROM {storage.table_name(table)} "
+                                  "WHERE worker = :worker AND timestamp < :timestamp",
+                                  {"worker": self.worker_id, "timestamp": timestamp})
+
+    async def load(self, storage: "DataStorage", table: str = "aggregates") -> int:
+        """Merge the latest saved snapshot of every worker from storage.
+
+        Each snapshot is deleted as it is restored, so when several workers
+        start together every snapshot is merged by exactly one of them and
+        comes back in that worker's next save.
+        """
+        table_name = storage.table_name(table)
+        workers = await storage.query(f"SELECT worker, MAX(timestamp) AS timestamp FROM {table_name} "
+                                      "GROUP BY worker")
+        restored = 0
+        for worker in workers.to_dict("records"):
+            snapshot = await storage.query(f"SELECT * FROM {table_name} WHERE worker = :worker "
+                                           "AND timestamp = :timestamp", worker)
+            # Only the worker whose delete removes the rows restores them
+            if not await storage.execute(f"DELETE FROM {table_name} WHERE worker = :worker", worker):
+                continue
+            entries = [{
+                "source": row["source"],
+                "column": row["column"],
+                **loads(row["state"]),
+            } for row in snapshot.to_dict("records")]
+            self.merge(entries)
+            restored += len(entries)
+        return restored
+
+    def reset(self, source_id: Optional[str] = None) -> None:
+        """Drop the aggregates for one source, or all of them"""
+        if source_id is None:
+            self._stats.clear()
+            self._sketches.clear()
+            self._pending.clear()
+            return
+        for key in [key for key in self._stats if key[0] == source_id]:
+            del self._stats[key]
+        for key in [key for key in self._sketches if key[0] == source_id]:
+            del self._sketches[key]
+        for key in [key for key in self._pending if key[0] == source_id]:
+            del self._pending[key]
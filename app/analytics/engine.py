@@ -1,16 +1,27 @@
 import logging
-from typing import Dict, Any, List
+from datetime import datetime
+from typing import Dict, Any, List, Optional
 import pandas as pd
 import numpy as np
+from .aggregation import IncrementalAggregator, RunningStats
+from .sketches import ColumnSketch
+from .trend import TrendEstimator
+from ..config import config
 from ..data.storage import DataStorage
-from ..models.schema import AnalyticsConfig
+from ..data.columnar import ColumnarStorage
+from ..models.schema import AnalyticsConfig, DataSource, StorageBackend
 
 logger = logging.getLogger(__name__)
 
 class AnalyticsEngine:
-    def __init__(self):
-        self.storage = DataStorage()
-        self.config = AnalyticsConfig()
+    def __init__(self, storage: Optional[DataStorage] = None,
+                 analytics_config: Optional[AnalyticsConfig] = None,
+                 columnar_storage: Optional[ColumnarStorage] = None,
+                 aggregator: Optional[IncrementalAggregator] = None):
+        self.storage = storage or DataStorage()
+        self.columnar_storage = columnar_storage
+        self.aggregator = aggregator or IncrementalAggregator()
+        self.config = analytics_config or config.get_config().analytics
         self._metrics = self._initialize_metrics()
 
     def _initialize_metrics(self) -> Dict[str, callable]:
@@ -22,9 +33,32 @@ class AnalyticsEngine:
             "min": np.min,
             "max": np.max,
             "std": np.std,
-            "variance": np.var
+            "variance": np.var,
+            # Approximate metrics computed from mergeable sketches
+            **{metric: self._sketch_metric(metric) for metric in ColumnSketch.METRICS}
         }
 
+    def _sketch_metric(self, metric: str) -> callable:
+        def evaluate(data) -> Any:
+            return ColumnSketch.from_array(np.asarray(data).ravel()).result(metric)
+        return evaluate
+
+    def _get_columnar_storage(self) -> ColumnarStorage:
+        if self.columnar_storage is None:
+            self.columnar_storage = ColumnarStorage()
+        return self.columnar_storage
+
+    async def load_data(self, source: DataSource, columns: Optional[List[str]] = None,
+                        start: Optional[datetime] = None, end: Optional[datetime] = None) -> pd.DataFrame:
+        """Load a time range of source data from its storage backend"""
+        try:
+            if source.storage == StorageBackend.COLUMNAR:
+                return await self._get_columnar_storage().scan(source.name, columns, start, end)
+            return await self.storage.scan(source.name, columns, start, end)
+        except Exception as e:
+            logger.error(f"Error loading data: {str(e)}")
+            raise
+
     async def analyze(self, data: pd.DataFrame, metrics: List[str]) -> Dict[str, Any]:
         """Perform analysis on data"""
         try:
@@ -38,6 +72,108 @@ class AnalyticsEngine:
             logger.error(f"Error during analysis: {str(e)}")
             raise
 
+    async def analyze_source(self, source_id: str, column: str, metrics: List[str]) -> Dict[str, Any]:
+        """Answer metric queries from the aggregates maintained at ingest time"""
+        try:
+            for metric in metrics:
+                if metric not in IncrementalAggregator.METRICS:
+                    raise ValueError(f"Metric is not maintained incrementally: {metric}")
+            return self.aggregator.query(source_id, column, metrics)
+        except Exception as e:
+            logger.error(f"Error during analysis: {str(e)}")
+            raise
+
+    async def analyze_history(self, source: DataSource, column: str, metrics: List[str],
+                              start: Optional[datetime] = None,
+                              end: Optional[datetime] = None) -> Dict[str, Any]:
+        """Perform analysis over a stored time range of a source column"""
+        try:
+            for metric in metrics:
+                if metric not in self._metrics:
+                    raise ValueError(f"Unknown metric: {metric}")
+
+            if source.storage != StorageBackend.COLUMNAR:
+                data = await self.load_data(source, [column], start, end)
+                return await self.analyze(data[column], metrics)
+
+            # Columnar sources are scanned as NumPy views over the stored
+            # files instead of being materialized into a DataFrame
+            chunks = await self._get_columnar_storage().scan_arrays(source.name, [column], start, end)
+            return self._analyze_chunks([chunk[column] for chunk in chunks], metrics)
+        except Exception as e:
+            logger.error(f"Error during history analysis: {str(e)}")
+            raise
+
+    def _analyze_chunks(self, chunks: List[np.ndarray], metrics: List[str]) -> Dict[str, Any]:
+        """Evaluate metrics over a column split into chunks"""
+        if not any(len(values) for values in chunks):
+            # An empty range has no min or max; answer as an empty aggregate
+            stats, sketch = RunningStats(), ColumnSketch()
+            return {metric: sketch.result(metric) if metric in ColumnSketch.METRICS else stats.result(metric)
+                    for metric in metrics}
+        if len(chunks) == 1:
+            return {metric: self._metrics[metric](chunks[0]) for metric in metrics}
+
+        stats = RunningStats()
+        for values in chunks:
+            stats.update_many(values)
+        sketch = None
+        if any(metric in ColumnSketch.METRICS for metric in metrics):
+            sketch = ColumnSketch()
+            for values in chunks:
+                sketch.update_many(values)
+
+        results = {}
+        concatenated = None
+        for metric in metrics:
+            if metric in RunningStats.METRICS:
+                results[metric] = stats.result(metric)
+            elif metric in ColumnSketch.METRICS:
+                results[metric] = sketch.result(metric)
+            else:
+                # Metrics that cannot be merged across chunks see one array
+                if concatenated is None:
+                    concatenated = np.concatenate(chunks)
+                results[metric] = self._metrics[metric](concatenated)
+        return results
+
+    async def detect_anomalies_history(self, source: DataSource, column: str,
+                                       start: Optional[datetime] = None,
+                                       end: Optional[datetime] = None,
+                                       threshold: float = 3) -> pd.DataFrame:
+        """Detect anomalies over a stored time range of a source column"""
+        try:
+            if source.storage != StorageBackend.COLUMNAR:
+                data = await self.load_data(source, ["timestamp", column], start, end)
+                return await self.detect_anomalies(data, column)
+
+            chunks = await self._get_columnar_storage().scan_arrays(source.name, [column], start, end)
+            chunks = [chunk for chunk in chunks if len(chunk[column])]
+            if not chunks:
+                return pd.DataFrame(columns=["timestamp", column])
+
+            stats = RunningStats()
+            for chunk in chunks:
+                stats.update_many(chunk[column])
+            mean = stats.mean
+            std = stats.std(ddof=1) or 0.0
+
+            # Only the anomalous rows are copied out of the mapped files
+            frames = []
+            for chunk in chunks:
+                mask = np.abs(chunk[column] - mean) > threshold * std
+                if mask.any():
+                    frames.append(pd.DataFrame({
+                        "timestamp": chunk["timestamp"][mask],
+                        column: chunk[column][mask]
+                    }))
+            if not frames:
+                return pd.DataFrame(columns=["timestamp", column])
+            return pd.concat(frames, ignore_index=True)
+        except Exception as e:
+            logger.error(f"Error detecting anomalies: {str(e)}")
+            raise
+
     async def detect_anomalies(self, data: pd.DataFrame, column: str) -> pd.DataFrame:
         """Detect anomalies in data"""
         try:
@@ -58,14 +194,21 @@ class AnalyticsEngine:
             # Basic statistics
             stats = data.describe()
             
-            # Trend analysis
+            # Trend analysis, one incremental least-squares fit per numeric column
             if len(data) > 1:
-                trend = np.polyfit(range(len(data)), data.values, 1)[0]
-                insights.append({
-                    "type": "trend",
-                    "description": "increasing" if trend > 0 else "decreasing",
-                    "value": float(trend)
-                })
+                columns = data.select_dtypes("number") if isinstance(data, pd.DataFrame) else data.to_frame()
+                for column, values in columns.items():
+                    trend = TrendEstimator()
+                    trend.update_many(values.to_numpy(dtype=np.float64))
+                    insight = {
+                        "type": "trend",
+                        "description": "increasing" if trend.slope > 0 else "decreasing",
+                        "value": float(trend.slope),
+                        "confidence": trend.confidence
+                    }
+                    if isinstance(data, pd.DataFrame):
+                        insight["column"] = column
+                    insights.append(insight)
 
             # Add more insight generation logic here
             
@@ -1,14 +1,42 @@
-from typing import Dict, List, Any, Optional
-from datetime import datetime
+from typing import Dict, List, Any, Optional, TYPE_CHECKING
+from datetime import datetime, timezone
 import asyncio
-from collections import defaultdict
+import numpy as np
+from .rolling import RollingMatrix, RollingWindow
+from .trend import (CHANGE_DRIFT, CHANGE_THRESHOLD, MIN_TREND_POINTS, MIN_TREND_T,
+                    TrendEstimator, t_confidence)
+from ..core.serialization import dumps_str, loads
+
+if TYPE_CHECKING:
+    from ..core.backplane import Backplane
+
+# Backplane channel carrying the metric values each worker observes
+METRICS_CHANNEL = "insightflow:metrics"
 
 class InsightGenerator:
-    def __init__(self):
+    def __init__(self, default_window_size: int = 1000, vectorized: bool = False,
+                 backplane: Optional["Backplane"] = None):
         self.patterns: Dict[str, Dict] = {}
         self.thresholds: Dict[str, float] = {}
         self.insight_cache: Dict[str, List[Dict]] = {}
-        self.metrics_history: Dict[str, List[float]] = defaultdict(list)
+        self.metrics_history: Dict[str, RollingWindow] = {}
+        self.trend_estimators: Dict[str, TrendEstimator] = {}
+        self.window_sizes: Dict[str, int] = {}
+        self.default_window_size = default_window_size
+
+        # Batched mode keeps every metric history as a row of one matrix so
+        # anomalies, thresholds and trends are computed in one vectorized pass
+        self.vectorized = vectorized
+        self.metrics_matrix = RollingMatrix(default_window_size) if vectorized else None
+
+        # Metric values seen by other workers are replayed into the local
+        # histories so every worker detects against the same data
+        self.backplane = backplane
+
+    async def start(self) -> None:
+        """Start receiving metric values observed by other workers"""
+        if self.backplane is not None:
+            await self.backplane.subscribe(METRICS_CHANNEL, self._on_remote_metrics)
 
     async def generate_insights(self, data: Dict, context: Optional[Dict] = None) -> List[Dict]:
         """Generate insights from data"""
@@ -19,19 +47,29 @@ class InsightGenerator:
             pattern_insights = await self._detect_patterns(data)
             insights.extend(pattern_insights)
             
-            # Anomaly detection
-            anomalies = await self._detect_anomalies(data)
-            insights.extend(anomalies)
-            
-            # Trend analysis
-            trends = await self._analyze_trends(data)
-            insights.extend(trends)
+            if self.vectorized:
+                # Anomalies, threshold breaches and trends in one pass
+                metric_insights = await self._analyze_metrics_vectorized(data)
+                insights.extend(metric_insights)
+            else:
+                # Anomaly detection
+                anomalies = await self._detect_anomalies(data)
+                insights.extend(anomalies)
+
+                # Threshold breaches
+                breaches = await self._detect_threshold_breaches(data)
+                insights.extend(breaches)
+
+                # Trend analysis
+                trends = await self._analyze_trends(data)
+                insights.extend(trends)
             
             # Context-based insights
             if context:
                 context_insights = await self._generate_context_insights(data, context)
                 insights.extend(context_insights)
-            
+
+            await self._share_metrics(data)
             return insights
         except Exception as e:
             raise Exception(f"Insight generation error: {str(e)}")
@@ -56,44 +94,160 @@ class InsightGenerator:
         """Detect anomalies in data"""
         try:
             anomalies = []
-            for metric, values in self.metrics_history.items():
-                if metric in data:
-                    current_value = data[metric]
-                    if self._is_anomaly(current_value, values):
-                        anomalies.append({
-                            "type": "anomaly",
-                            "metric": metric,
-                            "value": current_value,
-                            "threshold": self.thresholds.get(metric, 0),
-                            "timestamp": datetime.utcnow().isoformat()
-                        })
-                    # Update history
-                    values.append(current_value)
-                    if len(values) > 1000:  # Keep last 1000 values
-                        values.pop(0)
+            for metric, current_value in data.items():
+                if isinstance(current_value, bool) or not isinstance(current_value, (int, float)):
+                    continue
+                trend = self._get_trend(metric)
+                if self._is_anomaly(current_value, trend.history):
+                    anomalies.append({
+                        "type": "anomaly",
+                        "metric": metric,
+                        "value": current_value,
+                        "threshold": self.thresholds.get(metric, 0),
+                        "timestamp": datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
+                    })
+                # Update history and trend; the ring buffer evicts the oldest value
+                trend.update(current_value)
             return anomalies
         except Exception as e:
             raise Exception(f"Anomaly detection error: {str(e)}")
 
+    async def _detect_threshold_breaches(self, data: Dict) -> List[Dict]:
+        """Detect metrics above their configured threshold"""
+        try:
+            breaches = []
+            for metric, threshold in self.thresholds.items():
+                value = data.get(metric)
+                if isinstance(value, (int, float)) and not isinstance(value, bool) and value > threshold:
+                    breaches.append({
+                        "type": "threshold",
+                        "metric": metric,
+                        "value": value,
+                        "threshold": threshold,
+                        "timestamp": datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
+                    })
+            return breaches
+        except Exception as e:
+            raise Exception(f"Threshold detection error: {str(e)}")
+
+    async def _analyze_metrics_vectorized(self, data: Dict) -> List[Dict]:
+        """Detect anomalies, threshold breaches and trends for all metrics at once"""
+        try:
+            metrics = [metric for metric, value in data.items()
+                       if isinstance(value, (int, float)) and not isinstance(value, bool)]
+            if not metrics:
+                return []
+            values = np.fromiter((data[metric] for metric in metrics), dtype=np.float64, count=len(metrics))
+            matrix = self.metrics_matrix
+            rows = matrix.rows(metrics)
+
+            # Checks against history happen before the new values are added
+            anomalous = matrix.anomalies(rows, values, 3)  # 3 sigma rule
+            breached = values > matrix.thresholds[rows]
+            changes = matrix.update_change_scores(rows, values, matrix.trend_fit(rows),
+                                                  CHANGE_DRIFT, CHANGE_THRESHOLD, MIN_TREND_POINTS)
+            matrix.append(rows, values)
+
+            fit = matrix.trend_fit(rows)
+            slopes = fit["slope"]
+            # Thresholds for a significant trend
+            trending = (np.abs(slopes) >= 0.01) & (fit["t"] >= MIN_TREND_T)
+
+            timestamp = datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
+            insights = [{
+                "type": "anomaly",
+                "metric": metrics[i],
+                "value": data[metrics[i]],
+                "threshold": self.thresholds.get(metrics[i], 0),
+                "timestamp": timestamp
+            } for i in np.flatnonzero(anomalous)]
+            insights.extend({
+                "type": "threshold",
+                "metric": metrics[i],
+                "value": data[metrics[i]],
+                "threshold": self.thresholds[metrics[i]],
+                "timestamp": timestamp
+            } for i in np.flatnonzero(breached))
+            insights.extend({
+                "type": "trend",
+                "metric": metrics[i],
+                "direction": "up" if slopes[i] > 0 else "down",
+                "magnitude": float(abs(slopes[i])),
+                "confidence": t_confidence(fit["t"][i]),
+                "timestamp": timestamp
+            } for i in np.flatnonzero(trending))
+            insights.extend({
+                "type": "change_point",
+                "metric": metrics[i],
+                "direction": "up" if changes[i] > 0 else "down",
+                "timestamp": timestamp
+            } for i in np.flatnonzero(changes))
+            return insights
+        except Exception as e:
+            raise Exception(f"Vectorized insight error: {str(e)}")
+
     async def _analyze_trends(self, data: Dict) -> List[Dict]:
         """Analyze trends in data"""
         try:
             trends = []
-            for metric, values in self.metrics_history.items():
-                if metric in data:
-                    trend = self._calculate_trend(values)
-                    if trend:
-                        trends.append({
-                            "type": "trend",
-                            "metric": metric,
-                            "direction": trend["direction"],
-                            "magnitude": trend["magnitude"],
-                            "timestamp": datetime.utcnow().isoformat()
-                        })
+            for metric in data:
+                estimator = self.trend_estimators.get(metric)
+                if estimator is None:
+                    continue
+                trend = self._calculate_trend(estimator)
+                if trend:
+                    trends.append({
+                        "type": "trend",
+                        "metric": metric,
+                        "direction": trend["direction"],
+                        "magnitude": trend["magnitude"],
+                        "confidence": trend["confidence"],
+                        "timestamp": datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
+                    })
+                if estimator.changed:
+                    trends.append({
+                        "type": "change_point",
+                        "metric": metric,
+                        "direction": "up" if estimator.changed > 0 else "down",
+                        "timestamp": datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
+                    })
             return trends
         except Exception as e:
             raise Exception(f"Trend analysis error: {str(e)}")
 
+    @staticmethod
+    def _numeric(data: Dict) -> Dict[str, float]:
+        return {metric: value for metric, value in data.items()
+                if isinstance(value, (int, float)) and not isinstance(value, bool)}
+
+    async def _share_metrics(self, data: Dict) -> None:
+        """Publish the metric values of this update to the other workers"""
+        if self.backplane is None:
+            return
+        values = self._numeric(data)
+        if values:
+            await self.backplane.publish(METRICS_CHANNEL, dumps_str({
+                "origin": self.backplane.worker_id, "values": values
+            }))
+
+    async def _on_remote_metrics(self, message: str) -> None:
+        """Add another worker's metric values to the local histories"""
+        update = loads(message)
+        if update["origin"] == self.backplane.worker_id or not update["values"]:
+            return
+        values = update["values"]
+        if self.vectorized:
+            matrix = self.metrics_matrix
+            metrics = list(values)
+            rows = matrix.rows(metrics)
+            array = np.fromiter(values.values(), dtype=np.float64, count=len(metrics))
+            matrix.update_change_scores(rows, array, matrix.trend_fit(rows),
+                                        CHANGE_DRIFT, CHANGE_THRESHOLD, MIN_TREND_POINTS)
+            matrix.append(rows, array)
+        else:
+            for metric, value in values.items():
+                self._get_trend(metric).update(value)
+
     async def _generate_context_insights(self, data: Dict, context: Dict) -> List[Dict]:
         """Generate context-based insights"""
         try:
@@ -112,28 +266,38 @@ class InsightGenerator:
         # Implement confidence calculation logic
         return 0.0
 
-    def _is_anomaly(self, value: float, history: List[float]) -> bool:
+    def _get_history(self, metric: str) -> RollingWindow:
+        """Get the rolling history for a metric, creating it on first use"""
+        history = self.metrics_history.get(metric)
+        if history is None:
+            capacity = self.window_sizes.get(metric, self.default_window_size)
+            history = self.metrics_history[metric] = RollingWindow(capacity)
+        return history
+
+    def _get_trend(self, metric: str) -> TrendEstimator:
+        """Get the trend estimator for a metric, sharing its rolling history"""
+        estimator = self.trend_estimators.get(metric)
+        if estimator is None:
+            estimator = self.trend_estimators[metric] = TrendEstimator(history=self._get_history(metric))
+        return estimator
+
+    def _is_anomaly(self, value: float, history: RollingWindow) -> bool:
         """Check if a value is anomalous"""
-        if not history:
-            return False
-        mean = sum(history) / len(history)
-        std_dev = (sum((x - mean) ** 2 for x in history) / len(history)) ** 0.5
-        return abs(value - mean) > (std_dev * 3)  # 3 sigma rule
-
-    def _calculate_trend(self, values: List[float]) -> Optional[Dict]:
-        """Calculate trend direction and magnitude"""
-        if len(values) < 2:
-            return None
-            
-        slope = (values[-1] - values[0]) / len(values)
+        return history.is_anomaly(value, 3)  # 3 sigma rule
+
+    def _calculate_trend(self, estimator: TrendEstimator) -> Optional[Dict]:
+        """Calculate trend direction, magnitude and confidence"""
+        slope = estimator.slope
         magnitude = abs(slope)
-        
-        if magnitude < 0.01:  # Threshold for significant trend
+        t = estimator.t_statistic
+
+        if magnitude < 0.01 or t < MIN_TREND_T:  # Thresholds for significant trend
             return None
-            
+
         return {
             "direction": "up" if slope > 0 else "down",
-            "magnitude": magnitude
+            "magnitude": magnitude,
+            "confidence": t_confidence(t)
         }
 
     def register_pattern(self, name: str, pattern: Dict) -> None:
@@ -142,4 +306,14 @@ class InsightGenerator:
 
     def set_threshold(self, metric: str, threshold: float) -> None:
         """Set threshold for a metric"""
-        self.thresholds[metric] = threshold
\ No newline at end of file
+        self.thresholds[metric] = threshold
+        if self.metrics_matrix is not None:
+            self.metrics_matrix.set_threshold(metric, threshold)
+
+    def set_window_size(self, metric: str, size: int) -> None:
+        """Set how many recent values are kept for a metric"""
+        self.window_sizes[metric] = size
+        if metric in self.metrics_history:
+            self.metrics_history[metric].resize(size)
+        if self.metrics_matrix is not None:
+            self.metrics_matrix.set_capacity(metric, size)
\ No newline at end of file
@@ -0,0 +1,369 @@
+import math
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+import numpy as np
+
+# Relative residual sum of squares below which a least-squares fit is exact
+PERFECT_FIT_TOLERANCE = 1e-10
+
+class RollingWindow:
+    """Fixed-capacity ring buffer of floats with running sums.
+
+    Mean, variance and the 3-sigma check are O(1) per datapoint. The sum of
+    position * value (positions 0..n-1, oldest first) is kept as well, so a
+    least-squares trend over the window is O(1) too. Sums are kept relative
+    to a shift value and recomputed from the buffer once per ``capacity``
+    appends, which bounds floating point drift.
+    """
+
+    __slots__ = ("capacity", "_values", "_head", "_count", "_shift", "_sum", "_sumsq", "_sum_xy",
+                 "_since_rebase")
+
+    def __init__(self, capacity: int = 1000):
+        if capacity < 1:
+            raise ValueError("Window capacity must be positive")
+        self.capacity = capacity
+        self._values = array("d", bytes(8 * capacity))
+        self._head = 0
+        self._count = 0
+        self._shift = 0.0
+        self._sum = 0.0
+        self._sumsq = 0.0
+        self._sum_xy = 0.0
+        self._since_rebase = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, value: float) -> None:
+        """Add a value, evicting the oldest one when full"""
+        if self._count == 0:
+            self._shift = value
+        if self._count == self.capacity:
+            old = self._values[self._head] - self._shift
+            self._sum -= old
+            self._sumsq -= old * old
+            # The remaining values each move one position towards the front
+            self._sum_xy -= self._sum
+        else:
+            self._count += 1
+
+        self._values[self._head] = value
+        self._head = (self._head + 1) % self.capacity
+        shifted = value - self._shift
+        self._sum_xy += (self._count - 1) * shifted
+        self._sum += shifted
+        self._sumsq += shifted * shifted
+
+        self._since_rebase += 1
+        if self._since_rebase >= self.capacity:
+            self._rebase()
+
+    def _rebase(self) -> None:
+        """Recompute the running sums exactly around the current mean"""
+        values = self.values()
+        self._shift = float(values.mean())
+        shifted = values - self._shift
+        self._sum = float(shifted.sum())
+        self._sumsq = float(np.dot(shifted, shifted))
+        self._sum_xy = float(np.dot(np.arange(len(shifted)), shifted))
+        self._since_rebase = 0
+
+    def regression_sums(self) -> Tuple[int, float, float, float, float]:
+        """Get (count, shift, sum, sum of squares, sum of position * value)"""
+        return self._count, self._shift, self._sum, self._sumsq, self._sum_xy
+
+    @property
+    def mean(self) -> float:
+        if not self._count:
+            return 0.0
+        return self._shift + self._sum / self._count
+
+    @property
+    def variance(self) -> float:
+        if not self._count:
+            return 0.0
+        mean_shifted = self._sum / self._count
+        return max(self._sumsq / self._count - mean_shifted * mean_shifted, 0.0)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def is_anomaly(self, value: float, sigma: float = 3.0) -> bool:
+        """Check whether a value lies more than sigma deviations from the mean"""
+        if not self._count:
+            return False
+        return abs(value - self.mean) > self.std * sigma
+
+    def values(self) -> np.ndarray:
+        """Get the window contents, oldest first"""
+        buffer = np.frombuffer(self._values, dtype=np.float64)
+        if self._count < self.capacity:
+            return buffer[:self._count].copy()
+        return np.concatenate((buffer[self._head:], buffer[:self._head]))
+
+    def resize(self, capacity: int) -> None:
+        """Change the capacity, keeping the most recent values"""
+        recent = self.values()[-capacity:]
+        self.__init__(capacity)
+        for value in recent:
+            self.append(float(value))
+
+class RollingMatrix:
+    """Ring buffers for many metrics stored as the rows of one 2-D array.
+
+    Appends, z-scores, trend fits, change scores and threshold checks for any
+    set of rows are single vectorized NumPy operations. Each row keeps its own
+    capacity, running sums (relative to a per-row shift, as in RollingWindow),
+    CUSUM change scores and an optional threshold. Values are stored in one
+    2-D block per capacity, so a few large windows do not widen every row.
+    """
+
+    def __init__(self, capacity: int = 1000, initial_rows: int = 64):
+        self.capacity = capacity
+        self.initial_rows = initial_rows
+        self.index: Dict[str, int] = {}
+        self.names: List[str] = []
+        # capacity -> values of the rows with that capacity, one slot per row
+        self._blocks: Dict[int, np.ndarray] = {capacity: np.zeros((initial_rows, capacity))}
+        self._used_slots: Dict[int, int] = {capacity: 0}
+        self._free_slots: Dict[int, List[int]] = {capacity: []}
+        self._slots = np.zeros(initial_rows, dtype=np.int64)
+        self._heads = np.zeros(initial_rows, dtype=np.int64)
+        self._counts = np.zeros(initial_rows, dtype=np.int64)
+        self._capacities = np.full(initial_rows, capacity, dtype=np.int64)
+        self._shifts = np.zeros(initial_rows)
+        self._sums = np.zeros(initial_rows)
+        self._sumsqs = np.zeros(initial_rows)
+        self._sum_xys = np.zeros(initial_rows)
+        self._since_rebase = np.zeros(initial_rows, dtype=np.int64)
+        self._cusum_pos = np.zeros(initial_rows)
+        self._cusum_neg = np.zeros(initial_rows)
+        self._change_holdoff = np.zeros(initial_rows, dtype=np.int64)
+        self.thresholds = np.full(initial_rows, np.inf)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, metric: str) -> bool:
+        return metric in self.index
+
+    def rows(self, metrics: List[str]) -> np.ndarray:
+        """Get the row of each metric, adding rows for new metrics"""
+        rows = np.empty(len(metrics), dtype=np.int64)
+        index = self.index
+        for i, metric in enumerate(metrics):
+            row = index.get(metric)
+            if row is None:
+                row = self._add_row(metric)
+            rows[i] = row
+        return rows
+
+    def _add_row(self, metric: str, capacity: Optional[int] = None) -> int:
+        row = len(self.names)
+        if row == len(self._heads):
+            self._grow_rows(max(row * 2, 64))
+        self.index[metric] = row
+        self.names.append(metric)
+        self._capacities[row] = capacity or self.capacity
+        self._slots[row] = self._allocate_slot(int(self._capacities[row]))
+        return row
+
+    def _allocate_slot(self, capacity: int) -> int:
+        """Reserve a zeroed slot in the block of rows with this capacity"""
+        if capacity not in self._blocks:
+            self._blocks[capacity] = np.zeros((1, capacity))
+            self._used_slots[capacity] = 0
+            self._free_slots[capacity] = []
+        if self._free_slots[capacity]:
+            return self._free_slots[capacity].pop()
+        block = self._blocks[capacity]
+        slot = self._used_slots[capacity]
+        if slot == len(block):
+            self._blocks[capacity] = np.vstack((block, np.zeros((len(block), capacity))))
+        self._used_slots[capacity] = slot + 1
+        return slot
+
+    def _release_slot(self, capacity: int, slot: int) -> None:
+        self._blocks[capacity][slot] = 0.0
+        self._free_slots[capacity].append(slot)
+
+    def _groups(self, rows: np.ndarray) -> Iterator[Tuple[int, Union[slice, np.ndarray]]]:
+        """Yield each capacity among rows with a selector for its rows"""
+        if len(self._blocks) == 1:
+            yield self.capacity, slice(None)
+            return
+        capacities = self._capacities[rows]
+        for capacity in np.unique(capacities):
+            yield int(capacity), capacities == capacity
+
+    def _grow_rows(self, rows: int) -> None:
+        extra = rows - len(self._heads)
+        self._slots = np.concatenate((self._slots, np.zeros(extra, dtype=np.int64)))
+        self._heads = np.concatenate((self._heads, np.zeros(extra, dtype=np.int64)))
+        self._counts = np.concatenate((self._counts, np.zeros(extra, dtype=np.int64)))
+        self._capacities = np.concatenate((self._capacities, np.full(extra, self.capacity, dtype=np.int64)))
+        self._shifts = np.concatenate((self._shifts, np.zeros(extra)))
+        self._sums = np.concatenate((self._sums, np.zeros(extra)))
+        self._sumsqs = np.concatenate((self._sumsqs, np.zeros(extra)))
+        self._sum_xys = np.concatenate((self._sum_xys, np.zeros(extra)))
+        self._cusum_pos = np.concatenate((self._cusum_pos, np.zeros(extra)))
+        self._cusum_neg = np.concatenate((self._cusum_neg, np.zeros(extra)))
+        self._change_holdoff = np.concatenate((self._change_holdoff, np.zeros(extra, dtype=np.int64)))
+        self._since_rebase = np.concatenate((self._since_rebase, np.zeros(extra, dtype=np.int64)))
+        self.thresholds = np.concatenate((self.thresholds, np.full(extra, np.inf)))
+
+    def append(self, rows: np.ndarray, values: np.ndarray) -> None:
+        """Append one value to each of the given (distinct) rows"""
+        heads = self._heads[rows]
+        counts = self._counts[rows]
+        capacities = self._capacities[rows]
+
+        first = counts == 0
+        self._shifts[rows[first]] = values[first]
+        shifts = self._shifts[rows]
+
+        # Evict the oldest value from full rows; the rest move one position forward
+        full = counts == capacities
+        slots = self._slots[rows]
+        oldest = np.empty(len(rows))
+        for capacity, selected in self._groups(rows):
+            oldest[selected] = self._blocks[capacity][slots[selected], heads[selected]]
+        evicted = np.where(full, oldest - shifts, 0.0)
+        shifted = values - shifts
+        remaining = self._sums[rows] - evicted
+        positions = np.minimum(counts, capacities - 1)
+        self._sum_xys[rows] += np.where(full, -remaining, 0.0) + positions * shifted
+        self._sums[rows] = remaining + shifted
+        self._sumsqs[rows] += shifted * shifted - evicted * evicted
+
+        for capacity, selected in self._groups(rows):
+            self._blocks[capacity][slots[selected], heads[selected]] = values[selected]
+        self._heads[rows] = (heads + 1) % capacities
+        self._counts[rows] = np.minimum(counts + 1, capacities)
+        self._since_rebase[rows] += 1
+
+        stale = rows[self._since_rebase[rows] >= capacities]
+        if len(stale):
+            self._rebase(stale)
+
+    def _rebase(self, rows: np.ndarray, chunk_rows: int = 1024) -> None:
+        """Recompute the running sums of rows exactly around their means"""
+        for capacity, selected in self._groups(rows):
+            self._rebase_block(capacity, rows[selected], chunk_rows)
+
+    def _rebase_block(self, capacity: int, rows: np.ndarray, chunk_rows: int) -> None:
+        columns = np.arange(capacity)
+        # Work in chunks to bound the temporary arrays
+        for start in range(0, len(rows), chunk_rows):
+            chunk = rows[start:start + chunk_rows]
+            counts = self._counts[chunk]
+            valid = columns < counts[:, None]
+            block = self._blocks[capacity][self._slots[chunk]]
+            means = np.where(valid, block, 0.0).sum(axis=1) / np.maximum(counts, 1)
+            shifted = np.where(valid, block - means[:, None], 0.0)
+            self._shifts[chunk] = means
+            self._sums[chunk] = shifted.sum(axis=1)
+            self._sumsqs[chunk] = (shifted * shifted).sum(axis=1)
+            # Position of each slot counted from the oldest value in its row
+            heads = self._heads[chunk]
+            oldest = np.where(counts == capacity, heads, 0)
+            positions = (columns - oldest[:, None]) % capacity
+            self._sum_xys[chunk] = (shifted * positions).sum(axis=1)
+            self._since_rebase[chunk] = 0
+
+    def counts(self, rows: np.ndarray) -> np.ndarray:
+        return self._counts[rows]
+
+    def mean(self, rows: np.ndarray) -> np.ndarray:
+        counts = np.maximum(self._counts[rows], 1)
+        return self._shifts[rows] + self._sums[rows] / counts
+
+    def std(self, rows: np.ndarray) -> np.ndarray:
+        counts = np.maximum(self._counts[rows], 1)
+        mean_shifted = self._sums[rows] / counts
+        return np.sqrt(np.maximum(self._sumsqs[rows] / counts - mean_shifted * mean_shifted, 0.0))
+
+    def anomalies(self, rows: np.ndarray, values: np.ndarray, sigma: float = 3.0) -> np.ndarray:
+        """Mask of values lying more than sigma deviations from their row mean"""
+        return (self._counts[rows] > 0) & (np.abs(values - self.mean(rows)) > self.std(rows) * sigma)
+
+    def trend_fit(self, rows: np.ndarray) -> Dict[str, np.ndarray]:
+        """Least-squares fit of each row against positions 0..n-1"""
+        n = self._counts[rows].astype(np.float64)
+        safe_n = np.maximum(n, 1.0)
+        x_mean = (n - 1) / 2
+        sxx = np.maximum(n * (n * n - 1) / 12, 1e-12)
+        sums = self._sums[rows]
+        sxy = self._sum_xys[rows] - x_mean * sums
+        syy = np.maximum(self._sumsqs[rows] - sums * sums / safe_n, 0.0)
+        slope = np.where(n >= 2, sxy / sxx, 0.0)
+        sse = syy - slope * sxy
+        # Residuals at rounding level mean an exact fit
+        sse = np.where(sse > PERFECT_FIT_TOLERANCE * syy, sse, 0.0)
+        residual_var = np.where(n > 2, sse / np.maximum(n - 2, 1), 0.0)
+        stderr = np.sqrt(residual_var / sxx)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = np.where(stderr > 0, np.abs(slope) / stderr, np.where(slope != 0, np.inf, 0.0))
+        t = np.where(n > 2, t, 0.0)
+        return {
+            "count": n,
+            "slope": slope,
+            "mean": self._shifts[rows] + sums / safe_n,
+            "x_mean": x_mean,
+            "residual_std": np.sqrt(residual_var),
+            "t": t,
+        }
+
+    def update_change_scores(self, rows: np.ndarray, values: np.ndarray, fit: Dict[str, np.ndarray],
+                             drift: float, threshold: float, min_points: int) -> np.ndarray:
+        """Update two-sided CUSUM scores of new values against the current fit.
+
+        Returns +1/-1 for rows where an upward/downward change was detected
+        (and resets their scores), 0 elsewhere. Rows are not checked again
+        for the next ``min_points`` values after a change.
+        """
+        holdoff = self._change_holdoff[rows]
+        held = holdoff > 0
+        predicted = fit["mean"] + fit["slope"] * (fit["count"] - fit["x_mean"])
+        active = ~held & (fit["count"] >= min_points) & (fit["residual_std"] > 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            z = np.where(active, (values - predicted) / fit["residual_std"], 0.0)
+        positive = np.where(active, np.maximum(self._cusum_pos[rows] + z - drift, 0.0), self._cusum_pos[rows])
+        negative = np.where(active, np.maximum(self._cusum_neg[rows] - z - drift, 0.0), self._cusum_neg[rows])
+        changes = np.where(positive > threshold, 1, np.where(negative > threshold, -1, 0))
+        reset = changes != 0
+        self._cusum_pos[rows] = np.where(reset, 0.0, positive)
+        self._cusum_neg[rows] = np.where(reset, 0.0, negative)
+        self._change_holdoff[rows] = np.where(held, holdoff - 1, np.where(reset, min_points, 0))
+        return changes
+
+    def values(self, metric: str) -> np.ndarray:
+        """Get the contents of a metric's row, oldest first"""
+        row = self.index[metric]
+        count = int(self._counts[row])
+        capacity = int(self._capacities[row])
+        data = self._blocks[capacity][self._slots[row]]
+        if count < capacity:
+            return data[:count].copy()
+        head = int(self._heads[row])
+        return np.concatenate((data[head:], data[:head]))
+
+    def set_capacity(self, metric: str, capacity: int) -> None:
+        """Change the capacity of a metric's row, keeping the most recent values"""
+        if metric not in self.index:
+            self._add_row(metric, capacity)
+            return
+        row = self.index[metric]
+        recent = self.values(metric)[-capacity:]
+        self._release_slot(int(self._capacities[row]), int(self._slots[row]))
+        self._slots[row] = slot = self._allocate_slot(capacity)
+        self._blocks[capacity][slot, :len(recent)] = recent
+        self._capacities[row] = capacity
+        self._counts[row] = len(recent)
+        self._heads[row] = len(recent) % capacity
+        self._rebase(np.array([row]))
+
+    def set_threshold(self, metric: str, threshold: float) -> None:
+        self.thresholds[self.rows([metric])[0]] = threshold
@@ -0,0 +1,365 @@
+import base64
+import hashlib
+import math
+import struct
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+_MASK64 = (1 << 64) - 1
+_DOUBLE = struct.Struct("<d")
+
+def _mix64(x: int) -> int:
+    """splitmix64 finalizer"""
+    x = (x ^ (x >> 30)) * 0xBF58476D1CE4E5B9 & _MASK64
+    x = (x ^ (x >> 27)) * 0x94D049BB133111EB & _MASK64
+    return x ^ (x >> 31)
+
+def hash_value(value: Any) -> int:
+    """Stable 64-bit hash of a scalar, identical across processes"""
+    if isinstance(value, (int, float, np.number)) and not isinstance(value, bool):
+        # Hash numbers by their float64 bits so 1 and 1.0 collide
+        return _mix64(int.from_bytes(_DOUBLE.pack(float(value)), "little"))
+    digest = hashlib.blake2b(str(value).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+def hash_array(values: np.ndarray) -> np.ndarray:
+    """Vectorized hash_value over an array"""
+    if values.dtype.kind in "iuf":
+        x = values.astype(np.float64).view(np.uint64)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return x ^ (x >> np.uint64(31))
+    # Hash each distinct value once
+    codes, uniques = pd.factorize(values)
+    hashes = np.fromiter((hash_value(value) for value in uniques), dtype=np.uint64, count=len(uniques))
+    return hashes[codes]
+
+def _encode(array: np.ndarray) -> str:
+    return base64.b64encode(np.ascontiguousarray(array).tobytes()).decode("ascii")
+
+def _decode(data: str, dtype) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(data), dtype=dtype).copy()
+
+class QuantileSketch:
+    """Mergeable t-digest for approximate quantiles.
+
+    Values are buffered and periodically merged into at most about
+    ``compression`` centroids. Centroids are small near the tails, so
+    extreme quantiles such as p99 stay accurate.
+    """
+
+    def __init__(self, compression: int = 100):
+        self.compression = compression
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self._means = np.empty(0)
+        self._weights = np.empty(0)
+        self._buffer: List[float] = []
+        self._buffer_size = compression * 5
+
+    def update(self, value: float) -> None:
+        self._buffer.append(value)
+        if len(self._buffer) >= self._buffer_size:
+            self._compress()
+
+    def update_many(self, values: np.ndarray) -> None:
+        if len(values):
+            self._compress(np.asarray(values, dtype=np.float64), np.ones(len(values)))
+
+    def _compress(self, means: Optional[np.ndarray] = None,
+                  weights: Optional[np.ndarray] = None) -> None:
+        """Merge buffered values and extra centroids into the digest"""
+        parts = [(self._means, self._weights)]
+        if self._buffer:
+            buffered = np.array(self._buffer)
+            parts.append((buffered, np.ones(len(buffered))))
+            self._buffer = []
+        if means is not None:
+            parts.append((means, weights))
+        means = np.concatenate([part[0] for part in parts])
+        weights = np.concatenate([part[1] for part in parts])
+        if not len(means):
+            return
+        self.min = min(self.min, float(means.min()))
+        self.max = max(self.max, float(means.max()))
+
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+        total = weights.sum()
+        # Group neighbours that fall into the same unit of the k1 scale function
+        q = (np.cumsum(weights) - weights / 2) / total
+        k = np.floor(self.compression / (2 * np.pi) * np.arcsin(2 * q - 1))
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(k)) + 1))
+        self._weights = np.add.reduceat(weights, starts)
+        self._means = np.add.reduceat(means * weights, starts) / self._weights
+        self.count = int(round(total))
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """Combine another digest into this one"""
+        other._compress()
+        self._compress(other._means, other._weights)
+        return self
+
+    def quantile(self, q: float) -> Optional[float]:
+        self._compress()
+        if not self.count:
+            return None
+        centers = np.cumsum(self._weights) - self._weights / 2
+        positions = np.concatenate(([0.0], centers, [self._weights.sum()]))
+        values = np.concatenate(([self.min], self._means, [self.max]))
+        return float(np.interp(q * self.count, positions, values))
+
+    def to_dict(self) -> Dict[str, Any]:
+        self._compress()
+        return {
+            "compression": self.compression,
+            "min": self.min,
+            "max": self.max,
+            "means": _encode(self._means),
+            "weights": _encode(self._weights),
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> "QuantileSketch":
+        sketch = cls(state["compression"])
+        sketch.min = state["min"]
+        sketch.max = state["max"]
+        sketch._means = _decode(state["means"], np.float64)
+        sketch._weights = _decode(state["weights"], np.float64)
+        sketch.count = int(round(sketch._weights.sum()))
+        return sketch
+
+class HyperLogLog:
+    """Mergeable distinct count estimate in 2**precision byte registers"""
+
+    def __init__(self, precision: int = 12):
+        self.precision = precision
+        self._registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, value: Any, h: Optional[int] = None) -> None:
+        if h is None:
+            h = hash_value(value)
+        index = h >> (64 - self.precision)
+        rest = h & ((1 << (64 - self.precision)) - 1)
+        rank = 64 - self.precision - rest.bit_length() + 1
+        if rank > self._registers[index]:
+            self._registers[index] = rank
+
+    def update_many(self, values: np.ndarray) -> None:
+        if not len(values):
+            return
+        hashes = hash_array(values)
+        bits = 64 - self.precision
+        indexes = (hashes >> np.uint64(bits)).astype(np.int64)
+        rest = hashes & np.uint64((1 << bits) - 1)
+        # frexp's exponent is the bit length (0 for zero)
+        ranks = (bits - np.frexp(rest.astype(np.float64))[1] + 1).astype(np.uint8)
+        np.maximum.at(self._registers, indexes, ranks)
+
+    def count(self) -> int:
+        m = len(self._registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self._registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self._registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches with different precision")
+        np.maximum(self._registers, other._registers, out=self._registers)
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"precision": self.precision, "registers": _encode(self._registers)}
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> "HyperLogLog":
+        sketch = cls(state["precision"])
+        sketch._registers = _decode(state["registers"], np.uint8)
+        return sketch
+
+class CountMinSketch:
+    """Mergeable frequency estimates with a bounded set of heavy hitter candidates"""
+
+    def __init__(self, width: int = 2048, depth: int = 4, top_k: int = 10):
+        self.width = width
+        self.depth = depth
+        self.top_k = top_k
+        self.total = 0
+        self._table = np.zeros((depth, width), dtype=np.int64)
+        # Candidate heavy hitters and their hashes
+        self._candidates: Dict[Any, int] = {}
+        self._capacity = top_k * 4
+        self._threshold = 0
+
+    def _indexes(self, hashes: np.ndarray) -> np.ndarray:
+        """Column of each hash in every row, by double hashing"""
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        low = hashes & np.uint64(0xFFFFFFFF)
+        high = hashes >> np.uint64(32)
+        rows = np.arange(self.depth, dtype=np.uint64)[:, None]
+        return ((low + rows * high) % np.uint64(self.width)).astype(np.int64)
+
+    def _estimates(self, hashes: np.ndarray) -> np.ndarray:
+        indexes = self._indexes(hashes)
+        return self._table[np.arange(self.depth)[:, None], indexes].min(axis=0)
+
+    def estimate(self, value: Any) -> int:
+        return int(self._estimates(np.array([hash_value(value)], dtype=np.uint64))[0])
+
+    def update(self, value: Any, h: Optional[int] = None) -> None:
+        if h is None:
+            h = hash_value(value)
+        low, high = h & 0xFFFFFFFF, h >> 32
+        width = self.width
+        flat = self._table.reshape(-1)
+        estimate = None
+        for row in range(self.depth):
+            index = row * width + (low + row * high) % width
+            flat[index] += 1
+            count = flat[index]
+            if estimate is None or count < estimate:
+                estimate = count
+        self.total += 1
+        if value in self._candidates:
+            return
+        if len(self._candidates) < self._capacity or estimate > self._threshold:
+            self._candidates[value] = h
+            self._trim()
+
+    def update_many(self, values: np.ndarray) -> None:
+        if not len(values):
+            return
+        keys, counts = np.unique(values, return_counts=True)
+        hashes = hash_array(keys)
+        indexes = self._indexes(hashes)
+        for row in range(self.depth):
+            np.add.at(self._table[row], indexes[row], counts)
+        self.total += int(counts.sum())
+        self._add_candidates(keys.tolist(), hashes)
+
+    def _add_candidates(self, keys: List[Any], hashes: np.ndarray) -> None:
+        if len(keys) > self._capacity:
+            # Only the most frequent new keys can become candidates
+            top = np.argsort(-self._estimates(hashes), kind="stable")[:self._capacity]
+            keys, hashes = [keys[i] for i in top], hashes[top]
+        for key, h in zip(keys, hashes.tolist()):
+            self._candidates[key] = h
+        self._trim()
+
+    def _trim(self) -> None:
+        if len(self._candidates) <= self._capacity:
+            if len(self._candidates) == self._capacity:
+                self._threshold = int(self._estimates(np.fromiter(self._candidates.values(), dtype=np.uint64)).min())
+            return
+        keys = list(self._candidates)
+        estimates = self._estimates(np.fromiter(self._candidates.values(), dtype=np.uint64))
+        keep = np.argsort(-estimates, kind="stable")[:self._capacity]
+        self._candidates = {keys[i]: self._candidates[keys[i]] for i in keep}
+        self._threshold = int(estimates[keep].min())
+
+    def heavy_hitters(self, k: Optional[int] = None) -> List[Tuple[Any, int]]:
+        """Most frequent values with their estimated counts"""
+        if not self._candidates:
+            return []
+        keys = list(self._candidates)
+        estimates = self._estimates(np.fromiter(self._candidates.values(), dtype=np.uint64))
+        order = np.argsort(-estimates, kind="stable")[:k or self.top_k]
+        return [(keys[i], int(estimates[i])) for i in order]
+
+    def merge(self, other: "CountMinSketch") -> "CountMinSketch":
+        if (other.width, other.depth) != (self.width, self.depth):
+            raise ValueError("Cannot merge Count-Min sketches with different dimensions")
+        self._table += other._table
+        self.total += other.total
+        self._candidates.update(other._candidates)
+        self._trim()
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "width": self.width,
+            "depth": self.depth,
+            "top_k": self.top_k,
+            "total": self.total,
+            "table": _encode(self._table),
+            "candidates": list(self._candidates),
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> "CountMinSketch":
+        sketch = cls(state["width"], state["depth"], state["top_k"])
+        sketch.total = state["total"]
+        sketch._table = _decode(state["table"], np.int64).reshape(sketch.depth, sketch.width)
+        sketch._candidates = {key: hash_value(key) for key in state["candidates"]}
+        sketch._trim()
+        return sketch
+
+class ColumnSketch:
+    """Quantile, distinct count and heavy hitter sketches for one column"""
+
+    QUANTILES = {"p50": 0.5, "p90": 0.9, "p95": 0.95, "p99": 0.99}
+    METRICS = tuple(QUANTILES) + ("distinct_count", "heavy_hitters")
+
+    def __init__(self, compression: int = 100, precision: int = 12,
+                 width: int = 2048, depth: int = 4, top_k: int = 10):
+        # Quantiles are only tracked for numeric values
+        self.quantiles = QuantileSketch(compression)
+        self.distinct = HyperLogLog(precision)
+        self.frequent = CountMinSketch(width, depth, top_k)
+
+    def update(self, value: Any) -> None:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            self.quantiles.update(value)
+        h = hash_value(value)
+        self.distinct.update(value, h)
+        self.frequent.update(value, h)
+
+    def update_many(self, values: np.ndarray) -> None:
+        values = np.asarray(values)
+        if values.dtype.kind in "iuf":
+            values = values[~np.isnan(values)] if values.dtype.kind == "f" else values
+            self.quantiles.update_many(values)
+        self.distinct.update_many(values)
+        self.frequent.update_many(values)
+
+    def result(self, metric: str) -> Any:
+        if metric in self.QUANTILES:
+            return self.quantiles.quantile(self.QUANTILES[metric])
+        if metric == "distinct_count":
+            return self.distinct.count()
+        if metric == "heavy_hitters":
+            return self.frequent.heavy_hitters()
+        raise ValueError(f"Unsupported sketch metric: {metric}")
+
+    def merge(self, other: "ColumnSketch") -> "ColumnSketch":
+        self.quantiles.merge(other.quantiles)
+        self.distinct.merge(other.distinct)
+        self.frequent.merge(other.frequent)
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "quantiles": self.quantiles.to_dict(),
+            "distinct": self.distinct.to_dict(),
+            "frequent": self.frequent.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> "ColumnSketch":
+        sketch = cls.__new__(cls)
+        sketch.quantiles = QuantileSketch.from_dict(state["quantiles"])
+        sketch.distinct = HyperLogLog.from_dict(state["distinct"])
+        sketch.frequent = CountMinSketch.from_dict(state["frequent"])
+        return sketch
+
+    @classmethod
+    def from_array(cls, values: np.ndarray) -> "ColumnSketch":
+        sketch = cls()
+        sketch.update_many(values)
+        return sketch
@@ -0,0 +1,279 @@
+import math
+from collections import deque
+from typing import Dict, Any, Optional, Tuple
+import numpy as np
+from .rolling import PERFECT_FIT_TOLERANCE, RollingWindow
+
+# Two-sided CUSUM on standardized residuals: allowed drift per point and the
+# score (in residual standard deviations) that signals a change point
+CHANGE_DRIFT = 0.5
+CHANGE_THRESHOLD = 5.0
+MIN_TREND_POINTS = 20
+# A trend is reported once its slope is significant at ~95% (|t| >= 1.96)
+MIN_TREND_T = 1.96
+
+def t_confidence(t: float) -> float:
+    """Convert a slope t statistic to a two-sided confidence"""
+    return math.erf(t / math.sqrt(2))
+
+class TrendEstimator:
+    """Incremental least-squares trend with confidence and change points.
+
+    Values are regressed against their position (0 for the oldest value).
+    With a ``window`` (or a shared RollingWindow passed as ``history``) the
+    fit covers the most recent values only; otherwise it covers everything
+    seen. Each update is O(1): the fit is derived from running sums rather
+    than by re-fitting the history. Optionally a bounded sample of recent
+    values is kept for a robust Theil-Sen slope.
+    """
+
+    def __init__(self, window: Optional[int] = None,
+                 history: Optional[RollingWindow] = None,
+                 sample_size: int = 0,
+                 change_drift: float = CHANGE_DRIFT,
+                 change_threshold: float = CHANGE_THRESHOLD,
+                 min_points: int = MIN_TREND_POINTS):
+        if history is None and window:
+            history = RollingWindow(window)
+        self.history = history
+        self.change_drift = change_drift
+        self.change_threshold = change_threshold
+        self.min_points = min_points
+
+        # Running sums when the whole history is covered
+        self._count = 0
+        self._shift = 0.0
+        self._sum = 0.0
+        self._sumsq = 0.0
+        self._sum_xy = 0.0
+
+        self.sample = deque(maxlen=sample_size) if sample_size else None
+        self.seen = 0
+        self._cusum_pos = 0.0
+        self._cusum_neg = 0.0
+        self._holdoff = 0
+        self.change_points = deque(maxlen=16)
+        # Direction (+1/-1) of a change point detected by the latest update
+        self.changed = 0
+
+    def _sums(self) -> Tuple[int, float, float, float, float]:
+        if self.history is not None:
+            return self.history.regression_sums()
+        return self._count, self._shift, self._sum, self._sumsq, self._sum_xy
+
+    def _fit(self) -> Optional[Dict[str, float]]:
+        n, shift, total, total_sq, total_xy = self._sums()
+        if n < 2:
+            return None
+        x_mean = (n - 1) / 2
+        sxx = n * (n * n - 1) / 12
+        sxy = total_xy - x_mean * total
+        syy = max(total_sq - total * total / n, 0.0)
+        slope = sxy / sxx
+        sse = syy - slope * sxy
+        if sse <= PERFECT_FIT_TOLERANCE * syy:
+            sse = 0.0
+        return {
+            "count": n,
+            "slope": slope,
+            "mean": shift + total / n,
+            "x_mean": x_mean,
+            "sxx": sxx,
+            "syy": syy,
+            "sse": sse,
+        }
+
+    @property
+    def slope(self) -> float:
+        fit = self._fit()
+        return fit["slope"] if fit else 0.0
+
+    @property
+    def intercept(self) -> float:
+        """Fitted value at the oldest position"""
+        fit = self._fit()
+        if not fit:
+            return 0.0
+        return fit["mean"] - fit["slope"] * fit["x_mean"]
+
+    @property
+    def r_squared(self) -> float:
+        fit = self._fit()
+        if not fit or fit["syy"] == 0:
+            return 0.0
+        return 1 - fit["sse"] / fit["syy"]
+
+    @property
+    def t_statistic(self) -> float:
+        """Absolute slope divided by its standard error"""
+        fit = self._fit()
+        if not fit or fit["count"] <= 2:
+            return 0.0
+        stderr = math.sqrt(fit["sse"] / (fit["count"] - 2) / fit["sxx"])
+        if stderr == 0:
+            return math.inf if fit["slope"] != 0 else 0.0
+        return abs(fit["slope"]) / stderr
+
+    @property
+    def confidence(self) -> float:
+        """Two-sided confidence that the slope is non-zero (normal approximation)"""
+        return t_confidence(self.t_statistic)
+
+    def update(self, value: float) -> None:
+        """Add a value and check it for a change point"""
+        self.changed = 0
+        if self._holdoff:
+            self._holdoff -= 1
+        else:
+            fit = self._fit()
+            if fit and fit["count"] >= self.min_points and fit["count"] > 2:
+                residual_std = math.sqrt(fit["sse"] / (fit["count"] - 2))
+                if residual_std > 0:
+                    predicted = fit["mean"] + fit["slope"] * (fit["count"] - fit["x_mean"])
+                    z = (value - predicted) / residual_std
+                    self._cusum_pos = max(self._cusum_pos + z - self.change_drift, 0.0)
+                    self._cusum_neg = max(self._cusum_neg - z - self.change_drift, 0.0)
+                    if self._cusum_pos > self.change_threshold:
+                        self._record_change(self.seen, 1)
+                    elif self._cusum_neg > self.change_threshold:
+                        self._record_change(self.seen, -1)
+                    if self.changed and self.history is None:
+                        # The fit restarts at the change point
+                        self._count = 0
+
+        if self.history is not None:
+            self.history.append(value)
+        else:
+            if self._count == 0:
+                self._shift = value
+                self._sum = self._sumsq = self._sum_xy = 0.0
+            shifted = value - self._shift
+            self._sum_xy += self._count * shifted
+            self._sum += shifted
+            self._sumsq += shifted * shifted
+            self._count += 1
+
+        if self.sample is not None:
+            self.sample.append(value)
+        self.seen += 1
+
+    def update_many(self, values: np.ndarray) -> None:
+        """Add an array of values.
+
+        Without a window the sums are updated in one vectorized step. Points
+        are checked for change points against the fit from before the batch
+        (or the batch's own fit when there was too little history), and a
+        change restarts the fit from the point where it was detected.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if self.history is not None:
+            for value in values:
+                self.update(float(value))
+            return
+        self.changed = 0
+        while len(values):
+            values = self._add_segment(values)
+
+    def _add_segment(self, values: np.ndarray) -> np.ndarray:
+        """Add values up to the first change point; return the values after it"""
+        prior = self._fit() if self._count >= self.min_points else None
+        fit = prior or self._fit_with(values)
+        skip = min(self._holdoff, len(values))
+        self._holdoff -= skip
+        change = None
+        if fit and fit["count"] >= self.min_points and fit["count"] > 2:
+            residual_std = math.sqrt(fit["sse"] / (fit["count"] - 2))
+            if residual_std > 0:
+                positions = np.arange(self._count + skip, self._count + len(values), dtype=np.float64)
+                predicted = fit["mean"] + fit["slope"] * (positions - fit["x_mean"])
+                change = self._scan_changes((values[skip:] - predicted) / residual_std)
+
+        if change is None:
+            self._add_values(values)
+            return values[:0]
+        index, direction = change
+        index += skip
+        # The fit restarts at the change point
+        self._add_values(values[:index])
+        self._record_change(self.seen, direction)
+        self._count = 0
+        self._add_values(values[index:index + 1])
+        return values[index + 1:]
+
+    def _fit_with(self, values: np.ndarray) -> Optional[Dict[str, float]]:
+        """Fit over the current sums plus values, without keeping them"""
+        state = (self._count, self._shift, self._sum, self._sumsq, self._sum_xy)
+        self._add_values(values, track=False)
+        fit = self._fit()
+        self._count, self._shift, self._sum, self._sumsq, self._sum_xy = state
+        return fit
+
+    def _add_values(self, values: np.ndarray, track: bool = True) -> None:
+        if not len(values):
+            return
+        if self._count == 0:
+            self._shift = float(values[0])
+            self._sum = self._sumsq = self._sum_xy = 0.0
+        shifted = values - self._shift
+        positions = np.arange(self._count, self._count + len(values), dtype=np.float64)
+        self._sum_xy += float(np.dot(positions, shifted))
+        self._sum += float(shifted.sum())
+        self._sumsq += float(np.dot(shifted, shifted))
+        self._count += len(values)
+        if track:
+            if self.sample is not None:
+                self.sample.extend(values[-self.sample.maxlen:].tolist())
+            self.seen += len(values)
+
+    def _scan_changes(self, z: np.ndarray) -> Optional[Tuple[int, int]]:
+        """Run the CUSUM recursion over standardized residuals, vectorized.
+
+        S_t = max(0, S_{t-1} + x_t) equals C_t - min(0, min_{s<=t} C_s) where C
+        is the running sum of x started at S_0. Returns the index and direction
+        of the first alarm, or None after carrying the scores forward.
+        """
+        positive = self._lindley(self._cusum_pos, z - self.change_drift)
+        negative = self._lindley(self._cusum_neg, -z - self.change_drift)
+        alarms = np.flatnonzero((positive > self.change_threshold) | (negative > self.change_threshold))
+        if len(alarms):
+            first = int(alarms[0])
+            return first, 1 if positive[first] > self.change_threshold else -1
+        if len(z):
+            self._cusum_pos = float(positive[-1])
+            self._cusum_neg = float(negative[-1])
+        return None
+
+    @staticmethod
+    def _lindley(initial: float, increments: np.ndarray) -> np.ndarray:
+        totals = initial + np.cumsum(increments)
+        return totals - np.minimum(np.minimum.accumulate(totals), 0.0)
+
+    def _record_change(self, index: int, direction: int) -> None:
+        self.change_points.append({"index": index, "direction": "up" if direction > 0 else "down"})
+        self.changed = direction
+        self._cusum_pos = 0.0
+        self._cusum_neg = 0.0
+        self._holdoff = self.min_points
+
+    def theil_sen_slope(self) -> Optional[float]:
+        """Median of pairwise slopes over the retained sample"""
+        if self.sample is None or len(self.sample) < 2:
+            return None
+        values = np.fromiter(self.sample, dtype=np.float64)
+        i, j = np.triu_indices(len(values), 1)
+        return float(np.median((values[j] - values[i]) / (j - i)))
+
+    def result(self) -> Dict[str, Any]:
+        """Get the current trend statistics"""
+        n = self._sums()[0]
+        result = {
+            "slope": self.slope,
+            "intercept": self.intercept,
+            "r_squared": self.r_squared,
+            "confidence": self.confidence,
+            "points": n,
+            "change_points": list(self.change_points),
+        }
+        if self.sample is not None:
+            result["theil_sen_slope"] = self.theil_sen_slope()
+        return result
@@ -0,0 +1,168 @@
+import logging
+import math
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, TYPE_CHECKING
+from .aggregation import RunningStats
+from ..config import config
+
+if TYPE_CHECKING:
+    from ..core.client_manager import ClientManager
+    from ..data.storage import BufferedStorage
+
+logger = logging.getLogger(__name__)
+
+def _utc_isoformat(seconds: float) -> str:
+    """ISO text of an epoch time as naive UTC, the format stored timestamps use"""
+    return datetime.fromtimestamp(seconds, timezone.utc).replace(tzinfo=None).isoformat()
+
+class _SourceWindows:
+    """Open windows and watermark for one source"""
+
+    __slots__ = ("windows", "max_event_time", "late_records")
+
+    def __init__(self):
+        self.windows: Dict[float, Dict[str, RunningStats]] = {}
+        self.max_event_time = -math.inf
+        self.late_records = 0
+
+class WindowAggregator:
+    """Tumbling and sliding event-time window aggregation.
+
+    Records are assigned to windows by their ``timestamp``. A window closes
+    once the watermark (latest event time seen minus ``allowed_lateness``)
+    passes its end; its aggregate is then written to storage and broadcast
+    to ``source.{source_id}.window`` subscribers. Records arriving for a
+    closed window are counted as late and dropped, so only open windows are
+    kept in memory.
+    """
+
+    def __init__(self, size: Optional[float] = None,
+                 slide: Optional[float] = None,
+                 allowed_lateness: Optional[float] = None,
+                 storage: Optional["BufferedStorage"] = None,
+                 client_manager: Optional["ClientManager"] = None):
+        analytics_config = config.get_config().analytics
+        self.size = float(size or analytics_config.interval)
+        self.slide = float(slide or analytics_config.window_slide or self.size)
+        if self.slide > self.size:
+            raise ValueError("Window slide cannot be larger than the window size")
+        self.allowed_lateness = float(
+            allowed_lateness if allowed_lateness is not None else analytics_config.allowed_lateness
+        )
+        self.storage = storage
+        self.client_manager = client_manager
+        self._sources: Dict[str, _SourceWindows] = {}
+
+    def _event_time(self, record: Dict[str, Any]) -> float:
+        """Get the event time of a record in epoch seconds"""
+        value = record.get("timestamp")
+        if value is None:
+            return datetime.now(timezone.utc).timestamp()
+        if isinstance(value, (int, float)):
+            return float(value)
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value)
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+
+    def _window_starts(self, event_time: float) -> List[float]:
+        """Start times of every window containing event_time"""
+        last_start = math.floor(event_time / self.slide) * self.slide
+        starts = []
+        start = last_start
+        while start > event_time - self.size:
+            starts.append(start)
+            start -= self.slide
+        return starts
+
+    def watermark(self, source_id: str) -> float:
+        state = self._sources.get(source_id)
+        if state is None:
+            return -math.inf
+        return state.max_event_time - self.allowed_lateness
+
+    async def process(self, source_id: str, record: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Add a record to its windows and emit any windows that closed"""
+        state = self._sources.setdefault(source_id, _SourceWindows())
+        event_time = self._event_time(record)
+        watermark = state.max_event_time - self.allowed_lateness
+
+        assigned = False
+        for start in self._window_starts(event_time):
+            if start + self.size <= watermark:
+                continue
+            columns = state.windows.setdefault(start, {})
+            for column, value in record.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                columns.setdefault(column, RunningStats()).update(value)
+            assigned = True
+        if not assigned:
+            state.late_records += 1
+            return []
+
+        if event_time <= state.max_event_time:
+            return []
+        state.max_event_time = event_time
+        return await self._close_windows(source_id, state.max_event_time - self.allowed_lateness)
+
+    async def _close_windows(self, source_id: str, watermark: float) -> List[Dict[str, Any]]:
+        state = self._sources[source_id]
+        closed = sorted(start for start in state.windows if start + self.size <= watermark)
+        aggregates = []
+        for start in closed:
+            aggregate = self._build_aggregate(source_id, start, state.windows.pop(start))
+            await self._emit(source_id, aggregate)
+            aggregates.append(aggregate)
+        return aggregates
+
+    def _build_aggregate(self, source_id: str, start: float,
+                         columns: Dict[str, RunningStats]) -> Dict[str, Any]:
+        return {
+            "source": source_id,
+            "window_start": _utc_isoformat(start),
+            "window_end": _utc_isoformat(start + self.size),
+            "size": self.size,
+            "slide": self.slide,
+            "metrics": {
+                column: {metric: stats.result(metric) for metric in RunningStats.METRICS}
+                for column, stats in columns.items()
+            }
+        }
+
+    async def _emit(self, source_id: str, aggregate: Dict[str, Any]) -> None:
+        """Write a closed window to storage and push it to subscribers"""
+        try:
+            if self.storage is not None:
+                row = {"timestamp": aggregate["window_start"], "window_end": aggregate["window_end"]}
+                for column, metrics in aggregate["metrics"].items():
+                    for metric, value in metrics.items():
+                        row[f"{column}_{metric}"] = value
+                await self.storage.store(row, f"{source_id}_windows")
+            if self.client_manager is not None:
+                await self.client_manager.broadcast(
+                    {"type": "window", **aggregate}, topic=f"source.{source_id}.window"
+                )
+        except Exception as e:
+            logger.error(f"Error emitting window for {source_id}: {str(e)}")
+
+    async def flush(self, source_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Close and emit all open windows, e.g. on shutdown"""
+        source_ids = [source_id] if source_id else list(self._sources)
+        aggregates = []
+        for current in source_ids:
+            if current in self._sources:
+                aggregates.extend(await self._close_windows(current, math.inf))
+        return aggregates
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get open window counts, watermarks and late record counts per source"""
+        return {
+            source_id: {
+                "open_windows": len(state.windows),
+                "watermark": self.watermark(source_id),
+                "late_records": state.late_records,
+            }
+            for source_id, state in self._sources.items()
+        }
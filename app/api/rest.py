@@ -1,42 +1,102 @@
-from fastapi import APIRouter, HTTPException, Depends, WebSocket
-from typing import Dict, Any, List
+import logging
+from fastapi import APIRouter, HTTPException, Depends, Request, WebSocket
+from starlette.requests import HTTPConnection
+from fastapi.responses import Response
+from typing import Dict, Any, List, Optional
 from ..models.schema import DataSource, AnalyticsConfig
 from ..core.mcp_server import MCPServer
+from ..core.client_manager import ClientManager
+from ..core.serialization import dumps
+from ..data.processors import DataProcessor
+from ..data.supervisor import IngestionSupervisor
+from ..ai.claude_connector import ClaudeConnector
+from .websocket import WebSocketAPI
+
+logger = logging.getLogger(__name__)
+
+class FastJSONResponse(Response):
+    """JSON response encoded by the shared serializer"""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+# RestAPI attribute -> app.state attribute set by the application lifespan
+STATE_NAMES = {"ai_connector": "claude_connector"}
 
 class RestAPI:
-    def __init__(self, mcp_server: MCPServer, data_processor: DataProcessor, ai_connector: ClaudeConnector):
-        self.router = APIRouter()
+    """REST and WebSocket routes over the application's components.
+
+    Components passed to the constructor are used as given; any left out
+    are looked up on ``app.state`` per request, where the application
+    lifespan stores them once they have started.
+    """
+
+    def __init__(self, mcp_server: Optional[MCPServer] = None, data_processor: Optional[DataProcessor] = None,
+                 ai_connector: Optional[ClaudeConnector] = None,
+                 ingestion_supervisor: Optional[IngestionSupervisor] = None,
+                 client_manager: Optional[ClientManager] = None):
+        self.router = APIRouter(default_response_class=FastJSONResponse)
         self.mcp_server = mcp_server
         self.data_processor = data_processor
         self.ai_connector = ai_connector
+        self.ingestion_supervisor = ingestion_supervisor
+        self.client_manager = client_manager
         self._setup_routes()
 
+    def _resolve(self, connection: HTTPConnection, name: str) -> Any:
+        """Get an injected component, or the one the application started"""
+        component = getattr(self, name)
+        if component is None:
+            component = getattr(connection.app.state, STATE_NAMES.get(name, name), None)
+        if component is None:
+            raise HTTPException(status_code=404, detail=f"{name} not configured")
+        return component
+
     def _setup_routes(self):
         @self.router.get("/tools")
-        async def list_tools():
+        async def list_tools(request: Request):
             """List all available MCP tools"""
-            return {"tools": self.mcp_server.tools}
+            return FastJSONResponse({"tools": self._resolve(request, "mcp_server").tools})
 
         @self.router.post("/tool/{tool_name}")
-        async def call_tool(tool_name: str, parameters: Dict[str, Any]):
+        async def call_tool(request: Request, tool_name: str, parameters: Dict[str, Any]):
             """Execute an MCP tool"""
+            mcp_server = self._resolve(request, "mcp_server")
             try:
-                result = await self.mcp_server.handle_tool_call(tool_name, parameters, "rest-api")
-                return result
+                result = await mcp_server.handle_tool_call(tool_name, parameters, "rest-api")
+                # Returning the response skips FastAPI's jsonable_encoder pass
+                return FastJSONResponse(result)
             except Exception as e:
                 raise HTTPException(status_code=500, detail=str(e))
 
+        @self.router.get("/metrics/storage")
+        async def storage_metrics(request: Request):
+            """Get storage connection pool utilization"""
+            data_processor = self._resolve(request, "data_processor")
+            return FastJSONResponse(data_processor.storage.storage_engine.get_pool_stats())
+
+        @self.router.get("/metrics/ingestion")
+        async def ingestion_metrics(request: Request):
+            """Get per-source pipeline state, stage throughput and latency"""
+            return FastJSONResponse(self._resolve(request, "ingestion_supervisor").get_stats())
+
+        @self.router.get("/metrics/clients")
+        async def client_metrics(request: Request):
+            """Get broadcast fan-out counters and latency histograms"""
+            return FastJSONResponse(self._resolve(request, "client_manager").get_stats())
+
+        @self.router.get("/metrics/ai")
+        async def ai_metrics(request: Request):
+            """Get Claude request concurrency, latency and response cache hit rates"""
+            return FastJSONResponse(self._resolve(request, "ai_connector").get_stats())
+
         @self.router.websocket("/ws")
         async def websocket_endpoint(websocket: WebSocket):
             """WebSocket endpoint for real-time MCP communication"""
-            await websocket.accept()
-            self.mcp_server.websocket_connections.append(websocket)
-            try:
-                while True:
-                    data = await websocket.receive_json()
-                    response = await self.mcp_server.handle_client_message(data, str(websocket))
-                    await websocket.send_json(response)
-            except Exception as e:
-                logger.error(f"WebSocket error: {e}")
-            finally:
-                self.mcp_server.websocket_connections.remove(websocket)
+            # Subscriptions, streamed tool calls and replies all go through
+            # the client manager's per-client send queue
+            websocket_api = WebSocketAPI(self._resolve(websocket, "mcp_server"),
+                                         self._resolve(websocket, "client_manager"))
+            await websocket_api.handle_websocket(websocket)
@@ -1,11 +1,11 @@
 from fastapi import WebSocket, WebSocketDisconnect, Depends
 from typing import Dict, Optional
-import json
 import asyncio
 from uuid import uuid4
 
 from ..core.mcp_server import MCPServer
 from ..core.client_manager import ClientManager
+from ..core.serialization import loads
 
 class WebSocketAPI:
     def __init__(self, mcp_server: MCPServer, client_manager: ClientManager):
@@ -13,19 +13,26 @@ class WebSocketAPI:
         self.client_manager = client_manager
 
     async def handle_websocket(self, websocket: WebSocket):
-        client_id = str(uuid4())
+        # The client manager accepts the socket and owns the client id used
+        # for subscriptions and replies
+        client_id = await self.client_manager.connect(websocket, str(uuid4()))
         try:
             await self.mcp_server.register_client(websocket, client_id)
             
             while True:
-                message = await websocket.receive_json()
+                message = loads(await websocket.receive_text())
                 await self._process_websocket_message(client_id, message)
                 
         except WebSocketDisconnect:
-            await self.client_manager.disconnect(client_id)
-        except Exception as e:
-            await self.client_manager.disconnect(client_id)
-            raise e
+            pass
+        finally:
+            # Shielded so a handler cancelled by the server still ends the session
+            await asyncio.shield(self._disconnect(client_id))
+
+    async def _disconnect(self, client_id: str):
+        """Release a client's connection and MCP session"""
+        await self.client_manager.disconnect(client_id)
+        await self.mcp_server.unregister_client(client_id)
 
     async def _process_websocket_message(self, client_id: str, message: dict):
         """Process incoming WebSocket messages"""
@@ -40,7 +47,15 @@ class WebSocketAPI:
                 for topic in topics:
                     await self.client_manager.unsubscribe(client_id, topic)
                     
-            elif message.get("type") == "query":
+            elif message.get("type") == "tool_call" and message.get("stream"):
+                # Runs alongside this loop, so further messages and the
+                # disconnect that cancels it are still received
+                self.mcp_server.stream_tool_call(
+                    message, client_id,
+                    lambda reply: self.client_manager.send_message(client_id, reply)
+                )
+
+            elif message.get("type") in ("query", "tool_call"):
                 response = await self.mcp_server.handle_client_message(
                     client_id=client_id,
                     message=message
@@ -29,26 +29,38 @@ class Config:
                 port=int(self._config.get("server", {}).get("port", 8000)),
                 debug=bool(self._config.get("server", {}).get("debug", False)),
                 workers=int(self._config.get("server", {}).get("workers", 4)),
-                request_timeout=int(self._config.get("server", {}).get("request_timeout", 30))
+                request_timeout=int(self._config.get("server", {}).get("request_timeout", 30)),
+                backplane_url=os.getenv("BACKPLANE_URL", self._config.get("server", {}).get("backplane_url"))
             ),
             database=DatabaseConfig(
                 url=os.getenv("DATABASE_URL", self._config.get("database", {}).get("url", "sqlite:///data.db")),
                 pool_size=int(self._config.get("database", {}).get("pool_size", 5)),
                 max_overflow=int(self._config.get("database", {}).get("max_overflow", 10)),
-                timeout=int(self._config.get("database", {}).get("timeout", 30))
+                timeout=int(self._config.get("database", {}).get("timeout", 30)),
+                columnar_path=self._config.get("database", {}).get("columnar_path", "data/columnar"),
+                partition_interval=self._config.get("database", {}).get("partition_interval", "hour"),
+                columnar_format=self._config.get("database", {}).get("columnar_format", "parquet")
             ),
             analytics=AnalyticsConfig(
                 metrics=self._config.get("analytics", {}).get("metrics", ["count", "average", "sum"]),
                 interval=int(self._config.get("analytics", {}).get("interval", 60)),
                 batch_size=int(self._config.get("analytics", {}).get("batch_size", 1000)),
-                cache_ttl=int(self._config.get("analytics", {}).get("cache_ttl", 300))
+                cache_ttl=int(self._config.get("analytics", {}).get("cache_ttl", 300)),
+                cache_max_entries=int(self._config.get("analytics", {}).get("cache_max_entries", 1024)),
+                cache_store=self._config.get("analytics", {}).get("cache_store"),
+                window_slide=self._config.get("analytics", {}).get("window_slide"),
+                allowed_lateness=int(self._config.get("analytics", {}).get("allowed_lateness", 0))
             ),
             ai=AIModelConfig(
                 model_name=os.getenv("AI_MODEL_NAME", self._config.get("ai", {}).get("model_name", "claude-2")),
                 api_key=os.getenv("CLAUDE_API_KEY", self._config.get("ai", {}).get("api_key", "")),
                 temperature=float(self._config.get("ai", {}).get("temperature", 0.7)),
                 max_tokens=int(self._config.get("ai", {}).get("max_tokens", 2000)),
-                context_window=int(self._config.get("ai", {}).get("context_window", 4000))
+                context_window=int(self._config.get("ai", {}).get("context_window", 4000)),
+                prompt_budget=self._config.get("ai", {}).get("prompt_budget"),
+                base_url=os.getenv("ANTHROPIC_BASE_URL", self._config.get("ai", {}).get("base_url")),
+                max_concurrency=int(self._config.get("ai", {}).get("max_concurrency", 8)),
+                max_retries=int(self._config.get("ai", {}).get("max_retries", 3))
             ),
             logging=LogConfig(
                 level=os.getenv("LOG_LEVEL", self._config.get("logging", {}).get("level", "INFO")),
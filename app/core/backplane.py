@@ -0,0 +1,265 @@
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Dict, List, Optional
+from uuid import uuid4
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # pragma: no cover - redis is optional
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[str], Awaitable[None]]
+
+# Atomic compare-and-set of a hash field; an empty new value deletes it
+_HCAS_SCRIPT = """
+if redis.call('HGET', KEYS[1], ARGV[1]) ~= ARGV[2] then return 0 end
+if ARGV[3] == '' then redis.call('HDEL', KEYS[1], ARGV[1]) else redis.call('HSET', KEYS[1], ARGV[1], ARGV[3]) end
+return 1
+"""
+
+class Backplane(ABC):
+    """Pub/sub channels and shared hashes connecting the workers of a deployment.
+
+    Each worker process owns one backplane with a unique ``worker_id``.
+    Messages published on a channel reach the handlers subscribed to it in
+    every worker, including the publisher's own, in publish order. Hashes
+    hold state that any worker may read, such as which worker a client is
+    connected to.
+    """
+
+    def __init__(self):
+        self.worker_id = uuid4().hex
+        self._handlers: Dict[str, List[Handler]] = {}
+        self.published = 0
+        self.received = 0
+
+    @abstractmethod
+    async def start(self) -> None:
+        pass
+
+    @abstractmethod
+    async def close(self) -> None:
+        pass
+
+    @abstractmethod
+    async def publish(self, channel: str, message: str) -> None:
+        pass
+
+    @abstractmethod
+    async def _subscribe_channel(self, channel: str) -> None:
+        """Start receiving a channel's messages"""
+        pass
+
+    @abstractmethod
+    async def hset(self, key: str, field: str, value: str) -> None:
+        pass
+
+    @abstractmethod
+    async def hget(self, key: str, field: str) -> Optional[str]:
+        pass
+
+    @abstractmethod
+    async def hgetall(self, key: str) -> Dict[str, str]:
+        pass
+
+    @abstractmethod
+    async def hdel(self, key: str, field: str) -> None:
+        pass
+
+    @abstractmethod
+    async def hsetnx(self, key: str, field: str, value: str) -> bool:
+        """Set a field only if it is unset; True when it was set"""
+        pass
+
+    @abstractmethod
+    async def hcas(self, key: str, field: str, expected: str, value: Optional[str]) -> bool:
+        """Replace a field, or delete it when value is None, only if it
+        still holds expected; True when it was changed"""
+        pass
+
+    async def subscribe(self, channel: str, handler: Handler) -> None:
+        """Call handler with every message published on channel by any worker"""
+        handlers = self._handlers.setdefault(channel, [])
+        handlers.append(handler)
+        if len(handlers) == 1:
+            await self._subscribe_channel(channel)
+
+    async def _dispatch(self, channel: str, message: str) -> None:
+        self.received += 1
+        for handler in self._handlers.get(channel, ()):
+            try:
+                await handler(message)
+            except Exception as e:
+                logger.error(f"Error handling backplane message on {channel}: {str(e)}")
+
+    def get_stats(self) -> Dict[str, int]:
+        return {"published": self.published, "received": self.received, "channels": len(self._handlers)}
+
+class LocalHub:
+    """Shared state for the LocalBackplanes of one process"""
+
+    def __init__(self):
+        self.backplanes: List["LocalBackplane"] = []
+        self.hashes: Dict[str, Dict[str, str]] = {}
+
+class LocalBackplane(Backplane):
+    """In-process backplane for single-worker runs and tests.
+
+    Backplanes created with the same hub behave like workers sharing one
+    Redis server, so multi-worker delivery can be exercised in one process.
+    """
+
+    def __init__(self, hub: Optional[LocalHub] = None):
+        super().__init__()
+        self.hub = hub or LocalHub()
+        self._channels: set = set()
+        self._inbox: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self not in self.hub.backplanes:
+            self.hub.backplanes.append(self)
+        if self._task is None:
+            self._task = asyncio.create_task(self._deliver())
+
+    async def close(self) -> None:
+        if self in self.hub.backplanes:
+            self.hub.backplanes.remove(self)
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _deliver(self) -> None:
+        while True:
+            channel, message = await self._inbox.get()
+            await self._dispatch(channel, message)
+            self._inbox.task_done()
+
+    async def publish(self, channel: str, message: str) -> None:
+        self.published += 1
+        for backplane in self.hub.backplanes:
+            if channel in backplane._channels:
+                backplane._inbox.put_nowait((channel, message))
+
+    async def _subscribe_channel(self, channel: str) -> None:
+        self._channels.add(channel)
+
+    async def join(self) -> None:
+        """Wait until every message delivered to this worker has been handled"""
+        await self._inbox.join()
+
+    async def hset(self, key: str, field: str, value: str) -> None:
+        self.hub.hashes.setdefault(key, {})[field] = value
+
+    async def hget(self, key: str, field: str) -> Optional[str]:
+        return self.hub.hashes.get(key, {}).get(field)
+
+    async def hgetall(self, key: str) -> Dict[str, str]:
+        return dict(self.hub.hashes.get(key, {}))
+
+    async def hdel(self, key: str, field: str) -> None:
+        self.hub.hashes.get(key, {}).pop(field, None)
+
+    async def hsetnx(self, key: str, field: str, value: str) -> bool:
+        fields = self.hub.hashes.setdefault(key, {})
+        if field in fields:
+            return False
+        fields[field] = value
+        return True
+
+    async def hcas(self, key: str, field: str, expected: str, value: Optional[str]) -> bool:
+        fields = self.hub.hashes.setdefault(key, {})
+        if fields.get(field) != expected:
+            return False
+        if value is None:
+            del fields[field]
+        else:
+            fields[field] = value
+        return True
+
+class RedisBackplane(Backplane):
+    """Backplane on Redis pub/sub and hashes.
+
+    Redis pub/sub delivers at most once: messages published while a worker
+    is reconnecting are not replayed to it. The listener reconnects with
+    exponential backoff and redis-py resubscribes its channels.
+    """
+
+    def __init__(self, url: str, max_backoff: float = 30.0):
+        if redis is None:
+            raise ImportError("The redis package is required for a Redis backplane")
+        super().__init__()
+        self.url = url
+        self.max_backoff = max_backoff
+        self.client = None
+        self._pubsub = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self.client is None:
+            self.client = redis.from_url(self.url, decode_responses=True)
+            self._pubsub = self.client.pubsub()
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def publish(self, channel: str, message: str) -> None:
+        self.published += 1
+        await self.client.publish(channel, message)
+
+    async def _subscribe_channel(self, channel: str) -> None:
+        await self._pubsub.subscribe(channel)
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def _listen(self) -> None:
+        failures = 0
+        while True:
+            try:
+                async for message in self._pubsub.listen():
+                    failures = 0
+                    if message["type"] == "message":
+                        await self._dispatch(message["channel"], message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                delay = min(0.5 * 2 ** failures, self.max_backoff)
+                failures += 1
+                logger.warning(f"Backplane connection lost, retrying in {delay:.1f}s: {str(e)}")
+                await asyncio.sleep(delay)
+
+    async def hset(self, key: str, field: str, value: str) -> None:
+        await self.client.hset(key, field, value)
+
+    async def hget(self, key: str, field: str) -> Optional[str]:
+        return await self.client.hget(key, field)
+
+    async def hgetall(self, key: str) -> Dict[str, str]:
+        return await self.client.hgetall(key)
+
+    async def hdel(self, key: str, field: str) -> None:
+        await self.client.hdel(key, field)
+
+    async def hsetnx(self, key: str, field: str, value: str) -> bool:
+        return bool(await self.client.hsetnx(key, field, value))
+
+    async def hcas(self, key: str, field: str, expected: str, value: Optional[str]) -> bool:
+        return bool(await self.client.eval(_HCAS_SCRIPT, 1, key, field, expected, value or ""))
+
+def create_backplane(url: Optional[str] = None) -> Backplane:
+    """Redis backplane for redis:// URLs, otherwise an in-process one"""
+    if url and url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackplane(url)
+    return LocalBackplane()
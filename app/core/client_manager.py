@@ -1,46 +1,258 @@
+import asyncio
 import logging
-from typing import Dict, Set, Any
+import time
+from enum import Enum
+from uuid import uuid4
+from typing import Dict, Set, Any, Optional
 from fastapi import WebSocket
+from .backplane import Backplane
+from .metrics import LatencyHistogram
+from .serialization import dumps_str
+from .subscriptions import SubscriptionRegistry
 
 logger = logging.getLogger(__name__)
 
+# Backplane channel for broadcasts and direct messages between workers
+MESSAGE_CHANNEL = "insightflow:client_messages"
+# Backplane hash of client id -> id of the worker holding its connection
+CLIENTS_KEY = "insightflow:clients"
+
+class SlowConsumerPolicy(str, Enum):
+    EVICT = "evict"              # Disconnect a client whose queue fills or send times out
+    DROP_OLDEST = "drop_oldest"  # Degrade: discard the client's oldest queued message
+    DROP_NEWEST = "drop_newest"  # Degrade: skip the new message for that client
+
+class ClientConnection:
+    """Outbound queue and writer task for one client"""
+
+    def __init__(self, client_id: str, websocket: WebSocket, queue_size: int):
+        self.client_id = client_id
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.task: Optional[asyncio.Task] = None
+
 class ClientManager:
-    def __init__(self):
-        self.active_clients: Set[WebSocket] = set()
-        self.client_subscriptions: Dict[str, Set[WebSocket]] = {}
+    """Tracks connected clients by id and fans messages out to them.
+
+    Topic subscriptions, including wildcard patterns, are held in a
+    SubscriptionRegistry. Every client gets a bounded outbound queue
+    drained by its own writer task, so ``broadcast`` encodes a message
+    once, enqueues it for every target without waiting on any socket and
+    returns. A client whose queue is full or whose send exceeds
+    ``send_timeout`` is handled by ``slow_consumer_policy``: evicted, or
+    degraded by dropping messages. With a ``backplane``, broadcasts and
+    messages for clients connected to other workers are relayed to them.
+    """
 
-    async def connect(self, websocket: WebSocket):
-        """Connect a new client"""
+    def __init__(self, queue_size: int = 100, send_timeout: float = 5.0,
+                 slow_consumer_policy: SlowConsumerPolicy = SlowConsumerPolicy.DROP_OLDEST,
+                 backplane: Optional[Backplane] = None):
+        self.subscriptions = SubscriptionRegistry()
+        self.backplane = backplane
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.slow_consumer_policy = SlowConsumerPolicy(slow_consumer_policy)
+        self.connections: Dict[str, ClientConnection] = {}
+        # Background tasks closing the sockets of evicted clients
+        self._evictions: Set[asyncio.Task] = set()
+        # broadcast call time (encode + enqueue) and per-client enqueue-to-sent time
+        self.fanout_latency = LatencyHistogram()
+        self.delivery_latency = LatencyHistogram()
+        self.broadcasts = 0
+        self.sent = 0
+        self.dropped = 0
+        self.send_timeouts = 0
+        self.evicted = 0
+
+    @property
+    def active_clients(self) -> Set[str]:
+        return set(self.connections)
+
+    async def start(self) -> None:
+        """Start receiving messages relayed by other workers"""
+        if self.backplane is not None:
+            await self.backplane.subscribe(MESSAGE_CHANNEL, self._on_relayed)
+
+    async def connect(self, websocket: WebSocket, client_id: Optional[str] = None) -> str:
+        """Connect a new client and return its id"""
         await websocket.accept()
-        self.active_clients.add(websocket)
-        logger.info(f"Client connected. Total clients: {len(self.active_clients)}")
+        client_id = client_id or str(uuid4())
+        connection = self.connections[client_id] = ClientConnection(client_id, websocket, self.queue_size)
+        connection.task = asyncio.create_task(self._write(connection))
+        if self.backplane is not None:
+            await self.backplane.hset(CLIENTS_KEY, client_id, self.backplane.worker_id)
+        logger.info(f"Client connected. Total clients: {len(self.connections)}")
+        return client_id
 
-    async def disconnect(self, websocket: WebSocket):
+    async def disconnect(self, client_id: str):
         """Disconnect a client"""
-        self.active_clients.remove(websocket)
-        for subscriptions in self.client_subscriptions.values():
-            subscriptions.discard(websocket)
-        logger.info(f"Client disconnected. Total clients: {len(self.active_clients)}")
+        connection = self._detach(client_id)
+        if connection is not None:
+            await self._release(connection)
+        logger.info(f"Client disconnected. Total clients: {len(self.connections)}")
+
+    def _detach(self, client_id: str) -> Optional[ClientConnection]:
+        """Stop routing messages to a client"""
+        self.subscriptions.remove_client(client_id)
+        return self.connections.pop(client_id, None)
+
+    async def _release(self, connection: ClientConnection) -> None:
+        """Stop a detached client's writer and forget it on the backplane"""
+        if connection.task is not asyncio.current_task():
+            connection.task.cancel()
+            await asyncio.gather(connection.task, return_exceptions=True)
+        if self.backplane is not None:
+            await self.backplane.hdel(CLIENTS_KEY, connection.client_id)
 
-    async def subscribe(self, websocket: WebSocket, topic: str):
-        """Subscribe a client to a topic"""
-        if topic not in self.client_subscriptions:
-            self.client_subscriptions[topic] = set()
-        self.client_subscriptions[topic].add(websocket)
+    async def subscribe(self, client_id: str, topic: str):
+        """Subscribe a client to a topic or a pattern such as source.*.anomaly"""
+        self.subscriptions.subscribe(client_id, topic)
 
-    async def broadcast(self, message: Dict[str, Any], topic: str = None):
-        """Broadcast message to all clients or topic subscribers"""
-        disconnected_clients = set()
+    async def unsubscribe(self, client_id: str, topic: str):
+        """Unsubscribe a client from a topic or pattern"""
+        self.subscriptions.unsubscribe(client_id, topic)
 
-        target_clients = (self.client_subscriptions.get(topic, set()) 
-                        if topic else self.active_clients)
+    async def broadcast(self, message: Dict[str, Any], topic: str = None) -> int:
+        """Broadcast message to all clients or topic subscribers on every
+        worker; returns how many local clients it was queued for"""
+        start = time.perf_counter()
+        # Encode once for every recipient
+        payload = dumps_str(message)
+        queued = await self._fanout(payload, topic, start)
+        self.broadcasts += 1
+        self.fanout_latency.observe(time.perf_counter() - start)
+        if self.backplane is not None:
+            await self.backplane.publish(MESSAGE_CHANNEL, self._envelope("broadcast", topic or "", payload))
+        return queued
 
-        for client in target_clients:
+    async def _fanout(self, payload: str, topic: Optional[str], start: float) -> int:
+        """Queue an encoded message for the matching local clients"""
+        target_clients = self.subscriptions.match(topic) if topic else list(self.connections)
+        queued = 0
+        slow_clients = []
+        for client_id in target_clients:
+            connection = self.connections.get(client_id)
+            if connection is None:
+                continue
+            if self._enqueue(connection, payload, start):
+                queued += 1
+            elif self.slow_consumer_policy == SlowConsumerPolicy.EVICT:
+                slow_clients.append(client_id)
+
+        for client in slow_clients:
+            self._evict(client, "outbound queue full")
+        return queued
+
+    async def send_message(self, client_id: str, message: Dict[str, Any]) -> bool:
+        """Queue a message for one client, relaying it if another worker holds the client"""
+        connection = self.connections.get(client_id)
+        if connection is None:
+            if self.backplane is None or await self.backplane.hget(CLIENTS_KEY, client_id) is None:
+                return False
+            await self.backplane.publish(MESSAGE_CHANNEL, self._envelope("direct", client_id, dumps_str(message)))
+            return True
+        if self._enqueue(connection, dumps_str(message), time.perf_counter()):
+            return True
+        if self.slow_consumer_policy == SlowConsumerPolicy.EVICT:
+            self._evict(client_id, "outbound queue full")
+        return False
+
+    def _envelope(self, kind: str, target: str, payload: str) -> str:
+        # Compact JSON never contains a raw newline, so the fields split cleanly
+        return f"{kind}\n{self.backplane.worker_id}\n{target}\n{payload}"
+
+    async def _on_relayed(self, envelope: str) -> None:
+        """Deliver a message published by another worker"""
+        kind, origin, target, payload = envelope.split("\n", 3)
+        if origin == self.backplane.worker_id:
+            # Already delivered locally when it was published
+            return
+        if kind == "broadcast":
+            await self._fanout(payload, target or None, time.perf_counter())
+        elif kind == "direct" and target in self.connections:
+            self._enqueue(self.connections[target], payload, time.perf_counter())
+
+    def _enqueue(self, connection: ClientConnection, payload: str, enqueued: float) -> bool:
+        """Queue a payload without waiting, applying the policy when the queue is full"""
+        queue = connection.queue
+        if queue.full():
+            self.dropped += 1
+            if self.slow_consumer_policy != SlowConsumerPolicy.DROP_OLDEST:
+                return False
+            queue.get_nowait()
+            queue.task_done()
+        queue.put_nowait((payload, enqueued))
+        return True
+
+    async def _write(self, connection: ClientConnection) -> None:
+        """Send a client's queued payloads in order"""
+        websocket = connection.websocket
+        client_id = connection.client_id
+        queue = connection.queue
+        while True:
+            payload, enqueued = await queue.get()
             try:
-                await client.send_json(message)
+                await asyncio.wait_for(websocket.send_text(payload), self.send_timeout)
+                self.sent += 1
+                self.delivery_latency.observe(time.perf_counter() - enqueued)
+            except asyncio.TimeoutError:
+                self.send_timeouts += 1
+                if self.slow_consumer_policy == SlowConsumerPolicy.EVICT:
+                    self._evict(client_id, "send timed out")
+                    return
+                self.dropped += 1
             except Exception as e:
                 logger.error(f"Error sending message to client: {str(e)}")
-                disconnected_clients.add(client)
+                await self.disconnect(client_id)
+                return
+            finally:
+                queue.task_done()
+
+    def _evict(self, client_id: str, reason: str) -> None:
+        """Drop a slow client at once; its writer is stopped and its socket
+        closed in the background, so the caller never waits on the socket"""
+        connection = self._detach(client_id)
+        if connection is None:
+            return
+        self.evicted += 1
+        logger.warning(f"Evicting slow client {client_id}: {reason}")
+        task = asyncio.create_task(self._close_evicted(connection))
+        self._evictions.add(task)
+        task.add_done_callback(self._evictions.discard)
+
+    async def _close_evicted(self, connection: ClientConnection) -> None:
+        await self._release(connection)
+        try:
+            await asyncio.wait_for(connection.websocket.close(code=1008), self.send_timeout)
+        except Exception:
+            pass
+
+    async def join(self) -> None:
+        """Wait until every queued message has been sent or dropped"""
+        await asyncio.gather(*(connection.queue.join() for connection in list(self.connections.values())))
+
+    async def close(self) -> None:
+        """Stop every writer task and abandon pending evictions"""
+        for client_id in list(self.connections):
+            await self.disconnect(client_id)
+        evictions = list(self._evictions)
+        for task in evictions:
+            task.cancel()
+        await asyncio.gather(*evictions, return_exceptions=True)
 
-        for client in disconnected_clients:
-            await self.disconnect(client)
+    def get_stats(self) -> Dict[str, Any]:
+        """Get fan-out counters, queue depths and latency histograms"""
+        connections = list(self.connections.values())
+        return {
+            "clients": len(connections),
+            "broadcasts": self.broadcasts,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "send_timeouts": self.send_timeouts,
+            "evicted": self.evicted,
+            "max_queue_depth": max((connection.queue.qsize() for connection in connections), default=0),
+            "subscriptions": self.subscriptions.get_stats(),
+            "backplane": self.backplane.get_stats() if self.backplane is not None else None,
+            "fanout_latency": self.fanout_latency.to_dict(),
+            "delivery_latency": self.delivery_latency.to_dict(),
+        }
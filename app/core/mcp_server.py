@@ -1,18 +1,30 @@
 import asyncio
 import logging
-from typing import Dict, Any, List, Optional
-from anthropic import Anthropic
+from typing import Awaitable, Callable, Dict, Any, List, Optional
 from fastapi import WebSocket
 import json
+from datetime import datetime, timezone
+import pandas as pd
 from ..config import config
+from .backplane import Backplane
+from .serialization import dumps_str, loads
+from ..ai.client import AIClient, get_ai_client
+from ..ai.claude_connector import ClaudeConnector
+from ..data.processors import DataProcessor
+from ..analytics.engine import AnalyticsEngine
 from ..models.schema import AIModelConfig
 
 logger = logging.getLogger(__name__)
 
+# Backplane hash of client id -> session summary, shared by all workers
+SESSIONS_KEY = "insightflow:sessions"
+
 class MCPServer:
-    def __init__(self):
+    def __init__(self, backplane: Optional[Backplane] = None, ai_client: Optional[AIClient] = None):
+        self.backplane = backplane
         self.ai_config: AIModelConfig = config.get_config().ai
-        self.anthropic_client = Anthropic(api_key=self.ai_config.api_key)
+        # Shares the worker's connection pool and concurrency limit
+        self.ai_client = ai_client or get_ai_client()
         self.active_sessions: Dict[str, Any] = {}
         self.tools = self._initialize_tools()
         self.websocket_connections: List[WebSocket] = []
@@ -40,12 +52,15 @@ class MCPServer:
             }
         }
 
-    async def initialize(self):
+    async def initialize(self, data_processor: Optional[DataProcessor] = None,
+                         analytics_engine: Optional[AnalyticsEngine] = None,
+                         claude_connector: Optional[ClaudeConnector] = None):
         """Initialize the MCP server"""
         try:
             # Initialize core components
-            self.data_processor = DataProcessor()
-            self.analytics_engine = AnalyticsEngine()
+            self.data_processor = data_processor or DataProcessor()
+            self.analytics_engine = analytics_engine or AnalyticsEngine()
+            self.claude_connector = claude_connector or ClaudeConnector(ai_client=self.ai_client)
             
             # Register default tools
             await self._register_default_tools()
@@ -98,6 +113,34 @@ class MCPServer:
             }
         })
 
+    async def register_client(self, websocket: WebSocket, client_id: str) -> None:
+        """Start a session for a connected WebSocket client"""
+        self.active_sessions[client_id] = {"websocket": websocket, "tasks": set()}
+        self.websocket_connections.append(websocket)
+        if self.backplane is not None:
+            await self.backplane.hset(SESSIONS_KEY, client_id, dumps_str({
+                "worker_id": self.backplane.worker_id,
+                "connected_at": datetime.now(timezone.utc).isoformat()
+            }))
+
+    async def unregister_client(self, client_id: str) -> None:
+        """End a client's session when it disconnects"""
+        session = self.active_sessions.get(client_id)
+        if session is None:
+            return
+        if session["websocket"] in self.websocket_connections:
+            self.websocket_connections.remove(session["websocket"])
+        if self.backplane is not None:
+            await self.backplane.hdel(SESSIONS_KEY, client_id)
+        await self._cleanup_session(client_id)
+
+    async def get_sessions(self) -> Dict[str, Dict[str, Any]]:
+        """Get the sessions of every worker, or of this one without a backplane"""
+        if self.backplane is None:
+            return {client_id: {} for client_id in self.active_sessions}
+        sessions = await self.backplane.hgetall(SESSIONS_KEY)
+        return {client_id: loads(session) for client_id, session in sessions.items()}
+
     async def handle_client_message(self, message: Dict[str, Any], client_id: str) -> Dict[str, Any]:
         """Handle incoming MCP client messages"""
         try:
@@ -111,6 +154,81 @@ class MCPServer:
         except Exception as e:
             return {"error": str(e)}
 
+    async def handle_tool_call(self, tool: str, parameters: Dict[str, Any], client_id: str) -> Dict[str, Any]:
+        """Run a tool call and return its complete result"""
+        if tool == "generate_insight":
+            data = await self._load_source_data(parameters["data_source"])
+            return await self.claude_connector.generate_insight(data, self._insight_context(parameters))
+        if tool == "analyze_data":
+            return await self._analyze_data(parameters)
+        if tool == "query_data":
+            context = {key: parameters[key] for key in ("filters", "limit") if parameters.get(key) is not None}
+            return await self.claude_connector.process_query(parameters["query"], context or None)
+        raise ValueError(f"Unsupported tool: {tool}")
+
+    async def _analyze_data(self, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """Evaluate the requested metrics over each numeric column of a source"""
+        name = parameters["data_source"]
+        sources = config.get_config().data_sources
+        if name not in sources:
+            raise ValueError(f"Unknown data source: {name}")
+        # A timeframe such as "1h" or "30min" limits the analysis to recent
+        # data; stored timestamps are naive UTC
+        start = None
+        if parameters.get("timeframe"):
+            now = datetime.now(timezone.utc).replace(tzinfo=None)
+            start = now - pd.Timedelta(parameters["timeframe"]).to_pytimedelta()
+        data = await self.analytics_engine.load_data(sources[name], start=start)
+        results = {}
+        for column in data.select_dtypes("number").columns:
+            results[column] = await self.analytics_engine.analyze(data[column], parameters["metrics"])
+        return {"data_source": name, "results": results}
+
+    def stream_tool_call(self, message: Dict[str, Any], client_id: str,
+                         send: Callable[[Dict[str, Any]], Awaitable[Any]]) -> asyncio.Task:
+        """Run a tool call in the background, sending partial results as
+        they are produced; the call is cancelled when the client disconnects"""
+        task = asyncio.create_task(self._stream_tool_call(message, client_id, send))
+        session = self.active_sessions.get(client_id)
+        if session is not None:
+            session["tasks"].add(task)
+            task.add_done_callback(session["tasks"].discard)
+        return task
+
+    async def _stream_tool_call(self, message: Dict[str, Any], client_id: str,
+                                send: Callable[[Dict[str, Any]], Awaitable[Any]]) -> None:
+        request_id = message.get("id")
+        tool = message.get("tool")
+        try:
+            if tool != "generate_insight":
+                result = await self.handle_tool_call(tool, message.get("parameters", {}), client_id)
+                await send({"type": "tool_result", "id": request_id, "tool": tool, "result": result})
+                return
+            parameters = message.get("parameters", {})
+            data = await self._load_source_data(parameters["data_source"])
+            async for event in self.claude_connector.stream_insight(data, self._insight_context(parameters)):
+                if event["type"] == "delta":
+                    await send({"type": "tool_result_partial", "id": request_id, "tool": tool,
+                                "delta": event["text"]})
+                else:
+                    await send({"type": "tool_result", "id": request_id, "tool": tool,
+                                "result": event["result"]})
+        except asyncio.CancelledError:
+            logger.info(f"Cancelled {tool} call for client {client_id}")
+            raise
+        except Exception as e:
+            logger.error(f"Error streaming {tool} call: {str(e)}")
+            await send({"type": "error", "id": request_id, "tool": tool, "error": str(e)})
+
+    async def _load_source_data(self, data_source: str) -> Dict[str, Any]:
+        sources = config.get_config().data_sources
+        if data_source not in sources:
+            raise ValueError(f"Unknown data source: {data_source}")
+        return {data_source: await self.analytics_engine.load_data(sources[data_source])}
+
+    def _insight_context(self, parameters: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        return {"context": parameters["context"]} if parameters.get("context") else None
+
     async def shutdown(self):
         """Gracefully shutdown the MCP server"""
         try:
@@ -134,6 +252,12 @@ class MCPServer:
                 # Get session data before cleanup
                 session_data = self.active_sessions[session_id]
                 
+                # Stop calls still streaming to the client
+                tasks = list(session_data.get("tasks", ()))
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
                 # Perform any necessary cleanup tasks
                 if 'resources' in session_data:
                     await self._release_resources(session_data['resources'])
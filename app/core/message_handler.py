@@ -6,8 +6,8 @@ from .client_manager import ClientManager
 logger = logging.getLogger(__name__)
 
 class MessageHandler:
-    def __init__(self):
-        self.client_manager = ClientManager()
+    def __init__(self, client_manager: Optional[ClientManager] = None):
+        self.client_manager = client_manager or ClientManager()
         self._message_processors = {}
 
     async def process_message(self, message: Dict[str, Any], source: DataSource) -> Optional[Dict[str, Any]]:
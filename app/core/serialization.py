@@ -0,0 +1,144 @@
+import datetime
+import decimal
+import enum
+import json
+import logging
+import math
+import os
+from typing import Any, Dict, Optional, Type, Union
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+def _default(obj: Any) -> Any:
+    """Encode the NumPy, pandas and other types found in analytics results"""
+    if isinstance(obj, pd.Timestamp) and obj is not pd.NaT and not obj.nanosecond:
+        # orjson encodes datetime natively, much faster than Timestamp.isoformat
+        return obj.to_pydatetime()
+    if isinstance(obj, pd.DataFrame):
+        return obj.to_dict("records")
+    if isinstance(obj, (pd.Series, pd.Index, np.ndarray)):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if obj is pd.NaT or obj is pd.NA:
+        return None
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, datetime.timedelta):
+        return obj.total_seconds()
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, enum.Enum):
+        return obj.value
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+def _without_non_finite(obj: Any) -> Any:
+    """Copy of obj with NaN and infinities replaced by None, as orjson encodes them"""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if obj is None or isinstance(obj, (str, int)):
+        return obj
+    if isinstance(obj, dict):
+        return {key: _without_non_finite(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_without_non_finite(value) for value in obj]
+    return _without_non_finite(_default(obj))
+
+def _json_dumps(obj: Any, **options) -> str:
+    """json.dumps that encodes non-finite floats as null instead of NaN/Infinity"""
+    try:
+        return json.dumps(obj, default=_default, allow_nan=False, ensure_ascii=False, **options)
+    except ValueError:
+        # Only documents that contain NaN or infinities pay for the copy
+        return json.dumps(_without_non_finite(obj), default=_default, allow_nan=False,
+                          ensure_ascii=False, **options)
+
+class JSONSerializer:
+    """Standard library backend, used when orjson is not installed"""
+
+    name = "json"
+
+    def dumps(self, obj: Any, indent: bool = False) -> bytes:
+        return self.dumps_str(obj, indent).encode()
+
+    def dumps_str(self, obj: Any, indent: bool = False) -> str:
+        if indent:
+            return _json_dumps(obj, indent=2)
+        return _json_dumps(obj, separators=(",", ":"))
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return json.loads(data)
+
+class OrjsonSerializer(JSONSerializer):
+    """orjson backend; encodes NumPy arrays natively and NaN as null"""
+
+    name = "orjson"
+
+    def __init__(self):
+        self.option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, obj: Any, indent: bool = False) -> bytes:
+        option = self.option | orjson.OPT_INDENT_2 if indent else self.option
+        return orjson.dumps(obj, default=_default, option=option)
+
+    def dumps_str(self, obj: Any, indent: bool = False) -> str:
+        return self.dumps(obj, indent).decode()
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return orjson.loads(data)
+
+SERIALIZERS: Dict[str, Type[JSONSerializer]] = {"json": JSONSerializer}
+if orjson is not None:
+    SERIALIZERS["orjson"] = OrjsonSerializer
+
+_serializer: Optional[JSONSerializer] = None
+
+def get_serializer() -> JSONSerializer:
+    """Get the process-wide serializer; INSIGHTFLOW_JSON_BACKEND picks the
+    backend, otherwise orjson is used when it is installed"""
+    global _serializer
+    if _serializer is None:
+        backend = os.getenv("INSIGHTFLOW_JSON_BACKEND") or ("orjson" if orjson is not None else "json")
+        set_serializer(backend)
+    return _serializer
+
+def set_serializer(serializer: Union[str, JSONSerializer]) -> JSONSerializer:
+    """Replace the process-wide serializer with a backend name or instance"""
+    global _serializer
+    if isinstance(serializer, str):
+        if serializer not in SERIALIZERS:
+            logger.warning(f"JSON backend {serializer} is not available, using json")
+            serializer = "json"
+        serializer = SERIALIZERS[serializer]()
+    _serializer = serializer
+    return serializer
+
+def dumps(obj: Any, indent: bool = False) -> bytes:
+    """Encode to JSON bytes"""
+    return get_serializer().dumps(obj, indent)
+
+def dumps_str(obj: Any, indent: bool = False) -> str:
+    """Encode to a JSON string"""
+    return get_serializer().dumps_str(obj, indent)
+
+def canonical_dumps(obj: Any) -> bytes:
+    """Encode with sorted keys, so equal values always give equal bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default,
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_SORT_KEYS)
+    return _json_dumps(obj, separators=(",", ":"), sort_keys=True).encode()
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Decode JSON text or bytes"""
+    return get_serializer().loads(data)
@@ -0,0 +1,117 @@
+from typing import Dict, Set, Any, List
+
+SEPARATOR = "."
+# Matches exactly one topic segment
+SINGLE = "*"
+# Matches the rest of the topic (zero or more segments); only valid last
+REST = "#"
+
+def is_pattern(topic: str) -> bool:
+    return any(segment in (SINGLE, REST) for segment in topic.split(SEPARATOR))
+
+class TopicNode:
+    __slots__ = ("children", "clients")
+
+    def __init__(self):
+        self.children: Dict[str, "TopicNode"] = {}
+        self.clients: Set[str] = set()
+
+class SubscriptionRegistry:
+    """Bidirectional index of topic subscriptions keyed by client id.
+
+    Exact topics map straight to their subscribers. Patterns such as
+    ``source.*.anomaly`` or ``source.#`` are stored in a trie over the
+    dot-separated segments, so matching a published topic only walks the
+    branches that can match it. Each client's own subscriptions are kept
+    as well, so removing a client costs its subscriptions, not the number
+    of topics.
+    """
+
+    def __init__(self):
+        self._client_topics: Dict[str, Set[str]] = {}
+        self._exact: Dict[str, Set[str]] = {}
+        self._root = TopicNode()
+        self._patterns = 0
+
+    def subscribe(self, client_id: str, topic: str) -> None:
+        segments = topic.split(SEPARATOR)
+        if REST in segments[:-1]:
+            raise ValueError(f"'{REST}' is only allowed as the last topic segment: {topic}")
+        topics = self._client_topics.setdefault(client_id, set())
+        if topic in topics:
+            return
+        topics.add(topic)
+        if not is_pattern(topic):
+            self._exact.setdefault(topic, set()).add(client_id)
+            return
+        node = self._root
+        for segment in segments:
+            node = node.children.setdefault(segment, TopicNode())
+        if not node.clients:
+            self._patterns += 1
+        node.clients.add(client_id)
+
+    def unsubscribe(self, client_id: str, topic: str) -> None:
+        topics = self._client_topics.get(client_id)
+        if not topics or topic not in topics:
+            return
+        topics.discard(topic)
+        if not topics:
+            del self._client_topics[client_id]
+        if not is_pattern(topic):
+            subscribers = self._exact[topic]
+            subscribers.discard(client_id)
+            if not subscribers:
+                del self._exact[topic]
+            return
+        # Remove the client and prune branches left empty
+        path = [self._root]
+        for segment in topic.split(SEPARATOR):
+            path.append(path[-1].children[segment])
+        path[-1].clients.discard(client_id)
+        if not path[-1].clients:
+            self._patterns -= 1
+        for segment, parent, node in zip(reversed(topic.split(SEPARATOR)), reversed(path[:-1]), reversed(path[1:])):
+            if node.clients or node.children:
+                break
+            del parent.children[segment]
+
+    def remove_client(self, client_id: str) -> None:
+        """Drop every subscription of a client"""
+        for topic in list(self._client_topics.get(client_id, ())):
+            self.unsubscribe(client_id, topic)
+
+    def match(self, topic: str) -> Set[str]:
+        """Ids of the clients subscribed to a published topic"""
+        clients = set(self._exact.get(topic, ()))
+        if not self._patterns:
+            return clients
+        segments = topic.split(SEPARATOR)
+        stack = [(self._root, 0)]
+        while stack:
+            node, depth = stack.pop()
+            rest = node.children.get(REST)
+            if rest is not None:
+                clients |= rest.clients
+            if depth == len(segments):
+                clients |= node.clients
+                continue
+            for key in (segments[depth], SINGLE):
+                child = node.children.get(key)
+                if child is not None:
+                    stack.append((child, depth + 1))
+        return clients
+
+    def topics(self, client_id: str) -> Set[str]:
+        return set(self._client_topics.get(client_id, ()))
+
+    def clients(self) -> List[str]:
+        return list(self._client_topics)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "clients": len(self._client_topics),
+            "subscriptions": sum(len(topics) for topics in self._client_topics.values()),
+            "exact_topics": len(self._exact),
+            "patterns": self._patterns,
+        }
@@ -0,0 +1,67 @@
+from typing import Dict, Any, List, Tuple, Union
+import numpy as np
+import pandas as pd
+
+def _to_datetime(values: pd.Series) -> pd.Series:
+    # Timestamps are stored as naive UTC
+    converted = pd.to_datetime(values, errors="coerce", utc=True, format="ISO8601")
+    return converted.dt.tz_localize(None)
+
+def _to_float(values: pd.Series) -> pd.Series:
+    return pd.to_numeric(values, errors="coerce").astype(np.float64)
+
+def _to_int(values: pd.Series) -> pd.Series:
+    converted = pd.to_numeric(values, errors="coerce")
+    # Fractional values are not valid integers
+    return converted.where(converted == converted.round()).astype("Int64")
+
+def _to_string(values: pd.Series) -> pd.Series:
+    return values.astype("string")
+
+# Column converters for the type names used in DataSource.schema; values
+# that cannot be converted become null
+COLUMN_TYPES = {
+    "datetime": _to_datetime,
+    "float": _to_float,
+    "int": _to_int,
+    "string": _to_string,
+}
+
+def to_frame(data: Union[pd.DataFrame, List[Dict[str, Any]]]) -> pd.DataFrame:
+    """Convert a batch to a DataFrame once"""
+    if isinstance(data, pd.DataFrame):
+        return data.reset_index(drop=True)
+    return pd.DataFrame.from_records(data)
+
+def validate_frame(df: pd.DataFrame, schema: Dict[str, Any]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Type the schema columns of a batch and split it into valid and rejected rows.
+
+    Checks run as vectorized masks per column. Rejected rows keep their
+    original values plus a ``reason`` column listing every failed check.
+    """
+    typed = df.copy()
+    invalid = np.zeros(len(df), dtype=bool)
+    reasons = pd.Series("", index=df.index, dtype=object)
+
+    def reject(mask: np.ndarray, reason: str) -> None:
+        nonlocal invalid
+        if mask.any():
+            invalid |= mask
+            reasons[mask] += reason + "; "
+
+    for field, field_type in schema.items():
+        if field not in df:
+            reject(np.ones(len(df), dtype=bool), f"Missing required field: {field}")
+            continue
+        missing = df[field].isna().to_numpy()
+        reject(missing, f"Missing required field: {field}")
+        converter = COLUMN_TYPES.get(field_type)
+        if converter is None:
+            continue
+        typed[field] = converter(df[field])
+        reject(typed[field].isna().to_numpy() & ~missing, f"Invalid {field_type} for field: {field}")
+
+    if not invalid.any():
+        return typed, df.iloc[:0].assign(reason=pd.Series(dtype=object))
+    rejected = df[invalid].assign(reason=reasons[invalid].str[:-2])
+    return typed[~invalid].reset_index(drop=True), rejected.reset_index(drop=True)
@@ -0,0 +1,316 @@
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from .storage import BufferedStorage
+from ..config import config
+
+logger = logging.getLogger(__name__)
+
+PARTITION_FORMATS = {
+    "hour": ("%Y-%m-%dT%H", timedelta(hours=1)),
+    "day": ("%Y-%m-%d", timedelta(days=1)),
+}
+
+# Arrow IPC files are written uncompressed so they can be memory-mapped
+FILE_SUFFIXES = {
+    "parquet": ".parquet",
+    "arrow": ".arrow",
+}
+
+def _utc_now() -> pd.Timestamp:
+    """Current time as a naive UTC timestamp, matching stored timestamps"""
+    return pd.Timestamp(datetime.now(timezone.utc).replace(tzinfo=None))
+
+class ColumnarStorage(BufferedStorage):
+    """Time-partitioned columnar storage for ingested source data.
+
+    Records are appended as Parquet or Arrow IPC files under
+    ``{root_path}/{source_id}/ts={partition}/``, one partition per hour or
+    day of the ``timestamp`` column. Each file is sorted by timestamp.
+    """
+
+    def __init__(self, root_path: Optional[str] = None,
+                 partition_interval: Optional[str] = None,
+                 file_format: Optional[str] = None,
+                 batch_size: Optional[int] = None,
+                 flush_interval: float = 1.0,
+                 max_buffered: Optional[int] = None,
+                 compaction_interval: Optional[float] = 300.0,
+                 compaction_min_files: int = 4):
+        super().__init__(batch_size, flush_interval, max_buffered)
+        db_config = config.get_config().database
+        self.root_path = Path(root_path or db_config.columnar_path)
+        self.partition_interval = partition_interval or db_config.partition_interval
+        if self.partition_interval not in PARTITION_FORMATS:
+            raise ValueError(f"Unsupported partition interval: {self.partition_interval}")
+        self._partition_format, self._partition_span = PARTITION_FORMATS[self.partition_interval]
+        self.file_format = file_format or db_config.columnar_format
+        if self.file_format not in FILE_SUFFIXES:
+            raise ValueError(f"Unsupported columnar format: {self.file_format}")
+        self.file_suffix = FILE_SUFFIXES[self.file_format]
+        self.compaction_interval = compaction_interval
+        self.compaction_min_files = compaction_min_files
+        self._source_locks: Dict[str, asyncio.Lock] = {}
+        self._compaction_task: Optional[asyncio.Task] = None
+
+    def _source_lock(self, source_id: str) -> asyncio.Lock:
+        return self._source_locks.setdefault(source_id, asyncio.Lock())
+
+    async def store(self, data, source_id: str) -> bool:
+        """Buffer processed data for a bulk append to the source partitions"""
+        self._ensure_compaction_task()
+        return await super().store(data, source_id)
+
+    async def close(self) -> None:
+        """Stop background compaction and flush all buffered rows"""
+        if self._compaction_task is not None:
+            self._compaction_task.cancel()
+            try:
+                await self._compaction_task
+            except asyncio.CancelledError:
+                pass
+            self._compaction_task = None
+        await super().close()
+
+    async def _write_rows(self, key: str, rows: List[Dict[str, Any]]) -> None:
+        await self._write_frame(key, pd.DataFrame(rows))
+
+    async def _write_frame(self, key: str, df: pd.DataFrame) -> None:
+        async with self._source_lock(key):
+            await asyncio.to_thread(self._write_partitions, key, df)
+
+    def _write_partitions(self, source_id: str, df: pd.DataFrame) -> None:
+        """Split rows by partition and append one new file per partition"""
+        df = df.copy()
+        if "timestamp" in df:
+            df["timestamp"] = pd.to_datetime(df["timestamp"]).fillna(_utc_now())
+        else:
+            df["timestamp"] = _utc_now()
+
+        partitions = df["timestamp"].dt.strftime(self._partition_format)
+        for partition, part in df.groupby(partitions, sort=False):
+            directory = self.root_path / source_id / f"ts={partition}"
+            directory.mkdir(parents=True, exist_ok=True)
+            part = part.sort_values("timestamp", kind="stable").reset_index(drop=True)
+            self._write_file(directory / self._new_file_name(), part)
+
+    def _new_file_name(self, prefix: str = "part") -> str:
+        return f"{prefix}-{time.time_ns()}-{uuid.uuid4().hex[:8]}{self.file_suffix}"
+
+    def _write_file(self, path: Path, df: pd.DataFrame) -> None:
+        """Write a frame atomically so readers never see partial files"""
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self.file_format == "arrow":
+            with pa.OSFile(str(tmp_path), "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+        else:
+            pq.write_table(table, tmp_path)
+        tmp_path.replace(path)
+
+    def _read_table(self, path: Path, columns: Optional[List[str]] = None) -> pa.Table:
+        """Read a file as an Arrow table; Arrow IPC files are memory-mapped"""
+        if self.file_format == "arrow":
+            table = pa.ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+            if columns is not None:
+                table = table.select([name for name in columns if name in table.column_names])
+            return table
+
+        if columns is not None:
+            available = set(pq.read_schema(path).names)
+            columns = [name for name in columns if name in available]
+        return pq.read_table(path, columns=columns, memory_map=True)
+
+    def _read_file(self, path: Path, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        return self._read_table(path, columns).to_pandas()
+
+    def _partitions(self, source_id: str, start: Optional[datetime] = None,
+                    end: Optional[datetime] = None) -> List[Tuple[datetime, Path]]:
+        """List partitions overlapping [start, end), oldest first"""
+        source_path = self.root_path / source_id
+        if not source_path.exists():
+            return []
+
+        partitions = []
+        for directory in source_path.iterdir():
+            if not directory.is_dir() or not directory.name.startswith("ts="):
+                continue
+            partition_start = datetime.strptime(directory.name[3:], self._partition_format)
+            if start is not None and partition_start + self._partition_span <= start:
+                continue
+            if end is not None and partition_start >= end:
+                continue
+            partitions.append((partition_start, directory))
+        return sorted(partitions)
+
+    def _partition_files(self, directory: Path) -> List[Path]:
+        return sorted(directory.glob(f"*{self.file_suffix}"))
+
+    def _scan(self, source_id: str, columns: Optional[List[str]], start: Optional[datetime],
+              end: Optional[datetime]) -> pd.DataFrame:
+        read_columns = None
+        if columns is not None:
+            read_columns = list(dict.fromkeys(list(columns) + ["timestamp"]))
+
+        frames = []
+        for partition_start, directory in self._partitions(source_id, start, end):
+            # Only partitions straddling the range boundaries need row filtering
+            needs_filter = ((start is not None and partition_start < start) or
+                            (end is not None and partition_start + self._partition_span > end))
+            for path in self._partition_files(directory):
+                df = self._read_file(path, read_columns)
+                if needs_filter:
+                    mask = pd.Series(True, index=df.index)
+                    if start is not None:
+                        mask &= df["timestamp"] >= start
+                    if end is not None:
+                        mask &= df["timestamp"] < end
+                    df = df[mask]
+                frames.append(df)
+
+        if not frames:
+            return pd.DataFrame(columns=columns or [])
+
+        result = pd.concat(frames, ignore_index=True).sort_values("timestamp", kind="stable")
+        result = result.reset_index(drop=True)
+        if columns is not None:
+            result = result[[name for name in columns if name in result]]
+        return result
+
+    async def scan(self, source_id: str, columns: Optional[List[str]] = None,
+                   start: Optional[datetime] = None, end: Optional[datetime] = None) -> pd.DataFrame:
+        """Read a time range of a source, pruning partitions and projecting columns"""
+        try:
+            await self.flush(source_id)
+            async with self._source_lock(source_id):
+                return await asyncio.to_thread(self._scan, source_id, columns, start, end)
+        except Exception as e:
+            logger.error(f"Error scanning columnar data: {str(e)}")
+            raise
+
+    async def scan_arrays(self, source_id: str, columns: List[str],
+                          start: Optional[datetime] = None,
+                          end: Optional[datetime] = None) -> List[Dict[str, np.ndarray]]:
+        """Read a time range as per-chunk NumPy arrays without building a DataFrame.
+
+        With the ``arrow`` format the arrays are views over memory-mapped
+        files, so resident memory is bounded by the OS page cache.
+        """
+        try:
+            await self.flush(source_id)
+            async with self._source_lock(source_id):
+                return await asyncio.to_thread(self._scan_arrays, source_id, columns, start, end)
+        except Exception as e:
+            logger.error(f"Error scanning columnar arrays: {str(e)}")
+            raise
+
+    def _scan_arrays(self, source_id: str, columns: List[str], start: Optional[datetime],
+                     end: Optional[datetime]) -> List[Dict[str, np.ndarray]]:
+        read_columns = list(dict.fromkeys(list(columns) + ["timestamp"]))
+        start64 = np.datetime64(start, "ns") if start is not None else None
+        end64 = np.datetime64(end, "ns") if end is not None else None
+
+        chunks = []
+        for partition_start, directory in self._partitions(source_id, start, end):
+            needs_filter = ((start is not None and partition_start < start) or
+                            (end is not None and partition_start + self._partition_span > end))
+            for path in self._partition_files(directory):
+                table = self._read_table(path, read_columns)
+                for batch in table.to_batches():
+                    arrays = {name: self._to_numpy(batch.column(name)) for name in batch.schema.names}
+                    if needs_filter:
+                        # Files are sorted by timestamp, so the range is a slice (a view)
+                        timestamps = arrays["timestamp"]
+                        lo = np.searchsorted(timestamps, start64) if start64 is not None else 0
+                        hi = np.searchsorted(timestamps, end64) if end64 is not None else len(timestamps)
+                        arrays = {name: values[lo:hi] for name, values in arrays.items()}
+                    if len(arrays["timestamp"]):
+                        chunks.append(arrays)
+        return chunks
+
+    def _to_numpy(self, array: pa.Array) -> np.ndarray:
+        """Convert an Arrow array to NumPy, zero-copy when the type allows it"""
+        if array.null_count == 0:
+            try:
+                return array.to_numpy(zero_copy_only=True)
+            except pa.ArrowInvalid:
+                pass
+        return array.to_numpy(zero_copy_only=False)
+
+    async def get_latest(self, source_id: str, limit: int = 100) -> pd.DataFrame:
+        """Get latest records for a source"""
+        await self.flush(source_id)
+        async with self._source_lock(source_id):
+            return await asyncio.to_thread(self._get_latest, source_id, limit)
+
+    def _get_latest(self, source_id: str, limit: int) -> pd.DataFrame:
+        frames = []
+        rows = 0
+        # Walk partitions newest first and stop once enough rows are loaded
+        for _, directory in reversed(self._partitions(source_id)):
+            for path in self._partition_files(directory):
+                df = self._read_file(path)
+                frames.append(df)
+                rows += len(df)
+            if rows >= limit:
+                break
+
+        if not frames:
+            return pd.DataFrame()
+        result = pd.concat(frames, ignore_index=True)
+        return result.sort_values("timestamp", ascending=False, kind="stable").head(limit).reset_index(drop=True)
+
+    async def compact(self, source_id: Optional[str] = None) -> int:
+        """Merge small files within each partition into a single file"""
+        if source_id:
+            source_ids = [source_id]
+        elif self.root_path.exists():
+            source_ids = [path.name for path in self.root_path.iterdir() if path.is_dir()]
+        else:
+            source_ids = []
+
+        merged = 0
+        for current in source_ids:
+            async with self._source_lock(current):
+                merged += await asyncio.to_thread(self._compact_source, current)
+        return merged
+
+    def _compact_source(self, source_id: str) -> int:
+        merged = 0
+        for _, directory in self._partitions(source_id):
+            files = self._partition_files(directory)
+            if len(files) < self.compaction_min_files:
+                continue
+            df = pd.concat([self._read_file(path) for path in files], ignore_index=True)
+            df = df.sort_values("timestamp", kind="stable").reset_index(drop=True)
+            self._write_file(directory / self._new_file_name("compacted"), df)
+            for path in files:
+                path.unlink()
+            merged += len(files)
+        return merged
+
+    def _ensure_compaction_task(self) -> None:
+        """Start the background compaction task"""
+        if not self.compaction_interval:
+            return
+        if self._compaction_task is None or self._compaction_task.done():
+            self._compaction_task = asyncio.create_task(self._compact_periodically())
+
+    async def _compact_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.compaction_interval)
+            try:
+                merged = await self.compact()
+                if merged:
+                    logger.info(f"Compacted {merged} columnar files")
+            except Exception as e:
+                logger.error(f"Error compacting columnar data: {str(e)}")
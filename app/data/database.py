@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Optional
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from ..config import config
+from ..models.schema import DatabaseConfig
+
+logger = logging.getLogger(__name__)
+
+class StorageEngine:
+    """Pooled SQLAlchemy engine whose blocking calls run off the event loop"""
+
+    def __init__(self, db_config: DatabaseConfig):
+        self.db_config = db_config
+        self.engine = create_engine(db_config.url, **self._pool_options(db_config))
+        # One worker per connection the pool can hand out, so queued work
+        # waits here rather than inside the pool's checkout timeout
+        self.max_connections = db_config.pool_size + db_config.max_overflow
+        self._executor = ThreadPoolExecutor(max_workers=self.max_connections,
+                                            thread_name_prefix="storage")
+        self._lock = threading.Lock()
+        self._stats = {
+            "operations": 0,
+            "errors": 0,
+            "queued": 0,
+            "in_flight": 0,
+            "checked_out": 0,
+            "peak_checked_out": 0,
+            "total_wait_ms": 0.0,
+            "max_wait_ms": 0.0,
+        }
+        event.listen(self.engine, "checkout", self._on_checkout)
+        event.listen(self.engine, "checkin", self._on_checkin)
+
+    def _pool_options(self, db_config: DatabaseConfig) -> Dict[str, Any]:
+        """Build pool arguments for the configured database"""
+        url = make_url(db_config.url)
+        if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+            # In-memory SQLite uses a per-thread singleton pool
+            return {}
+        return {
+            "pool_size": db_config.pool_size,
+            "max_overflow": db_config.max_overflow,
+            "pool_timeout": db_config.timeout,
+            "pool_pre_ping": True,
+        }
+
+    def _on_checkout(self, dbapi_conn, conn_record, conn_proxy):
+        with self._lock:
+            self._stats["checked_out"] += 1
+            self._stats["peak_checked_out"] = max(self._stats["peak_checked_out"],
+                                                  self._stats["checked_out"])
+
+    def _on_checkin(self, dbapi_conn, conn_record):
+        with self._lock:
+            self._stats["checked_out"] = max(self._stats["checked_out"] - 1, 0)
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Run a blocking database call in the storage thread pool"""
+        loop = asyncio.get_running_loop()
+        submitted = time.perf_counter()
+        with self._lock:
+            self._stats["queued"] += 1
+
+        def call():
+            wait_ms = (time.perf_counter() - submitted) * 1000
+            with self._lock:
+                self._stats["queued"] -= 1
+                self._stats["in_flight"] += 1
+                self._stats["total_wait_ms"] += wait_ms
+                self._stats["max_wait_ms"] = max(self._stats["max_wait_ms"], wait_ms)
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                with self._lock:
+                    self._stats["errors"] += 1
+                raise
+            finally:
+                with self._lock:
+                    self._stats["in_flight"] -= 1
+                    self._stats["operations"] += 1
+
+        return await loop.run_in_executor(self._executor, call)
+
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Get connection pool utilization metrics"""
+        pool = self.engine.pool
+        with self._lock:
+            stats = dict(self._stats)
+        operations = stats["operations"]
+        stats.update({
+            "pool_size": self.db_config.pool_size,
+            "max_overflow": self.db_config.max_overflow,
+            "max_connections": self.max_connections,
+            "pool_status": pool.status(),
+            "utilization": stats["checked_out"] / self.max_connections if self.max_connections else 0.0,
+            "avg_wait_ms": stats["total_wait_ms"] / operations if operations else 0.0,
+        })
+        return stats
+
+    def dispose(self) -> None:
+        """Stop the worker threads and close pooled connections"""
+        self._executor.shutdown(wait=True)
+        self.engine.dispose()
+
+_storage_engine: Optional[StorageEngine] = None
+
+def get_storage_engine() -> StorageEngine:
+    """Get the process-wide storage engine configured from DatabaseConfig"""
+    global _storage_engine
+    if _storage_engine is None:
+        _storage_engine = StorageEngine(config.get_config().database)
+    return _storage_engine
+
+def dispose_storage_engine() -> None:
+    """Dispose the process-wide storage engine"""
+    global _storage_engine
+    if _storage_engine is not None:
+        _storage_engine.dispose()
+        _storage_engine = None
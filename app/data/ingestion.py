@@ -1,9 +1,25 @@
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, AsyncIterator, Callable, Deque, Iterator, Optional, Tuple, Union
 from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from enum import Enum
 import asyncio
+import io
+import json
+import logging
+import os
+from pathlib import Path
+import aiohttp
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from pydantic import BaseModel
-from collections import deque
+from .ratelimit import TokenBucket
+from ..core.serialization import loads
+from .validation import CompiledValidator, compile_schema
+
+logger = logging.getLogger(__name__)
 
 class DataSource(BaseModel):
     name: str
@@ -14,10 +30,12 @@ class DataSource(BaseModel):
 class DataValidator:
     def __init__(self, schema: Dict[str, Any]):
         self.schema = schema
+        # Compiled once per registered source definition
+        self.compiled: CompiledValidator = compile_schema(schema)
 
     def validate(self, data: Dict) -> bool:
         try:
-            # Implement schema validation logic
+            self.compiled.validate(data)
             return True
         except Exception as e:
             raise ValueError(f"Validation error: {str(e)}")
@@ -35,46 +53,489 @@ class DataSourceAdapter(ABC):
     async def disconnect(self) -> None:
         pass
 
+    async def read_many(self, max_records: int, timeout: Optional[float] = None) -> List[Dict]:
+        """Read up to max_records records"""
+        data = await self.read()
+        return [data] if data else []
+
+class DropPolicy(str, Enum):
+    BLOCK = "block"              # Producers wait for space (backpressure)
+    DROP_NEWEST = "drop_newest"  # Incoming records are dropped when full
+    DROP_OLDEST = "drop_oldest"  # The oldest queued record makes room
+
+# Put on the queue to wake readers when the stream disconnects
+_CLOSED = object()
+
 class StreamAdapter(DataSourceAdapter):
+    """Stream source backed by a bounded asyncio.Queue.
+
+    The connection side calls ``put`` for every received record; readers
+    await ``read``/``read_many`` instead of polling. ``queue_size`` and
+    ``drop_policy`` are read from the source config.
+    """
+
     def __init__(self, config: Dict):
         self.config = config
-        self.buffer = deque(maxlen=1000)
+        self.max_size = int(config.get("queue_size", 1000))
+        self.drop_policy = DropPolicy(config.get("drop_policy", DropPolicy.BLOCK))
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_size)
         self.connected = False
+        self.closed = False
+        self.received = 0
+        self.dropped = 0
 
     async def connect(self) -> None:
         # Implement stream connection logic
         self.connected = True
+        self.closed = False
 
-    async def read(self) -> Dict:
-        if not self.connected:
-            raise ConnectionError("Stream not connected")
-        return self.buffer.popleft() if self.buffer else None
+    async def put(self, data: Dict) -> bool:
+        """Queue a received record; returns False if it was dropped"""
+        if self.closed:
+            return False
+        if self.drop_policy == DropPolicy.BLOCK:
+            await self.queue.put(data)
+            self.received += 1
+            return True
+        return self.put_nowait(data)
+
+    async def put_many(self, records: List[Dict]) -> int:
+        """Queue a batch of received records; returns how many were kept"""
+        kept = 0
+        for data in records:
+            kept += await self.put(data)
+        return kept
+
+    def put_nowait(self, data: Dict) -> bool:
+        """Queue a record without waiting; when full the newest record is
+        dropped unless the policy is drop_oldest. Refused once disconnected."""
+        if self.closed:
+            return False
+        self.received += 1
+        if self.queue.full() and not (self.drop_policy == DropPolicy.DROP_OLDEST and self._evict_oldest()):
+            self.dropped += 1
+            return False
+        self.queue.put_nowait(data)
+        return True
+
+    def _evict_oldest(self) -> bool:
+        """Discard the oldest queued record, keeping disconnect markers in place"""
+        oldest = self.queue.get_nowait()
+        if oldest is not _CLOSED:
+            self.dropped += 1
+            return True
+        queued = [oldest]
+        while not self.queue.empty():
+            queued.append(self.queue.get_nowait())
+        records = [i for i, item in enumerate(queued) if item is not _CLOSED]
+        if records:
+            del queued[records[0]]
+            self.dropped += 1
+        for item in queued:
+            self.queue.put_nowait(item)
+        return bool(records)
+
+    async def read(self, timeout: Optional[float] = None) -> Optional[Dict]:
+        """Wait for the next record; None on timeout or once a disconnected stream is drained"""
+        if self.queue.empty():
+            if self.closed:
+                return None
+            if not self.connected:
+                raise ConnectionError("Stream not connected")
+        try:
+            data = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        return None if data is _CLOSED else data
+
+    async def read_many(self, max_records: int, timeout: Optional[float] = None) -> List[Dict]:
+        """Wait for at least one record, then drain up to max_records without waiting"""
+        first = await self.read(timeout)
+        if first is None:
+            return []
+        records = [first]
+        while len(records) < max_records and not self.queue.empty():
+            data = self.queue.get_nowait()
+            if data is _CLOSED:
+                break
+            records.append(data)
+        return records
 
     async def disconnect(self) -> None:
         self.connected = False
+        self.closed = True
+        if not self.queue.full():
+            self.queue.put_nowait(_CLOSED)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth and received/dropped record counts"""
+        return {
+            "depth": self.queue.qsize(),
+            "max_size": self.max_size,
+            "drop_policy": self.drop_policy.value,
+            "received": self.received,
+            "dropped": self.dropped,
+        }
+
+def decode_frame(payload: Union[str, bytes]) -> List[Dict[str, Any]]:
+    """Decode a frame holding one JSON record, a JSON array of records or NDJSON lines"""
+    try:
+        data = loads(payload)
+    except json.JSONDecodeError:
+        data = [loads(line) for line in payload.splitlines() if line.strip()]
+    if isinstance(data, dict):
+        return [data]
+    if isinstance(data, list) and all(isinstance(record, dict) for record in data):
+        return data
+    raise ValueError("Frame does not contain JSON records")
+
+class WebSocketAdapter(StreamAdapter):
+    """Stream source fed by a WebSocket connection to ``url``.
+
+    A background task receives frames, decodes each one into a batch of
+    records and queues them. When the connection drops it reconnects with
+    exponential backoff from ``reconnect_delay`` up to
+    ``max_reconnect_delay`` seconds until ``disconnect`` is called.
+    """
+
+    def __init__(self, config: Dict):
+        super().__init__(config)
+        self.url = config["url"]
+        token = config.get("auth_token")
+        self.headers = {"Authorization": f"Bearer {token}"} if token else {}
+        self.reconnect_delay = float(config.get("reconnect_delay", 0.5))
+        self.max_reconnect_delay = float(config.get("max_reconnect_delay", 30.0))
+        self.heartbeat = config.get("heartbeat", 30.0)
+        self.connects = 0
+        self.frames = 0
+        self.decode_errors = 0
+        self.last_error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def connect(self) -> None:
+        await super().connect()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        failures = 0
+        async with aiohttp.ClientSession(headers=self.headers) as session:
+            while not self.closed:
+                try:
+                    async with session.ws_connect(self.url, heartbeat=self.heartbeat) as ws:
+                        self.connects += 1
+                        failures = 0
+                        await self._receive(ws)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.last_error = str(e)
+                    logger.warning(f"WebSocket connection to {self.url} failed: {str(e)}")
+                delay = min(self.reconnect_delay * 2 ** failures, self.max_reconnect_delay)
+                failures += 1
+                await asyncio.sleep(delay)
+
+    async def _receive(self, ws: aiohttp.ClientWebSocketResponse) -> None:
+        async for message in ws:
+            if message.type in (aiohttp.WSMsgType.TEXT, aiohttp.WSMsgType.BINARY):
+                self.frames += 1
+                try:
+                    records = decode_frame(message.data)
+                except ValueError as e:
+                    self.decode_errors += 1
+                    logger.warning(f"Undecodable frame from {self.url}: {str(e)}")
+                    continue
+                await self.put_many(records)
+            elif message.type == aiohttp.WSMsgType.ERROR:
+                raise ConnectionError(str(ws.exception()))
+
+    async def disconnect(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        await super().disconnect()
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = super().get_stats()
+        stats.update(connects=self.connects, frames=self.frames,
+                     decode_errors=self.decode_errors, last_error=self.last_error)
+        return stats
+
+class FileTailAdapter(StreamAdapter):
+    """Stream source that replays, and optionally follows, an NDJSON file.
+
+    The file is read in ``chunk_size`` blocks off the event loop and every
+    complete line is decoded into a record. Without ``follow`` the stream
+    ends at the end of the file; with it the file is polled every
+    ``poll_interval`` seconds for appended lines, like ``tail -f``.
+    """
+
+    def __init__(self, config: Dict):
+        super().__init__(config)
+        self.path = config["path"]
+        self.follow = bool(config.get("follow", False))
+        self.poll_interval = float(config.get("poll_interval", 0.5))
+        self.chunk_size = int(config.get("chunk_size", 1 << 16))
+        self.position = 0 if config.get("from_start", True) else None
+        self.lines = 0
+        self.decode_errors = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def connect(self) -> None:
+        if self._task is not None and not self._task.done():
+            return
+        file = await asyncio.to_thread(open, self.path, "rb")
+        if self.position is None:
+            self.position = await asyncio.to_thread(file.seek, 0, os.SEEK_END)
+        else:
+            await asyncio.to_thread(file.seek, self.position)
+        await super().connect()
+        self._task = asyncio.create_task(self._tail(file))
+
+    async def _tail(self, file) -> None:
+        pending = b""
+        try:
+            while not self.closed:
+                chunk = await asyncio.to_thread(file.read, self.chunk_size)
+                if chunk:
+                    lines = (pending + chunk).split(b"\n")
+                    pending = lines.pop()
+                    self.position += len(chunk)
+                    await self._queue_lines(lines)
+                elif self.follow:
+                    await asyncio.sleep(self.poll_interval)
+                else:
+                    # A last line without a newline is complete at the end of the file
+                    await self._queue_lines([pending])
+                    self.closed = True
+                    self.connected = False
+                    await self.queue.put(_CLOSED)
+        finally:
+            file.close()
+
+    async def _queue_lines(self, lines: List[bytes]) -> None:
+        records = []
+        skipped = 0
+        for line in lines:
+            if not line.strip():
+                continue
+            self.lines += 1
+            try:
+                record = loads(line)
+            except json.JSONDecodeError:
+                record = None
+            if isinstance(record, dict):
+                records.append(record)
+            else:
+                skipped += 1
+        if skipped:
+            self.decode_errors += skipped
+            logger.warning(f"Skipped {skipped} undecodable lines in {self.path}")
+        await self.put_many(records)
+
+    async def disconnect(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        await super().disconnect()
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = super().get_stats()
+        stats.update(position=self.position, lines=self.lines, decode_errors=self.decode_errors)
+        return stats
+
+def create_stream_adapter(config: Dict) -> StreamAdapter:
+    """Pick the stream adapter for a source's config"""
+    url = str(config.get("url", ""))
+    if url.startswith(("ws://", "wss://")):
+        return WebSocketAdapter(config)
+    if config.get("path"):
+        return FileTailAdapter(config)
+    return StreamAdapter(config)
+
+# File suffix -> batch format
+BATCH_FORMATS = {
+    ".csv": "csv",
+    ".ndjson": "ndjson",
+    ".jsonl": "ndjson",
+    # A JSON array of records, or NDJSON when the file does not start with "["
+    ".json": "json",
+    ".parquet": "parquet",
+}
+
+def _is_json_array(path: Path) -> bool:
+    with open(path, "rb") as f:
+        head = f.read(4096).lstrip(b"\xef\xbb\xbf \t\r\n")
+    return head.startswith(b"[")
+
+def _read_range(path: str, start: int, end: int) -> bytes:
+    with open(path, "rb") as f:
+        f.seek(start)
+        return f.read(end - start)
+
+# Pool workers return Arrow tables, which pickle as raw buffers and are
+# much cheaper to send back than DataFrames with string columns
+
+def _parse_csv_range(path: str, start: int, end: int, columns: List[str]) -> pa.Table:
+    df = pd.read_csv(io.BytesIO(_read_range(path, start, end)), header=None, names=columns)
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+def _parse_ndjson_range(path: str, start: int, end: int) -> pa.Table:
+    df = pd.read_json(io.BytesIO(_read_range(path, start, end)), lines=True)
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+def _parse_row_group(path: str, index: int) -> pa.Table:
+    return pq.ParquetFile(path).read_row_group(index)
+
+def _line_ranges(path: str, start: int, chunk_bytes: int) -> List[Tuple[int, int]]:
+    """Split a file from start into ranges of about chunk_bytes that end on a newline"""
+    ranges = []
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        while start < size:
+            f.seek(start + chunk_bytes)
+            f.readline()
+            end = min(f.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return ranges
 
 class BatchAdapter(DataSourceAdapter):
+    """Batch source reading local CSV, NDJSON and Parquet files in chunks.
+
+    ``path`` is a file or a directory filtered by ``pattern``; the format
+    follows the file suffix unless ``format`` is set. Chunks of
+    ``chunk_size`` rows are read one at a time off the event loop. With
+    ``parse_workers`` set, files are split into ``chunk_bytes`` line-aligned
+    ranges (Parquet into row groups) that a process pool parses in parallel,
+    with at most ``max_pending`` chunks in flight so memory stays bounded
+    regardless of file size. Parallel CSV parsing assumes no quoted field
+    spans a line break. JSON array files cannot be split and are parsed
+    whole, then yielded in chunks.
+    """
+
     def __init__(self, config: Dict):
         self.config = config
+        self.path = Path(config.get("path", "."))
+        self.pattern = config.get("pattern", "*")
+        self.format = config.get("format")
+        self.chunk_size = int(config.get("chunk_size", 10000))
+        self.chunk_bytes = int(config.get("chunk_bytes", 32 << 20))
+        self.parse_workers = int(config.get("parse_workers", 0))
+        self.max_pending = int(config.get("max_pending", max(2, self.parse_workers * 2)))
+        self.files: List[Path] = []
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.chunks = 0
+        self.rows = 0
+        self._chunks: Optional[AsyncIterator[pd.DataFrame]] = None
 
     async def connect(self) -> None:
-        # Implement batch connection logic
-        pass
+        if self.path.is_dir():
+            self.files = sorted(file for file in self.path.glob(self.pattern) if file.is_file())
+        elif self.path.is_file():
+            self.files = [self.path]
+        else:
+            raise FileNotFoundError(f"Batch path not found: {self.path}")
+        if self.parse_workers and self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.parse_workers)
+        self._chunks = self.read_chunks()
 
-    async def read(self) -> Dict:
-        # Implement batch read logic
-        pass
+    def _file_format(self, file: Path) -> str:
+        file_format = self.format or BATCH_FORMATS.get(file.suffix.lower())
+        if file_format == "json" and not _is_json_array(file):
+            file_format = "ndjson"
+        if file_format not in ("csv", "ndjson", "json", "parquet"):
+            raise ValueError(f"Unsupported batch file format: {file}")
+        return file_format
+
+    def _open_chunks(self, file: Path, file_format: str) -> Iterator[pd.DataFrame]:
+        """Sequential chunk iterator for one file"""
+        if file_format == "csv":
+            return pd.read_csv(file, chunksize=self.chunk_size)
+        if file_format == "ndjson":
+            return pd.read_json(file, lines=True, chunksize=self.chunk_size)
+        if file_format == "json":
+            df = pd.read_json(file, orient="records")
+            return (df.iloc[start:start + self.chunk_size] for start in range(0, len(df), self.chunk_size))
+        parquet = pq.ParquetFile(file)
+        return (batch.to_pandas() for batch in parquet.iter_batches(batch_size=self.chunk_size))
+
+    def _plan_chunks(self, file: Path, file_format: str) -> List[Tuple[Callable[..., pa.Table], tuple]]:
+        """Split one file into independently parsable chunk jobs"""
+        path = str(file)
+        if file_format == "parquet":
+            row_groups = pq.ParquetFile(path).num_row_groups
+            return [(_parse_row_group, (path, index)) for index in range(row_groups)]
+        if file_format == "ndjson":
+            return [(_parse_ndjson_range, (path, start, end))
+                    for start, end in _line_ranges(path, 0, self.chunk_bytes)]
+        with open(path, "rb") as f:
+            header = f.readline()
+        columns = pd.read_csv(io.BytesIO(header), nrows=0).columns.tolist()
+        return [(_parse_csv_range, (path, start, end, columns))
+                for start, end in _line_ranges(path, len(header), self.chunk_bytes)]
+
+    async def read_chunks(self) -> AsyncIterator[pd.DataFrame]:
+        """Yield every file's chunks in order"""
+        loop = asyncio.get_running_loop()
+        for file in self.files:
+            file_format = await asyncio.to_thread(self._file_format, file)
+            if self.executor is None or file_format == "json":
+                chunks = await asyncio.to_thread(self._open_chunks, file, file_format)
+                try:
+                    while (chunk := await asyncio.to_thread(next, chunks, None)) is not None:
+                        yield chunk
+                finally:
+                    if hasattr(chunks, "close"):
+                        chunks.close()
+                continue
+            pending: Deque[asyncio.Future] = deque()
+            try:
+                for func, args in await asyncio.to_thread(self._plan_chunks, file, file_format):
+                    pending.append(loop.run_in_executor(self.executor, func, *args))
+                    if len(pending) >= self.max_pending:
+                        yield (await pending.popleft()).to_pandas()
+                while pending:
+                    yield (await pending.popleft()).to_pandas()
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    async def read(self) -> Optional[pd.DataFrame]:
+        """Read the next non-empty chunk; None once every file is read"""
+        if self._chunks is None:
+            raise ConnectionError("Batch source not connected")
+        async for chunk in self._chunks:
+            if len(chunk):
+                self.chunks += 1
+                self.rows += len(chunk)
+                return chunk
+        return None
+
+    async def read_many(self, max_records: int, timeout: Optional[float] = None) -> pd.DataFrame:
+        """Read the next chunk; chunk sizes come from the source config, not max_records"""
+        chunk = await self.read()
+        return chunk if chunk is not None else pd.DataFrame()
 
     async def disconnect(self) -> None:
-        # Implement disconnect logic
-        pass
+        if self._chunks is not None:
+            await self._chunks.aclose()
+            self._chunks = None
+        if self.executor is not None:
+            executor, self.executor = self.executor, None
+            # Waits for running parse jobs, so it must not block the event loop
+            await asyncio.to_thread(executor.shutdown, cancel_futures=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the files, chunks and rows read so far"""
+        return {"files": len(self.files), "chunks": self.chunks, "rows": self.rows}
 
 class DataIngestion:
     def __init__(self):
         self.sources: Dict[str, DataSource] = {}
         self.adapters: Dict[str, DataSourceAdapter] = {}
         self.validators: Dict[str, DataValidator] = {}
-        self.rate_limits: Dict[str, float] = {}
+        self.rate_limits: Dict[str, TokenBucket] = {}
 
     async def register_source(self, source: DataSource) -> None:
         """Register a new data source"""
@@ -83,7 +544,7 @@ class DataIngestion:
             self.validators[source.name] = DataValidator(source.schema)
             
             if source.type == "stream":
-                self.adapters[source.name] = StreamAdapter(source.config)
+                self.adapters[source.name] = create_stream_adapter(source.config)
             elif source.type == "batch":
                 self.adapters[source.name] = BatchAdapter(source.config)
             else:
@@ -93,18 +554,22 @@ class DataIngestion:
         except Exception as e:
             raise Exception(f"Error registering source: {str(e)}")
 
-    async def ingest_data(self, source_name: str, data: Dict) -> Dict:
-        """Ingest data from a source"""
+    async def ingest_data(self, source_name: str, data: Union[Dict, List[Dict]]) -> Dict:
+        """Ingest a record or a batch of records from a source"""
         try:
             if source_name not in self.sources:
                 raise ValueError(f"Unknown source: {source_name}")
 
-            if not self.validators[source_name].validate(data):
-                raise ValueError("Data validation failed")
+            records = data if isinstance(data, list) else [data]
+            validator = self.validators[source_name]
+            for record in records:
+                if not validator.validate(record):
+                    raise ValueError("Data validation failed")
 
-            # Apply rate limiting
-            if source_name in self.rate_limits:
-                await asyncio.sleep(1 / self.rate_limits[source_name])
+            # Batches are charged one token per record
+            limiter = self.rate_limits.get(source_name)
+            if limiter is not None:
+                await limiter.acquire(len(records))
 
             # Add metadata
             enriched_data = {
@@ -117,6 +582,18 @@ class DataIngestion:
         except Exception as e:
             raise Exception(f"Ingestion error: {str(e)}")
 
+    async def read(self, source_name: str, max_records: int,
+                   timeout: Optional[float] = None) -> Union[List[Dict], pd.DataFrame]:
+        """Read the next records from a source, applying its rate limit"""
+        if source_name not in self.sources:
+            raise ValueError(f"Unknown source: {source_name}")
+        records = await self.adapters[source_name].read_many(max_records, timeout)
+        limiter = self.rate_limits.get(source_name)
+        # Batch adapters return DataFrame chunks, so check the length
+        if len(records) and limiter is not None:
+            await limiter.acquire(len(records))
+        return records
+
     async def start_streaming(self, source_name: str) -> None:
         """Start streaming from a source"""
         try:
@@ -124,17 +601,28 @@ class DataIngestion:
                 raise ValueError(f"Unknown source: {source_name}")
 
             adapter = self.adapters[source_name]
+            batch_size = self.sources[source_name].config.get("read_batch_size", 100)
+            # Reads wait for data, so records are ingested as soon as they
+            # arrive; an empty read means the source is exhausted or closed
             while True:
-                data = await adapter.read()
-                if data:
-                    await self.ingest_data(source_name, data)
-                await asyncio.sleep(0.1)
+                records = await adapter.read_many(batch_size)
+                # Batch adapters return DataFrame chunks, so check the length
+                if len(records) == 0:
+                    break
+                if isinstance(records, pd.DataFrame):
+                    records = records.to_dict("records")
+                await self.ingest_data(source_name, records)
         except Exception as e:
             raise Exception(f"Streaming error: {str(e)}")
 
-    def set_rate_limit(self, source_name: str, rate: float) -> None:
-        """Set rate limit for a source in requests per second"""
-        self.rate_limits[source_name] = rate
+    def set_rate_limit(self, source_name: str, rate: float, burst: Optional[float] = None) -> None:
+        """Set rate limit for a source in records per second, allowing bursts
+        of up to ``burst`` records (defaults to one second's worth)"""
+        self.rate_limits[source_name] = TokenBucket(rate, burst)
+
+    def get_rate_limit_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get token levels and throttle counts per rate-limited source"""
+        return {name: limiter.get_stats() for name, limiter in self.rate_limits.items()}
 
     async def cleanup(self) -> None:
         """Cleanup and disconnect all sources"""
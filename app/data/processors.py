@@ -1,14 +1,32 @@
 import logging
-from typing import Dict, Any, List
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Union
 import pandas as pd
-from .storage import DataStorage
-from ..models.schema import DataSource
+from .batch import to_frame, validate_frame
+from .storage import BufferedStorage, DataStorage
+from ..core.serialization import dumps_str
+from .validation import ValidatorCache
+from .columnar import ColumnarStorage
+from ..analytics.aggregation import IncrementalAggregator
+from ..analytics.windows import WindowAggregator
+from ..models.schema import DataSource, StorageBackend
 
 logger = logging.getLogger(__name__)
 
 class DataProcessor:
-    def __init__(self):
-        self.storage = DataStorage()
+    def __init__(self, storage: Optional[DataStorage] = None,
+                 columnar_storage: Optional[ColumnarStorage] = None,
+                 aggregator: Optional[IncrementalAggregator] = None,
+                 window_aggregator: Optional[WindowAggregator] = None,
+                 reject_storage: Optional[BufferedStorage] = None):
+        self.storage = storage or DataStorage()
+        self.columnar_storage = columnar_storage
+        self.aggregator = aggregator or IncrementalAggregator()
+        self.window_aggregator = window_aggregator
+        # Invalid batch rows go to {source}_rejects instead of failing the batch
+        self.reject_storage = reject_storage or self.storage
+        self.reject_counts: Dict[str, int] = {}
+        self.validators = ValidatorCache()
         self._processors = {}
         self._initialize_processors()
 
@@ -23,46 +41,94 @@ class DataProcessor:
     async def process_data(self, data: Any, source: DataSource) -> Dict[str, Any]:
         """Process incoming data based on source type"""
         try:
-            processor = self._processors.get(source.type)
-            if not processor:
-                raise ValueError(f"No processor found for source type: {source.type}")
-
-            processed_data = await processor(data, source)
-            await self.storage.store(processed_data, source)
+            processed_data = await self.transform(data, source)
+            await self.store(processed_data, source)
             return processed_data
 
         except Exception as e:
             logger.error(f"Error processing data: {str(e)}")
             raise
 
+    async def transform(self, data: Any, source: DataSource) -> Any:
+        """Validate and transform data based on source type without storing it"""
+        processor = self._processors.get(source.type)
+        if not processor:
+            raise ValueError(f"No processor found for source type: {source.type}")
+        return await processor(data, source)
+
+    async def store(self, processed_data: Any, source: DataSource) -> None:
+        """Store processed data and update the running aggregates"""
+        await self._get_storage(source).store(processed_data, source.name)
+        if isinstance(processed_data, pd.DataFrame):
+            self.aggregator.update_frame(source.name, processed_data)
+        elif isinstance(processed_data, list):
+            for record in processed_data:
+                self.aggregator.update(source.name, record)
+        else:
+            self.aggregator.update(source.name, processed_data)
+
+    def _get_storage(self, source: DataSource):
+        """Get the storage backend configured for a source"""
+        if source.storage == StorageBackend.COLUMNAR:
+            if self.columnar_storage is None:
+                self.columnar_storage = ColumnarStorage()
+            return self.columnar_storage
+        return self.storage
+
     async def _process_stream_data(self, data: Dict[str, Any], source: DataSource) -> Dict[str, Any]:
         """Process streaming data"""
-        # Validate against schema
-        self._validate_data(data, source.schema)
+        # Validate against schema, converting typed fields such as "2.5"
+        data = self._validate_data(data, source.schema, source.name)
         
         # Transform data
         transformed_data = self._transform_data(data, source)
+
+        # Feed time-window aggregation
+        if self.window_aggregator is not None:
+            await self.window_aggregator.process(source.name, transformed_data)
         
         return transformed_data
 
-    async def _process_batch_data(self, data: List[Dict[str, Any]], source: DataSource) -> List[Dict[str, Any]]:
-        """Process batch data"""
-        processed_batch = []
-        for item in data:
-            self._validate_data(item, source.schema)
-            processed_item = self._transform_data(item, source)
-            processed_batch.append(processed_item)
-        
-        return processed_batch
+    async def _process_batch_data(self, data: Union[List[Dict[str, Any]], pd.DataFrame],
+                                  source: DataSource) -> pd.DataFrame:
+        """Process batch data as one typed columnar frame"""
+        df = to_frame(data)
+        valid, rejected = validate_frame(df, source.schema)
+        if len(rejected):
+            await self._reject(rejected, source)
+        return self._transform_frame(valid, source)
+
+    async def _reject(self, rejected: pd.DataFrame, source: DataSource) -> None:
+        """Send invalid rows and their reasons to the reject sink"""
+        self.reject_counts[source.name] = self.reject_counts.get(source.name, 0) + len(rejected)
+        logger.warning(f"Rejected {len(rejected)} invalid rows from {source.name}")
+        timestamp = datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
+        records = rejected.drop(columns="reason").to_dict("records")
+        rows = [{
+            "timestamp": timestamp,
+            "reason": reason,
+            "record": dumps_str(record)
+        } for reason, record in zip(rejected["reason"], records)]
+        await self.reject_storage.store(rows, f"{source.name}_rejects")
 
-    def _validate_data(self, data: Dict[str, Any], schema: Dict[str, Any]):
-        """Validate data against schema"""
-        for field, field_type in schema.items():
-            if field not in data:
-                raise ValueError(f"Missing required field: {field}")
-            # Add type validation logic here
+    async def _process_api_data(self, data: Dict[str, Any], source: DataSource) -> Dict[str, Any]:
+        """Process API data"""
+        return await self._process_stream_data(data, source)
+
+    def _validate_data(self, data: Dict[str, Any], schema: Dict[str, Any],
+                       source_name: Optional[str] = None) -> Dict[str, Any]:
+        """Validate data against schema with the source's compiled validator
+        and return a copy with its typed fields converted"""
+        validator = self.validators.get(source_name, schema)
+        validator.validate(data)
+        return validator.coerce(data)
 
     def _transform_data(self, data: Dict[str, Any], source: DataSource) -> Dict[str, Any]:
         """Transform data according to source configuration"""
         # Add transformation logic here
         return data
+
+    def _transform_frame(self, df: pd.DataFrame, source: DataSource) -> pd.DataFrame:
+        """Transform a batch frame according to source configuration"""
+        # Add columnar transformation logic here
+        return df
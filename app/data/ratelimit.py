@@ -0,0 +1,72 @@
+import asyncio
+import time
+from typing import Dict, Any, Optional
+
+class TokenBucket:
+    """Token bucket limiter for one source.
+
+    Tokens refill continuously at ``rate`` per second up to ``capacity``,
+    so a source that has been idle may burst up to ``capacity`` records at
+    once. ``acquire(n)`` takes n tokens and returns without yielding while
+    enough are available; otherwise the tokens are reserved (the level goes
+    negative) and the caller sleeps only until the deficit has refilled.
+    Reserving up front keeps concurrent callers in arrival order and lets a
+    batch larger than the burst capacity through at the sustained rate.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("Rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1.0))
+        if self.capacity <= 0:
+            raise ValueError("Burst capacity must be positive")
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self.acquired = 0
+        self.throttled = 0
+        self.throttled_seconds = 0.0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, n: float = 1) -> bool:
+        """Take n tokens if they are available right now"""
+        self._refill()
+        if self.tokens < n:
+            return False
+        self.tokens -= n
+        self.acquired += n
+        return True
+
+    def reserve(self, n: float = 1) -> float:
+        """Take n tokens and return the seconds to wait before using them"""
+        self._refill()
+        self.tokens -= n
+        self.acquired += n
+        if self.tokens >= 0:
+            return 0.0
+        delay = -self.tokens / self.rate
+        self.throttled += 1
+        self.throttled_seconds += delay
+        return delay
+
+    async def acquire(self, n: float = 1) -> None:
+        """Wait until n tokens have been taken"""
+        delay = self.reserve(n)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the current token level and throttle counts"""
+        self._refill()
+        return {
+            "rate": self.rate,
+            "capacity": self.capacity,
+            "tokens": self.tokens,
+            "acquired": self.acquired,
+            "throttled": self.throttled,
+            "throttled_seconds": self.throttled_seconds,
+        }
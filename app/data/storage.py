@@ -1,15 +1,171 @@
+import asyncio
 import logging
-from typing import Dict, Any, Optional
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Union
+import numpy as np
 import pandas as pd
-from sqlalchemy import create_engine
+from sqlalchemy import column, literal_column, select, table, text
+from .database import StorageEngine, get_storage_engine
 from ..config import config
+from ..models.schema import DatabaseConfig
 
 logger = logging.getLogger(__name__)
 
-class DataStorage:
-    def __init__(self, connection_string: Optional[str] = None):
-        self.connection_string = connection_string or config.get_config().database.url
-        self.engine = create_engine(self.connection_string)
+class BufferedStorage(ABC):
+    """Write-behind buffering shared by the storage backends.
+
+    Rows are accumulated per buffer key and written in bulk once batch_size
+    rows are pending or flush_interval seconds have passed since the last
+    flush. Callers wait on a flush once a buffer holds max_buffered rows.
+    """
+
+    def __init__(self, batch_size: Optional[int] = None,
+                 flush_interval: float = 1.0,
+                 max_buffered: Optional[int] = None):
+        self.batch_size = batch_size or config.get_config().analytics.batch_size
+        self.flush_interval = flush_interval
+        self.max_buffered = max_buffered or self.batch_size * 4
+        self._buffers: Dict[str, List[Dict[str, Any]]] = {}
+        self._buffer_locks: Dict[str, asyncio.Lock] = {}
+        self._last_flush: Dict[str, float] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def _buffer_key(self, source_id: str) -> str:
+        """Get the buffer key for a source"""
+        return source_id
+
+    @abstractmethod
+    async def _write_rows(self, key: str, rows: List[Dict[str, Any]]) -> None:
+        """Write a batch of buffered rows"""
+        pass
+
+    async def _write_frame(self, key: str, df: pd.DataFrame) -> None:
+        """Write a columnar batch; backends override this to skip the row conversion"""
+        await self._write_rows(key, df.to_dict("records"))
+
+    async def store(self, data: Union[Dict[str, Any], List[Dict[str, Any]], pd.DataFrame],
+                    source_id: str) -> bool:
+        """Buffer processed data for a bulk write"""
+        if isinstance(data, pd.DataFrame):
+            return await self.store_frame(data, source_id)
+        try:
+            rows = data if isinstance(data, list) else [data]
+            key = self._buffer_key(source_id)
+            buffer = self._buffers.setdefault(key, [])
+
+            # Backpressure: wait for the pending rows to be written before
+            # accepting more once the buffer is full
+            if len(buffer) >= self.max_buffered:
+                await self._flush_buffer(key)
+                buffer = self._buffers[key]
+
+            buffer.extend(rows)
+            self._ensure_flush_task()
+
+            if len(buffer) >= self.batch_size:
+                await self._flush_buffer(key)
+            return True
+        except Exception as e:
+            logger.error(f"Error storing data: {str(e)}")
+            raise
+
+    async def store_frame(self, df: pd.DataFrame, source_id: str) -> bool:
+        """Write a columnar batch directly instead of buffering its rows"""
+        try:
+            key = self._buffer_key(source_id)
+            # Rows buffered earlier are written first to keep the write order
+            await self._flush_buffer(key)
+            if len(df):
+                async with self._buffer_locks.setdefault(key, asyncio.Lock()):
+                    await self._write_frame(key, df)
+            return True
+        except Exception as e:
+            logger.error(f"Error storing data: {str(e)}")
+            raise
+
+    async def flush(self, source_id: Optional[str] = None) -> int:
+        """Write buffered rows for one source (or all sources)"""
+        if source_id is not None:
+            return await self._flush_buffer(self._buffer_key(source_id))
+
+        written = 0
+        for key in list(self._buffers):
+            written += await self._flush_buffer(key)
+        return written
+
+    async def close(self) -> None:
+        """Stop the background flusher and flush all buffered rows"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+
+        await self.flush()
+
+    async def _flush_buffer(self, key: str) -> int:
+        """Swap out a buffer and bulk write its rows"""
+        lock = self._buffer_locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            rows = self._buffers.get(key)
+            self._last_flush[key] = time.monotonic()
+            if not rows:
+                return 0
+
+            self._buffers[key] = []
+            try:
+                await self._write_rows(key, rows)
+            except Exception:
+                # Put the rows back so a later flush can retry them
+                self._buffers[key] = rows + self._buffers[key]
+                raise
+            return len(rows)
+
+    def _ensure_flush_task(self) -> None:
+        """Start the background flusher for time-based flushes"""
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_periodically())
+
+    async def _flush_periodically(self) -> None:
+        """Flush buffers that have been pending longer than flush_interval"""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            now = time.monotonic()
+            for key, rows in list(self._buffers.items()):
+                if rows and now - self._last_flush.get(key, 0) >= self.flush_interval:
+                    try:
+                        await self._flush_buffer(key)
+                    except Exception as e:
+                        logger.error(f"Error flushing {key}: {str(e)}")
+
+class DataStorage(BufferedStorage):
+    def __init__(self, connection_string: Optional[str] = None,
+                 storage_engine: Optional[StorageEngine] = None,
+                 batch_size: Optional[int] = None,
+                 flush_interval: float = 1.0,
+                 max_buffered: Optional[int] = None):
+        super().__init__(batch_size, flush_interval, max_buffered)
+
+        # Share the process-wide engine unless a dedicated database is requested
+        self._owns_engine = storage_engine is None and connection_string is not None
+        if storage_engine is not None:
+            self.storage_engine = storage_engine
+        elif connection_string is not None:
+            db_config = config.get_config().database
+            self.storage_engine = StorageEngine(DatabaseConfig(
+                url=connection_string,
+                pool_size=db_config.pool_size,
+                max_overflow=db_config.max_overflow,
+                timeout=db_config.timeout
+            ))
+        else:
+            self.storage_engine = get_storage_engine()
+        self.connection_string = self.storage_engine.db_config.url
+        self.engine = self.storage_engine.engine
         self._initialize_storage()
 
     def _initialize_storage(self):
@@ -23,25 +179,58 @@ class DataStorage:
             logger.error(f"Error initializing storage: {str(e)}")
             raise
 
-    async def store(self, data: Dict[str, Any], source_id: str) -> bool:
-        """Store processed data"""
-        try:
-            df = pd.DataFrame([data])
-            table_name = f"data_{source_id}"
-            df.to_sql(table_name, self.engine, if_exists='append', index=False)
-            return True
-        except Exception as e:
-            logger.error(f"Error storing data: {str(e)}")
-            raise
+    def table_name(self, source_id: str) -> str:
+        """Get the SQL table holding a source's rows"""
+        return f"data_{source_id}"
+
+    def _buffer_key(self, source_id: str) -> str:
+        return self.table_name(source_id)
+
+    async def close(self) -> None:
+        """Flush all buffered rows and release a dedicated engine"""
+        await super().close()
+        if self._owns_engine:
+            self.storage_engine.dispose()
+
+    async def _write_rows(self, key: str, rows: List[Dict[str, Any]]) -> None:
+        await self.storage_engine.run(self._write_table, key, pd.DataFrame(rows))
+
+    async def _write_frame(self, key: str, df: pd.DataFrame) -> None:
+        await self.storage_engine.run(self._write_table, key, df)
+
+    def _write_table(self, table_name: str, df: pd.DataFrame) -> None:
+        """Write rows to a table with a single executemany per chunk"""
+        if "timestamp" in df and pd.api.types.is_datetime64_any_dtype(df["timestamp"]):
+            # Keep the ISO text format that range scans compare against
+            timestamps = df["timestamp"]
+            iso = np.datetime_as_string(timestamps.to_numpy(dtype="datetime64[us]"), unit="us")
+            df = df.assign(timestamp=pd.Series(iso, index=df.index).where(timestamps.notna(), None))
+        df.to_sql(table_name, self.engine, if_exists='append', index=False,
+                  chunksize=self.batch_size)
 
     async def query(self, query: str, params: Dict[str, Any] = None) -> pd.DataFrame:
         """Query stored data"""
         try:
-            return pd.read_sql(query, self.engine, params=params)
+            # Make buffered writes visible to readers
+            await self.flush()
+            return await self.storage_engine.run(pd.read_sql, query, self.engine, params=params)
         except Exception as e:
             logger.error(f"Error querying data: {str(e)}")
             raise
 
+    async def execute(self, statement: str, params: Dict[str, Any] = None) -> int:
+        """Run a write statement in its own transaction and return the affected row count"""
+        def run() -> int:
+            with self.engine.begin() as conn:
+                return conn.execute(text(statement), params or {}).rowcount
+
+        try:
+            await self.flush()
+            return await self.storage_engine.run(run)
+        except Exception as e:
+            logger.error(f"Error executing statement: {str(e)}")
+            raise
+
     async def get_latest(self, source_id: str, limit: int = 100) -> pd.DataFrame:
         """Get latest records for a source"""
         query = f"""
@@ -50,3 +239,18 @@ class DataStorage:
         LIMIT {limit}
         """
         return await self.query(query)
+
+    async def scan(self, source_id: str, columns: Optional[List[str]] = None,
+                   start: Optional[datetime] = None, end: Optional[datetime] = None) -> pd.DataFrame:
+        """Read a time range of a source, optionally projecting columns"""
+        table_name = self._buffer_key(source_id)
+        selected = [column(name) for name in columns] if columns else [literal_column("*")]
+        statement = select(*selected).select_from(table(table_name))
+        if start is not None:
+            statement = statement.where(column("timestamp") >= start.isoformat())
+        if end is not None:
+            statement = statement.where(column("timestamp") < end.isoformat())
+        statement = statement.order_by(column("timestamp"))
+
+        await self.flush(source_id)
+        return await self.storage_engine.run(pd.read_sql, statement, self.engine)
@@ -0,0 +1,348 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Any, List, Optional
+from .ingestion import DataIngestion
+from .processors import DataProcessor
+from ..core.backplane import Backplane
+from ..models.schema import DataSource, SourceType
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("ingest", "validate", "process", "store")
+
+# Backplane hash of source name -> "worker_id expires_at" lease
+LEASES_KEY = "insightflow:source_leases"
+
+# Passed down the pipeline once a stage has no more input
+_DONE = object()
+
+class StageMetrics:
+    """Throughput and per-batch latency of one pipeline stage"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.batches = 0
+        self.records = 0
+        self.rejected = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.max_latency = 0.0
+
+    def record(self, records: int, seconds: float) -> None:
+        self.batches += 1
+        self.records += records
+        self.busy_seconds += seconds
+        self.max_latency = max(self.max_latency, seconds)
+
+    def to_dict(self) -> Dict[str, Any]:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return {
+            "batches": self.batches,
+            "records": self.records,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "throughput": self.records / elapsed,
+            "avg_latency_ms": 1000 * self.busy_seconds / self.batches if self.batches else 0.0,
+            "max_latency_ms": 1000 * self.max_latency,
+        }
+
+class SourcePipeline:
+    """Managed ingest -> validate -> process -> store pipeline for one source.
+
+    Each stage hands batches to the next through a bounded queue, so a slow
+    stage applies backpressure all the way back to the adapter. The process
+    and store stages run ``workers`` tasks each; batches may complete out of
+    order when more than one worker is used. A failing adapter is reconnected
+    with exponential backoff until ``max_restarts`` consecutive failures.
+    """
+
+    def __init__(self, source: DataSource, ingestion: DataIngestion, processor: DataProcessor,
+                 workers: int = 1, queue_size: int = 8, read_batch_size: int = 100,
+                 max_restarts: int = 5, backoff: float = 0.5, max_backoff: float = 30.0):
+        self.source = source
+        self.ingestion = ingestion
+        self.processor = processor
+        self.workers = max(1, workers)
+        self.read_batch_size = read_batch_size
+        self.max_restarts = max_restarts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.queues = {stage: asyncio.Queue(maxsize=queue_size) for stage in STAGES[1:]}
+        self.metrics = {stage: StageMetrics() for stage in STAGES}
+        self.state = "created"
+        self.restarts = 0
+        self.last_error: Optional[str] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        self.state = "running"
+        self._tasks = [
+            asyncio.create_task(self._ingest()),
+            asyncio.create_task(self._run_stage("validate", 1, self._validate)),
+            asyncio.create_task(self._run_stage("process", self.workers, self._process)),
+            asyncio.create_task(self._run_stage("store", self.workers, self._store)),
+        ]
+
+    async def wait(self) -> None:
+        """Wait until the source is exhausted and every stage has drained"""
+        await asyncio.gather(*self._tasks)
+        if self.state == "running":
+            self.state = "finished"
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self.state == "running":
+            self.state = "stopped"
+
+    async def _ingest(self) -> None:
+        """Read batches from the adapter, reconnecting it when reads fail"""
+        metrics = self.metrics["ingest"]
+        output = self.queues["validate"]
+        failures = 0
+        while True:
+            try:
+                start = time.perf_counter()
+                records = await self.ingestion.read(self.source.name, self.read_batch_size)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                metrics.errors += 1
+                self.last_error = str(e)
+                if failures >= self.max_restarts:
+                    logger.error(f"Source {self.source.name} failed after {failures} restarts: {str(e)}")
+                    self.state = "failed"
+                    break
+                delay = min(self.backoff * 2 ** failures, self.max_backoff)
+                failures += 1
+                self.restarts += 1
+                logger.warning(f"Restarting source {self.source.name} in {delay:.1f}s: {str(e)}")
+                await self._reconnect(delay)
+                continue
+            if not len(records):
+                break
+            failures = 0
+            metrics.record(len(records), time.perf_counter() - start)
+            await output.put(records)
+        await output.put(_DONE)
+
+    async def _reconnect(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        try:
+            await self.ingestion.adapters[self.source.name].connect()
+        except Exception as e:
+            logger.error(f"Error reconnecting source {self.source.name}: {str(e)}")
+
+    async def _run_stage(self, stage: str, workers: int, handler) -> None:
+        """Run a stage's workers until upstream is done, then signal the next stage"""
+        downstream = STAGES[STAGES.index(stage) + 1] if stage != STAGES[-1] else None
+        queue = self.queues[stage]
+
+        async def worker():
+            metrics = self.metrics[stage]
+            while True:
+                batch = await queue.get()
+                if batch is _DONE:
+                    # Leave the marker for the sibling workers
+                    queue.put_nowait(_DONE)
+                    return
+                start = time.perf_counter()
+                try:
+                    result = await handler(batch, metrics)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    metrics.errors += 1
+                    self.last_error = str(e)
+                    logger.error(f"Error in {stage} stage of {self.source.name}: {str(e)}")
+                    continue
+                metrics.record(self._count(result), time.perf_counter() - start)
+                if downstream is not None and self._count(result):
+                    await self.queues[downstream].put(result)
+
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        if downstream is not None:
+            await self.queues[downstream].put(_DONE)
+
+    @staticmethod
+    def _count(batch: Any) -> int:
+        return len(batch) if hasattr(batch, "__len__") else 1
+
+    async def _validate(self, records: List[Dict[str, Any]], metrics: StageMetrics) -> List[Dict[str, Any]]:
+        """Drop records that fail the schema so one bad record does not fail its batch"""
+        if self.source.type == SourceType.BATCH:
+            # Batch processing rejects invalid rows to {source}_rejects itself
+            return records
+        validator = self.processor.validators.get(self.source.name, self.source.schema)
+        valid = [record for record in records if validator.is_valid(record)]
+        if len(valid) < len(records):
+            metrics.rejected += len(records) - len(valid)
+            logger.warning(f"Rejected {len(records) - len(valid)} invalid records from {self.source.name}")
+        return valid
+
+    async def _process(self, records: List[Dict[str, Any]], metrics: StageMetrics) -> Any:
+        if self.source.type == SourceType.BATCH:
+            return await self.processor.transform(records, self.source)
+        return [await self.processor.transform(record, self.source) for record in records]
+
+    async def _store(self, processed: Any, metrics: StageMetrics) -> Any:
+        await self.processor.store(processed, self.source)
+        return processed
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = {
+            "state": self.state,
+            "restarts": self.restarts,
+            "last_error": self.last_error,
+            "stages": {stage: metrics.to_dict() for stage, metrics in self.metrics.items()},
+        }
+        for stage, queue in self.queues.items():
+            stats["stages"][stage]["queue_depth"] = queue.qsize()
+        return stats
+
+class IngestionSupervisor:
+    """Runs every enabled data source as a supervised pipeline.
+
+    Per-source ``config`` keys override the supervisor defaults:
+    ``workers``, ``pipeline_queue_size``, ``read_batch_size``,
+    ``max_restarts``, ``rate_limit`` and ``burst``.
+
+    With a ``backplane`` shared by several workers, each source is run by
+    the one worker holding its lease. Leases are renewed every third of
+    ``lease_seconds``; a source whose owner stops renewing is taken over
+    by another worker once its lease expires.
+    """
+
+    def __init__(self, processor: DataProcessor, ingestion: Optional[DataIngestion] = None,
+                 workers: int = 1, queue_size: int = 8, max_restarts: int = 5,
+                 backoff: float = 0.5, max_backoff: float = 30.0,
+                 backplane: Optional[Backplane] = None, lease_seconds: float = 30.0):
+        self.processor = processor
+        self.ingestion = ingestion or DataIngestion()
+        self.workers = workers
+        self.queue_size = queue_size
+        self.max_restarts = max_restarts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.backplane = backplane
+        self.lease_seconds = lease_seconds
+        self.pipelines: Dict[str, SourcePipeline] = {}
+        self._sources: Dict[str, DataSource] = {}
+        # source name -> lease value this worker last wrote
+        self._leases: Dict[str, str] = {}
+        self._lease_task: Optional[asyncio.Task] = None
+
+    async def start(self, sources: Dict[str, DataSource]) -> None:
+        """Start a pipeline for every enabled source this worker owns"""
+        for source in sources.values():
+            if not source.enabled:
+                continue
+            self._sources[source.name] = source
+            try:
+                if await self._claim(source.name):
+                    await self.add_source(source)
+                else:
+                    logger.info(f"Source {source.name} is ingested by another worker")
+            except Exception as e:
+                logger.error(f"Error starting source {source.name}: {str(e)}")
+        if self.backplane is not None and self._lease_task is None:
+            self._lease_task = asyncio.create_task(self._maintain_leases())
+
+    async def _claim(self, source_name: str) -> bool:
+        """Take or renew the lease on a source; True when this worker owns it"""
+        if self.backplane is None:
+            return True
+        now = time.time()
+        lease = f"{self.backplane.worker_id} {now + self.lease_seconds}"
+        if await self.backplane.hsetnx(LEASES_KEY, source_name, lease):
+            self._leases[source_name] = lease
+            return True
+        current = await self.backplane.hget(LEASES_KEY, source_name)
+        if current is None:
+            return False
+        owner, expires = current.split(" ")
+        if owner != self.backplane.worker_id and float(expires) > now:
+            return False
+        # Renew our own lease or take over an expired one
+        if await self.backplane.hcas(LEASES_KEY, source_name, current, lease):
+            self._leases[source_name] = lease
+            return True
+        return False
+
+    async def _maintain_leases(self) -> None:
+        """Renew owned leases, stop sources whose lease was lost and take over orphaned ones"""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            for name, source in self._sources.items():
+                try:
+                    pipeline = self.pipelines.get(name)
+                    if pipeline is not None and pipeline.state == "failed":
+                        # Give the source up so the next tick restarts it on any worker
+                        logger.warning(f"Releasing the lease on failed source {name}")
+                        await self.pipelines.pop(name).stop()
+                        await self.ingestion.adapters[name].disconnect()
+                        await self.backplane.hcas(LEASES_KEY, name, self._leases.pop(name), None)
+                        continue
+                    owned = await self._claim(name)
+                    if owned and name not in self.pipelines:
+                        logger.info(f"Taking over ingestion of {name}")
+                        await self.add_source(source)
+                    elif not owned and name in self.pipelines:
+                        logger.warning(f"Lost the lease on {name}, stopping its pipeline")
+                        self._leases.pop(name, None)
+                        await self.pipelines.pop(name).stop()
+                        await self.ingestion.adapters[name].disconnect()
+                except Exception as e:
+                    logger.error(f"Error renewing the lease on {name}: {str(e)}")
+
+    async def add_source(self, source: DataSource) -> SourcePipeline:
+        """Register a source with ingestion and start its pipeline"""
+        if source.name in self.pipelines:
+            raise ValueError(f"Source already running: {source.name}")
+        await self.ingestion.register_source(source)
+        options = source.config
+        if options.get("rate_limit"):
+            self.ingestion.set_rate_limit(source.name, float(options["rate_limit"]), options.get("burst"))
+        pipeline = SourcePipeline(
+            source, self.ingestion, self.processor,
+            workers=int(options.get("workers", self.workers)),
+            queue_size=int(options.get("pipeline_queue_size", self.queue_size)),
+            read_batch_size=int(options.get("read_batch_size", 100)),
+            max_restarts=int(options.get("max_restarts", self.max_restarts)),
+            backoff=self.backoff,
+            max_backoff=self.max_backoff,
+        )
+        self.pipelines[source.name] = pipeline
+        pipeline.start()
+        logger.info(f"Started ingestion pipeline for {source.name}")
+        return pipeline
+
+    async def wait(self, source_name: Optional[str] = None) -> None:
+        """Wait for one or all pipelines to drain"""
+        names = [source_name] if source_name else list(self.pipelines)
+        await asyncio.gather(*(self.pipelines[name].wait() for name in names))
+
+    async def stop(self) -> None:
+        """Stop every pipeline, disconnect the sources and release their leases"""
+        if self._lease_task is not None:
+            self._lease_task.cancel()
+            await asyncio.gather(self._lease_task, return_exceptions=True)
+            self._lease_task = None
+        await asyncio.gather(*(pipeline.stop() for pipeline in self.pipelines.values()))
+        await self.ingestion.cleanup()
+        for name, lease in self._leases.items():
+            try:
+                await self.backplane.hcas(LEASES_KEY, name, lease, None)
+            except Exception as e:
+                logger.warning(f"Error releasing the lease on {name}: {str(e)}")
+        self._leases.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-source pipeline state and per-stage throughput and latency"""
+        stats = {name: pipeline.get_stats() for name, pipeline in self.pipelines.items()}
+        for name, limiter_stats in self.ingestion.get_rate_limit_stats().items():
+            if name in stats:
+                stats[name]["rate_limit"] = limiter_stats
+        return stats
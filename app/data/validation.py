@@ -0,0 +1,166 @@
+import json
+from datetime import datetime
+from typing import Dict, Any, Callable, Optional
+
+def _datetime_ok(value: Any) -> bool:
+    if isinstance(value, datetime):
+        return True
+    if isinstance(value, str):
+        try:
+            datetime.fromisoformat(value)
+            return True
+        except ValueError:
+            return False
+    return False
+
+def _float_ok(value: Any) -> bool:
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, (int, float)):
+        return True
+    if isinstance(value, str):
+        try:
+            float(value)
+            return True
+        except ValueError:
+            return False
+    return False
+
+def _int_ok(value: Any) -> bool:
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, int):
+        return True
+    if isinstance(value, float):
+        return value.is_integer()
+    if isinstance(value, str):
+        try:
+            int(value)
+            return True
+        except ValueError:
+            return False
+    return False
+
+def _string_ok(value: Any) -> bool:
+    return isinstance(value, (str, int, float))
+
+def _to_datetime(value: Any) -> datetime:
+    return value if isinstance(value, datetime) else datetime.fromisoformat(value)
+
+def _to_float(value: Any) -> float:
+    return float(value)
+
+def _to_int(value: Any) -> int:
+    return int(float(value)) if isinstance(value, float) else int(value)
+
+def _to_string(value: Any) -> str:
+    return str(value)
+
+# Schema type name -> (exact class for the fast path, check, coercion)
+FIELD_TYPES = {
+    "datetime": (datetime, _datetime_ok, _to_datetime),
+    "float": (float, _float_ok, _to_float),
+    "int": (int, _int_ok, _to_int),
+    "string": (str, _string_ok, _to_string),
+}
+
+def schema_fingerprint(schema: Dict[str, Any]) -> str:
+    """Canonical text form of a schema, used as its cache key"""
+    return json.dumps(schema, sort_keys=True, default=str)
+
+class CompiledValidator:
+    """Validator and coercer generated once for a schema.
+
+    The schema is turned into straight-line Python source with one block
+    per field, so validating a record costs a few dict lookups and class
+    checks instead of a walk over the schema. ``validate`` only checks a
+    record; ``coerce`` returns a copy with the typed fields converted.
+    """
+
+    def __init__(self, schema: Dict[str, Any]):
+        self.schema = dict(schema)
+        self.source = self._generate()
+        namespace = {"_missing": self._missing, "_invalid": self._invalid}
+        for name, (cls, check, convert) in FIELD_TYPES.items():
+            namespace[f"_{name}_cls"] = cls
+            namespace[f"_{name}_ok"] = check
+            namespace[f"_to_{name}"] = convert
+        exec(compile(self.source, f"<schema validator {schema_fingerprint(schema)[:60]}>", "exec"), namespace)
+        self.validate: Callable[[Dict[str, Any]], None] = namespace["validate"]
+        self.coerce: Callable[[Dict[str, Any]], Dict[str, Any]] = namespace["coerce"]
+
+    @staticmethod
+    def _missing(field: str) -> ValueError:
+        return ValueError(f"Missing required field: {field}")
+
+    @staticmethod
+    def _invalid(field: str, field_type: str) -> ValueError:
+        return ValueError(f"Invalid {field_type} for field: {field}")
+
+    def _generate(self) -> str:
+        validate = ["def validate(data):", "    get = data.get"]
+        coerce = ["def coerce(data):", "    get = data.get", "    result = dict(data)"]
+        for field, field_type in self.schema.items():
+            name = repr(field)
+            lines = [
+                f"    value = get({name})",
+                "    if value is None:",
+                f"        raise _missing({name})",
+            ]
+            validate.extend(lines)
+            coerce.extend(lines)
+            if not isinstance(field_type, str) or field_type not in FIELD_TYPES:
+                # Unknown types are only checked for presence
+                continue
+            validate.extend([
+                f"    if value.__class__ is not _{field_type}_cls and not _{field_type}_ok(value):",
+                f"        raise _invalid({name}, {field_type!r})",
+            ])
+            coerce.extend([
+                f"    if value.__class__ is not _{field_type}_cls:",
+                f"        if not _{field_type}_ok(value):",
+                f"            raise _invalid({name}, {field_type!r})",
+                f"        result[{name}] = _to_{field_type}(value)",
+            ])
+        validate.append("    return None")
+        coerce.append("    return result")
+        return "\n".join(validate + [""] + coerce) + "\n"
+
+    def is_valid(self, data: Dict[str, Any]) -> bool:
+        try:
+            self.validate(data)
+            return True
+        except ValueError:
+            return False
+
+MAX_COMPILED = 256
+_compiled: Dict[str, CompiledValidator] = {}
+
+def compile_schema(schema: Dict[str, Any]) -> CompiledValidator:
+    """Get the compiled validator for a schema; identical schemas share one"""
+    fingerprint = schema_fingerprint(schema)
+    validator = _compiled.get(fingerprint)
+    if validator is None:
+        if len(_compiled) >= MAX_COMPILED:
+            _compiled.pop(next(iter(_compiled)))
+        validator = _compiled[fingerprint] = CompiledValidator(schema)
+    return validator
+
+class ValidatorCache:
+    """Compiled validators per source, recompiled when a source's schema changes"""
+
+    def __init__(self):
+        self._validators: Dict[str, CompiledValidator] = {}
+
+    def get(self, source_name: str, schema: Dict[str, Any]) -> CompiledValidator:
+        validator = self._validators.get(source_name)
+        # Comparing the small schema dicts is much cheaper than recompiling
+        if validator is None or validator.schema != schema:
+            validator = self._validators[source_name] = compile_schema(schema)
+        return validator
+
+    def invalidate(self, source_name: Optional[str] = None) -> None:
+        if source_name is None:
+            self._validators.clear()
+        else:
+            self._validators.pop(source_name, None)
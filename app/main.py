@@ -1,17 +1,24 @@
 import asyncio
 import logging
 from fastapi import FastAPI
-from contextlib import asynccontextmanager
+from contextlib import AsyncExitStack, asynccontextmanager
 
 from .config import config
 from .core.mcp_server import MCPServer
 from .core.message_handler import MessageHandler
 from .core.client_manager import ClientManager
+from .core.backplane import create_backplane
 from .data.processors import DataProcessor
 from .data.ingestion import DataSourceAdapter
+from .data.supervisor import IngestionSupervisor
 from .data.storage import DataStorage
+from .data.columnar import ColumnarStorage
+from .data.database import get_storage_engine, dispose_storage_engine
 from .analytics.engine import AnalyticsEngine
+from .analytics.aggregation import IncrementalAggregator
+from .analytics.windows import WindowAggregator
 from .analytics.insights import InsightGenerator
+from .ai.client import get_ai_client, close_ai_client
 from .ai.claude_connector import ClaudeConnector
 from .ai.nlp_processor import NLPProcessor
 from .api.rest import RestAPI
@@ -26,45 +33,87 @@ logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Initialize components
-    try:
-        # Core components
-        mcp_server = MCPServer()
-        message_handler = MessageHandler()
-        client_manager = ClientManager()
-
-        # Data components
-        data_processor = DataProcessor()
-        data_storage = DataStorage(None)  # Initialize with appropriate backend
-
-        # Analytics components
-        analytics_engine = AnalyticsEngine()
-        insight_generator = InsightGenerator()
-
-        # AI components
-        claude_connector = ClaudeConnector()
-        nlp_processor = NLPProcessor()
-
-        # Initialize MCP server
-        await mcp_server.initialize()
-
-        # Store components in app state
-        app.state.mcp_server = mcp_server
-        app.state.message_handler = message_handler
-        app.state.client_manager = client_manager
-        app.state.data_processor = data_processor
-        app.state.analytics_engine = analytics_engine
-        app.state.claude_connector = claude_connector
+    # Each component registers its cleanup once it exists, so a failed
+    # start only tears down what was created, in reverse order
+    async with AsyncExitStack() as cleanup:
+        try:
+            # Workers share broadcasts, sessions and metric state through the backplane
+            backplane = create_backplane(config.get_config().server.backplane_url)
+            await backplane.start()
+            cleanup.push_async_callback(backplane.close)
+            if config.get_config().server.workers > 1 and not config.get_config().server.backplane_url:
+                logger.warning("Running several workers without a backplane_url; state is not shared")
+
+            # One pooled, concurrency-limited Claude client per worker
+            ai_client = get_ai_client()
+            cleanup.push_async_callback(close_ai_client)
+
+            # Core components
+            mcp_server = MCPServer(backplane=backplane, ai_client=ai_client)
+            client_manager = ClientManager(backplane=backplane)
+            message_handler = MessageHandler(client_manager=client_manager)
+            await client_manager.start()
+            cleanup.push_async_callback(client_manager.close)
+
+            # Data components share one pooled storage engine
+            storage_engine = get_storage_engine()
+            cleanup.callback(dispose_storage_engine)
+            data_storage = DataStorage(storage_engine=storage_engine)
+            cleanup.push_async_callback(data_storage.close)
+            columnar_storage = ColumnarStorage()
+            cleanup.push_async_callback(columnar_storage.close)
+            aggregator = IncrementalAggregator(worker_id=backplane.worker_id)
+            try:
+                # Resume the aggregates and sketches saved at the last shutdown
+                restored = await aggregator.load(data_storage)
+                logger.info(f"Restored {restored} aggregates")
+            except Exception as e:
+                logger.warning(f"No saved aggregates restored: {str(e)}")
+            cleanup.push_async_callback(aggregator.save, data_storage)
+            window_aggregator = WindowAggregator(storage=data_storage, client_manager=client_manager)
+            cleanup.push_async_callback(window_aggregator.flush)
+            data_processor = DataProcessor(storage=data_storage, columnar_storage=columnar_storage,
+                                           aggregator=aggregator, window_aggregator=window_aggregator)
+
+            # Run every enabled source through the ingest -> store pipeline
+            # Each source is ingested by the one worker holding its lease
+            ingestion_supervisor = IngestionSupervisor(processor=data_processor, backplane=backplane)
+            cleanup.push_async_callback(ingestion_supervisor.stop)
+            await ingestion_supervisor.start(config.get_config().data_sources)
+
+            # Analytics components
+            analytics_engine = AnalyticsEngine(storage=data_storage, columnar_storage=columnar_storage,
+                                               aggregator=aggregator)
+            insight_generator = InsightGenerator(backplane=backplane)
+            await insight_generator.start()
+
+            # AI components
+            claude_connector = ClaudeConnector(ai_client=ai_client)
+            cleanup.push_async_callback(claude_connector.cache.close)
+            nlp_processor = NLPProcessor()
+
+            # Initialize MCP server
+            await mcp_server.initialize(data_processor=data_processor, analytics_engine=analytics_engine,
+                                        claude_connector=claude_connector)
+            cleanup.push_async_callback(mcp_server.shutdown)
+
+            # Store components in app state
+            app.state.mcp_server = mcp_server
+            app.state.message_handler = message_handler
+            app.state.client_manager = client_manager
+            app.state.data_processor = data_processor
+            app.state.ingestion_supervisor = ingestion_supervisor
+            app.state.data_storage = data_storage
+            app.state.columnar_storage = columnar_storage
+            app.state.analytics_engine = analytics_engine
+            app.state.claude_connector = claude_connector
+        except Exception as e:
+            logger.error(f"Error during initialization: {str(e)}")
+            raise
 
         logger.info("InsightFlow initialized successfully")
         yield
-    except Exception as e:
-        logger.error(f"Error during initialization: {str(e)}")
-        raise
-    finally:
-        # Cleanup
-        await mcp_server.shutdown()
-        logger.info("InsightFlow shutdown complete")
+    logger.info("InsightFlow shutdown complete")
 
 # Initialize FastAPI application
 app = FastAPI(
@@ -74,12 +123,8 @@ app = FastAPI(
     lifespan=lifespan
 )
 
-# Initialize REST API
-rest_api = RestAPI(
-    mcp_server=app.state.mcp_server,
-    data_processor=app.state.data_processor,
-    ai_connector=app.state.claude_connector
-)
+# Initialize REST API; routes use the components the lifespan stores in app.state
+rest_api = RestAPI()
 
 # Include REST API routes
 app.include_router(rest_api.router, prefix="/api/v1")
@@ -9,18 +9,27 @@ class SourceType(str, Enum):
     API = "api"
     DATABASE = "database"
 
+class StorageBackend(str, Enum):
+    SQL = "sql"
+    COLUMNAR = "columnar"
+
 class DataSource(BaseModel):
     name: str
     type: SourceType
     config: Dict[str, Any]
     schema: Dict[str, Any]
     enabled: bool = True
+    storage: StorageBackend = StorageBackend.SQL
 
 class AnalyticsConfig(BaseModel):
     metrics: List[str]
     interval: int = Field(default=60, description="Processing interval in seconds")
     batch_size: int = 1000
-    cache_ttl: int = 300
+    cache_ttl: int = Field(default=300, description="Seconds AI responses are cached")
+    cache_max_entries: int = Field(default=1024, description="AI responses kept in memory per worker")
+    cache_store: Optional[str] = Field(default=None, description="Directory or redis:// URL of a shared AI response cache")
+    window_slide: Optional[int] = Field(default=None, description="Sliding window step in seconds; tumbling when unset")
+    allowed_lateness: int = Field(default=0, description="Seconds a window stays open for out-of-order records")
 
 class AIModelConfig(BaseModel):
     model_name: str
@@ -28,6 +37,10 @@ class AIModelConfig(BaseModel):
     temperature: float = 0.7
     max_tokens: int = 2000
     context_window: int = 4000
+    prompt_budget: Optional[int] = Field(default=None, description="Prompt tokens; context_window - max_tokens when unset")
+    base_url: Optional[str] = Field(default=None, description="API endpoint; the Anthropic API when unset")
+    max_concurrency: int = Field(default=8, description="Concurrent requests per worker")
+    max_retries: int = Field(default=3, description="Retries of rate-limited or overloaded requests")
 
 class ServerConfig(BaseModel):
     host: str
@@ -35,12 +48,16 @@ class ServerConfig(BaseModel):
     debug: bool = False
     workers: int = 4
     request_timeout: int = 30
+    backplane_url: Optional[str] = Field(default=None, description="redis:// URL shared by all workers; in-process when unset")
 
 class DatabaseConfig(BaseModel):
     url: str
     pool_size: int = 5
     max_overflow: int = 10
     timeout: int = 30
+    columnar_path: str = "data/columnar"
+    partition_interval: str = Field(default="hour", description="Columnar partition size: hour or day")
+    columnar_format: str = Field(default="parquet", description="Columnar file format: parquet or arrow")
 
 class LogConfig(BaseModel):
     level: str = "INFO"
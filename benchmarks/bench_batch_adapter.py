@@ -0,0 +1,64 @@
+"""Sequential vs process-pool chunked parsing in BatchAdapter.
+
+Usage: python -m benchmarks.bench_batch_adapter [rows] [workers]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.data.ingestion import BatchAdapter
+
+
+def write_files(directory: str, n: int):
+    df = pd.DataFrame({
+        "timestamp": pd.date_range("2024-01-01", periods=n, freq="s").strftime("%Y-%m-%dT%H:%M:%S"),
+        "value": np.random.default_rng(0).normal(size=n),
+        "region": np.array(["eu", "us", "apac"])[np.arange(n) % 3],
+    })
+    paths = {
+        "csv": os.path.join(directory, "events.csv"),
+        "ndjson": os.path.join(directory, "events.ndjson"),
+        "parquet": os.path.join(directory, "events.parquet"),
+    }
+    df.to_csv(paths["csv"], index=False)
+    df.to_json(paths["ndjson"], orient="records", lines=True)
+    df.to_parquet(paths["parquet"], row_group_size=100_000)
+    return paths
+
+
+async def read_rate(path: str, workers: int) -> float:
+    adapter = BatchAdapter({"path": path, "chunk_size": 100_000, "chunk_bytes": 8 << 20,
+                            "parse_workers": workers})
+    await adapter.connect()
+    start = time.perf_counter()
+    while (chunk := await adapter.read()) is not None:
+        pass
+    elapsed = time.perf_counter() - start
+    await adapter.disconnect()
+    return adapter.rows / elapsed
+
+
+async def run(n: int, workers: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_files(tmp, n)
+        print(f"{n} rows, {workers} parse workers")
+        for file_format, path in paths.items():
+            sequential = await read_rate(path, 0)
+            parallel = await read_rate(path, workers)
+            print(f"{file_format:>8}: sequential {sequential:12.0f} rows/sec, "
+                  f"parallel {parallel:12.0f} rows/sec ({parallel / sequential:.1f}x)")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 2
+    asyncio.run(run(n, workers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Throughput of InsightGenerator anomaly detection at many metrics per update.
+
+Compares the previous list-based history (two Python passes per check and
+list.pop(0) trimming) with the ring-buffer history.
+
+Usage: python -m benchmarks.bench_insights_anomaly [metrics] [updates]
+"""
+import asyncio
+import sys
+import time
+
+import numpy as np
+
+from app.analytics.insights import InsightGenerator
+
+
+def list_history_update(history, data):
+    """The original list-based anomaly check, kept here as the baseline"""
+    anomalies = 0
+    for metric, value in data.items():
+        values = history.setdefault(metric, [])
+        if values:
+            mean = sum(values) / len(values)
+            std_dev = (sum((x - mean) ** 2 for x in values) / len(values)) ** 0.5
+            if abs(value - mean) > std_dev * 3:
+                anomalies += 1
+        values.append(value)
+        if len(values) > 1000:
+            values.pop(0)
+    return anomalies
+
+
+def make_updates(metrics: int, updates: int):
+    rng = np.random.default_rng(0)
+    matrix = rng.normal(100, 10, size=(updates, metrics))
+    names = [f"metric_{i}" for i in range(metrics)]
+    return [dict(zip(names, row.tolist())) for row in matrix]
+
+
+async def bench_ring_buffer(batches, warmup):
+    generator = InsightGenerator()
+    for data in warmup:
+        await generator._detect_anomalies(data)
+    start = time.perf_counter()
+    for data in batches:
+        await generator._detect_anomalies(data)
+    return time.perf_counter() - start
+
+
+def bench_list(batches, warmup):
+    history = {}
+    for data in warmup:
+        list_history_update(history, data)
+    start = time.perf_counter()
+    for data in batches:
+        list_history_update(history, data)
+    return time.perf_counter() - start
+
+
+def main():
+    metrics = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    updates = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    # Fill histories to a realistic depth before timing
+    warmup = make_updates(metrics, 200)
+    batches = make_updates(metrics, updates)
+    points = metrics * updates
+
+    before = bench_list(batches, warmup)
+    after = asyncio.run(bench_ring_buffer(batches, warmup))
+    print(f"{metrics} metrics x {updates} updates, 200-value histories")
+    print(f"list history:  {points / before:12,.0f} datapoints/sec")
+    print(f"ring buffer:   {points / after:12,.0f} datapoints/sec ({before / after:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""Per-metric vs vectorized InsightGenerator.generate_insights.
+
+Usage: python -m benchmarks.bench_insights_batch [metrics] [ticks]
+"""
+import asyncio
+import sys
+import time
+
+import numpy as np
+
+from app.analytics.insights import InsightGenerator
+
+
+async def run(generator: InsightGenerator, ticks) -> float:
+    start = time.perf_counter()
+    for data in ticks:
+        await generator.generate_insights(data)
+    return time.perf_counter() - start
+
+
+def main():
+    metrics = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    ticks = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    rng = np.random.default_rng(0)
+    names = [f"metric_{i}" for i in range(metrics)]
+    data = [dict(zip(names, row.tolist())) for row in rng.normal(100, 10, size=(ticks, metrics))]
+
+    per_metric = asyncio.run(run(InsightGenerator(default_window_size=100), data))
+    vectorized = asyncio.run(run(InsightGenerator(default_window_size=100, vectorized=True), data))
+    print(f"{metrics} metrics x {ticks} ticks, 100-value windows")
+    print(f"per-metric: {ticks / per_metric:8.1f} ticks/sec")
+    print(f"vectorized: {ticks / vectorized:8.1f} ticks/sec ({per_metric / vectorized:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
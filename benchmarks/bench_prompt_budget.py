@@ -0,0 +1,115 @@
+"""Prompt size and insight latency with and without the token-budgeted prompt builder.
+
+The end-to-end figures come from a local mock of the Messages API that
+takes 20 ms plus 1 ms per 4 KiB of request body, standing in for upload
+and prompt processing time, which grow with prompt size.
+
+Usage: python -m benchmarks.bench_prompt_budget [rows ...]
+"""
+import asyncio
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from aiohttp import web
+
+from app.ai.cache import ResponseCache
+from app.ai.claude_connector import ClaudeConnector
+from app.ai.client import AIClient
+from app.ai.prompt import PromptBuilder, estimate_tokens
+from app.core.serialization import dumps_str
+from app.models.schema import AIModelConfig
+
+HEADER = "Analyze the following data and generate insights:\n\n"
+
+
+def make_data(rows: int):
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame({
+        "timestamp": pd.date_range("2024-01-01", periods=rows, freq="s"),
+        "value": rng.normal(100, 5, rows),
+        "latency_ms": rng.exponential(20, rows),
+        "region": rng.choice(["eu", "us", "apac"], rows),
+    })
+    return {"events": frame.to_dict("records")}
+
+
+def legacy_prompt(data) -> str:
+    # The prompt before budgeting: the whole data set as indented JSON
+    return HEADER + dumps_str(data, indent=True)
+
+
+async def mock_api(request):
+    body = await request.read()
+    await asyncio.sleep(0.02 + len(body) / 4096 / 1000)
+    return web.json_response({
+        "id": "msg_bench", "type": "message", "role": "assistant", "model": "claude-bench",
+        "content": [{"type": "text", "text": "insights"}], "stop_reason": "end_turn",
+        "stop_sequence": None, "usage": {"input_tokens": 1, "output_tokens": 1},
+    })
+
+
+class LegacyConnector(ClaudeConnector):
+    def _build_insight_prompt(self, data, context=None):
+        return legacy_prompt(data)
+
+
+async def end_to_end_ms(connector_class, client, ai_config, data) -> float:
+    # A fresh cache per run so every call reaches the mock
+    connector = connector_class(ai_client=client, ai_config=ai_config, cache=ResponseCache(ttl=0))
+    start = time.perf_counter()
+    await connector.generate_insight(data)
+    return 1000 * (time.perf_counter() - start)
+
+
+async def cache_hit_ms(client, ai_config, data) -> float:
+    # The second call is answered from the cache; its cost is building the key
+    connector = ClaudeConnector(ai_client=client, ai_config=ai_config, cache=ResponseCache(ttl=600))
+    await connector.generate_insight(data)
+    start = time.perf_counter()
+    await connector.generate_insight(data)
+    return 1000 * (time.perf_counter() - start)
+
+
+async def run(sizes):
+    app = web.Application(client_max_size=1024 ** 3)
+    app.router.add_post("/v1/messages", mock_api)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+    ai_config = AIModelConfig(model_name="claude-bench", api_key="bench", context_window=4000, max_tokens=1000)
+    client = AIClient(api_key="bench", base_url=url, timeout=600)
+    builder = PromptBuilder(ai_config)
+    print(f"prompt budget {builder.budget} tokens")
+    try:
+        for rows in sizes:
+            data = make_data(rows)
+            start = time.perf_counter()
+            legacy = legacy_prompt(data)
+            legacy_build = 1000 * (time.perf_counter() - start)
+            start = time.perf_counter()
+            budgeted = builder.build_insight(data)
+            budgeted_build = 1000 * (time.perf_counter() - start)
+            legacy_e2e = await end_to_end_ms(LegacyConnector, client, ai_config, data)
+            budgeted_e2e = await end_to_end_ms(ClaudeConnector, client, ai_config, data)
+            hit = await cache_hit_ms(client, ai_config, data)
+            print(f"{rows:>8} rows: legacy {estimate_tokens(legacy):>10} tokens, build {legacy_build:8.1f} ms, "
+                  f"end-to-end {legacy_e2e:8.1f} ms | budgeted {estimate_tokens(budgeted):>5} tokens, "
+                  f"build {budgeted_build:8.1f} ms, end-to-end {budgeted_e2e:8.1f} ms, "
+                  f"cache hit {hit:8.1f} ms")
+    finally:
+        await client.close()
+        await runner.cleanup()
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100, 1_000, 10_000, 100_000]
+    asyncio.run(run(sizes))
+
+
+if __name__ == "__main__":
+    main()
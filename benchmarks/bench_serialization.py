@@ -0,0 +1,65 @@
+"""Encode cost per message for the stdlib and orjson serializer backends.
+
+Usage: python -m benchmarks.bench_serialization [iterations] [clients]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.core.serialization import SERIALIZERS
+
+
+def make_messages():
+    rng = np.random.default_rng(0)
+    timestamps = pd.date_range("2024-01-01", periods=100, freq="min")
+    return {
+        "broadcast": {
+            "type": "window_result", "source": "events", "window_start": "2024-01-01T00:00:00",
+            "metrics": {"value": {"count": 120, "average": 3.25, "min": 0.5, "max": 9.75}},
+        },
+        "analytics": {
+            "count": np.int64(1000), "average": np.float64(4.2),
+            "quantiles": {f"p{q}": np.float64(q / 10) for q in (50, 90, 95, 99)},
+            "values": rng.normal(size=1000),
+        },
+        "insights": [{
+            "type": "anomaly", "metric": "value", "value": float(v), "timestamp": t,
+            "confidence": 0.95,
+        } for v, t in zip(rng.normal(size=100), timestamps)],
+    }
+
+
+def per_message_us(encode, message, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        encode(message)
+    return 1e6 * (time.perf_counter() - start) / iterations
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    clients = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    messages = make_messages()
+    backends = {name: cls() for name, cls in SERIALIZERS.items()}
+
+    print(f"encode cost per message, {iterations} iterations")
+    for name, message in messages.items():
+        timings = {backend: per_message_us(serializer.dumps_str, message, iterations)
+                   for backend, serializer in backends.items()}
+        baseline = timings["json"]
+        row = ", ".join(f"{backend} {us:9.1f} us ({baseline / us:.1f}x)" for backend, us in timings.items())
+        print(f"{name:>10}: {row}")
+
+    # The old broadcast encoded the message again for every client
+    best = backends.get("orjson", backends["json"])
+    message = messages["broadcast"]
+    per_client = per_message_us(backends["json"].dumps_str, message, iterations) * clients
+    once = per_message_us(best.dumps_str, message, iterations)
+    print(f"broadcast to {clients} clients: per-client json {per_client:9.1f} us, "
+          f"encode once with {best.name} {once:9.1f} us")
+
+
+if __name__ == "__main__":
+    main()
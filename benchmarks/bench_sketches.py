@@ -0,0 +1,76 @@
+"""Sketch accuracy, memory and speed against exact NumPy/pandas answers.
+
+Usage: python -m benchmarks.bench_sketches [values] [workers]
+"""
+import json
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.analytics.aggregation import IncrementalAggregator
+from app.analytics.sketches import ColumnSketch
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    rng = np.random.default_rng(0)
+    latencies = pd.Series(rng.lognormal(3, 1, n))
+    user_ids = pd.Series(rng.zipf(1.3, n) % (n // 10))
+
+    # Each worker sketches its own shard; the shards are then merged
+    start = time.perf_counter()
+    shards = [ColumnSketch.from_array(shard) for shard in np.array_split(latencies.to_numpy(), workers)]
+    latency_sketch = shards[0]
+    for shard in shards[1:]:
+        latency_sketch.merge(ColumnSketch.from_dict(shard.to_dict()))
+    user_sketch = ColumnSketch.from_array(user_ids.to_numpy())
+    sketch_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    exact_quantiles = latencies.quantile(list(ColumnSketch.QUANTILES.values()))
+    exact_distinct = user_ids.nunique()
+    exact_top = user_ids.value_counts().head(10)
+    exact_time = time.perf_counter() - start
+
+    print(f"{n} values, {workers} merged shards")
+    for (metric, q), exact in zip(ColumnSketch.QUANTILES.items(), exact_quantiles):
+        estimate = latency_sketch.result(metric)
+        rank = (latencies < estimate).mean()
+        print(f"{metric:>14}: {estimate:10.3f} exact {exact:10.3f} rank error {abs(rank - q):.4f}")
+    distinct = user_sketch.result("distinct_count")
+    print(f"{'distinct_count':>14}: {distinct:10d} exact {exact_distinct:10d} "
+          f"error {abs(distinct - exact_distinct) / exact_distinct:.2%}")
+    hitters = [value for value, _ in user_sketch.result("heavy_hitters")]
+    print(f"{'heavy_hitters':>14}: {len(set(hitters) & set(exact_top.index))}/10 of the exact top 10")
+
+    state = len(json.dumps(latency_sketch.to_dict())) + len(json.dumps(user_sketch.to_dict()))
+    raw = latencies.memory_usage(deep=True) + user_ids.memory_usage(deep=True)
+    print(f"serialized sketches: {state / 1024:.1f} KiB vs {raw / 2**20:.1f} MiB of raw columns")
+    print(f"sketch build+merge: {sketch_time:.3f}s, exact pandas: {exact_time:.3f}s")
+
+    # Per-record cost of IncrementalAggregator.update, as paid on the stream path
+    records = [{"timestamp": "2024-01-01T00:00:00", "value": float(v), "user": f"u{u}"}
+               for v, u in zip(latencies.to_numpy()[:100_000], user_ids.to_numpy()[:100_000])]
+    for label, aggregator in (("no sketches", IncrementalAggregator(sketches=False)),
+                              ("buffered sketches", IncrementalAggregator())):
+        start = time.perf_counter()
+        for record in records:
+            aggregator.update("src", record)
+        aggregator.flush_sketches()
+        per_record = (time.perf_counter() - start) / len(records)
+        print(f"aggregator update, {label:>17}: {per_record * 1e6:6.1f} us/record")
+    # Updating the sketches one value at a time instead, for comparison
+    sketches = {"value": ColumnSketch(), "user": ColumnSketch()}
+    start = time.perf_counter()
+    for record in records:
+        sketches["value"].update(record["value"])
+        sketches["user"].update(record["user"])
+    per_record = (time.perf_counter() - start) / len(records)
+    print(f"per-value sketch updates alone:      {per_record * 1e6:6.1f} us/record")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Compare per-record to_sql writes with the buffered DataStorage write path.
+
+Usage: python -m benchmarks.bench_storage_write [rows]
+"""
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+from sqlalchemy import create_engine
+
+from app.data.storage import DataStorage
+
+
+def make_rows(n: int):
+    return [
+        {"timestamp": f"2024-01-01T00:00:{i % 60:02d}", "value": float(i), "category": f"c{i % 7}"}
+        for i in range(n)
+    ]
+
+
+def bench_per_row(url: str, rows) -> float:
+    engine = create_engine(url)
+    start = time.perf_counter()
+    for row in rows:
+        pd.DataFrame([row]).to_sql("data_bench", engine, if_exists='append', index=False)
+    elapsed = time.perf_counter() - start
+    engine.dispose()
+    return len(rows) / elapsed
+
+
+async def bench_buffered(url: str, rows) -> float:
+    storage = DataStorage(url, batch_size=1000)
+    start = time.perf_counter()
+    for row in rows:
+        await storage.store(row, "bench")
+    await storage.close()
+    elapsed = time.perf_counter() - start
+    return len(rows) / elapsed
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    rows = make_rows(n)
+    with tempfile.TemporaryDirectory() as tmp:
+        before = bench_per_row(f"sqlite:///{Path(tmp) / 'per_row.db'}", rows)
+        after = asyncio.run(bench_buffered(f"sqlite:///{Path(tmp) / 'buffered.db'}", rows))
+    print(f"per-record to_sql: {before:12,.0f} rows/sec")
+    print(f"buffered store:    {after:12,.0f} rows/sec ({after / before:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Subscription registry vs the previous topic -> client set dict.
+
+Usage: python -m benchmarks.bench_subscriptions [clients] [topics]
+"""
+import random
+import sys
+import time
+
+from app.core.subscriptions import SubscriptionRegistry
+
+METRICS = ("anomaly", "window", "trend", "insight", "metric")
+
+
+def make_subscriptions(clients: int, topics: int, per_client: int = 10):
+    rng = random.Random(0)
+    names = [f"source.s{i // len(METRICS)}.{METRICS[i % len(METRICS)]}" for i in range(topics)]
+    subscriptions = []
+    for client in range(clients):
+        client_id = f"client-{client}"
+        subscriptions.extend((client_id, rng.choice(names)) for _ in range(per_client))
+        # One pattern per client, e.g. source.s42.* or source.*.anomaly
+        if client % 2:
+            subscriptions.append((client_id, f"source.s{rng.randrange(topics // len(METRICS))}.*"))
+        else:
+            subscriptions.append((client_id, f"source.*.{rng.choice(METRICS)}"))
+    return names, subscriptions
+
+
+def bench_legacy(names, subscriptions, disconnects):
+    """Exact topics only: the old dict could not match patterns"""
+    index = {}
+    start = time.perf_counter()
+    for client_id, topic in subscriptions:
+        if "*" not in topic:
+            index.setdefault(topic, set()).add(client_id)
+    subscribe = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for topic in names[:1000]:
+        index.get(topic, set())
+    match = (time.perf_counter() - start) / 1000
+
+    start = time.perf_counter()
+    for client_id in disconnects:
+        for clients in index.values():
+            clients.discard(client_id)
+    disconnect = (time.perf_counter() - start) / len(disconnects)
+    return subscribe, match, disconnect
+
+
+def bench_registry(names, subscriptions, disconnects):
+    registry = SubscriptionRegistry()
+    start = time.perf_counter()
+    for client_id, topic in subscriptions:
+        registry.subscribe(client_id, topic)
+    subscribe = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for topic in names[:1000]:
+        registry.match(topic)
+    match = (time.perf_counter() - start) / 1000
+
+    start = time.perf_counter()
+    for client_id in disconnects:
+        registry.remove_client(client_id)
+    disconnect = (time.perf_counter() - start) / len(disconnects)
+    return subscribe, match, disconnect
+
+
+def main():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    topics = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    names, subscriptions = make_subscriptions(clients, topics)
+    disconnects = [f"client-{i}" for i in range(0, clients, max(1, clients // 100))]
+
+    print(f"{clients} clients, {topics} topics, {len(subscriptions)} subscriptions")
+    for name, bench in (("dict (exact only)", bench_legacy), ("registry + patterns", bench_registry)):
+        subscribe, match, disconnect = bench(names, subscriptions, disconnects)
+        print(f"{name:>20}: subscribe all {subscribe * 1000:8.1f} ms, "
+              f"match {match * 1e6:8.1f} us/topic, disconnect {disconnect * 1e6:10.1f} us/client")
+
+
+if __name__ == "__main__":
+    main()
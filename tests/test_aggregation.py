@@ -0,0 +1,110 @@
+import pytest
+import numpy as np
+from app.analytics.aggregation import IncrementalAggregator, RunningStats
+
+@pytest.fixture
+def values():
+    return np.random.default_rng(42).normal(50, 5, 1000)
+
+def test_running_stats_matches_numpy(values):
+    stats = RunningStats()
+    for value in values:
+        stats.update(float(value))
+
+    assert stats.count == 1000
+    assert stats.result("average") == pytest.approx(values.mean())
+    assert stats.result("std") == pytest.approx(values.std())
+    assert stats.result("min") == values.min()
+    assert stats.result("max") == values.max()
+
+def test_merge_partial_stats(values):
+    merged = RunningStats.from_array(values[:300]).merge(RunningStats.from_array(values[300:]))
+
+    assert merged.result("sum") == pytest.approx(values.sum())
+    assert merged.result("variance") == pytest.approx(values.var())
+
+def test_aggregator_merges_worker_snapshots():
+    worker_a, worker_b = IncrementalAggregator(), IncrementalAggregator()
+    worker_a.update("src", [{"value": 1.0, "category": "a"}, {"value": 2.0}])
+    worker_b.update("src", {"value": 6.0})
+
+    combined = IncrementalAggregator()
+    combined.merge(worker_a.snapshot())
+    combined.merge(worker_b)
+
+    results = combined.query("src", "value", ["count", "sum", "average"])
+    assert results == {"count": 3, "sum": 9.0, "average": 3.0}
+    assert combined.get("src", "category") is None
+
+def test_sketches_approximate_exact_answers():
+    from app.analytics.sketches import ColumnSketch
+
+    rng = np.random.default_rng(0)
+    values = rng.lognormal(0, 1, 50000)
+    ids = rng.zipf(1.5, 50000) % 5000
+    sketch = ColumnSketch.from_array(values)
+    categories = ColumnSketch()
+    for value in ids.tolist():
+        categories.update(value)
+
+    for metric, q in ColumnSketch.QUANTILES.items():
+        assert sketch.result(metric) == pytest.approx(np.quantile(values, q), rel=0.05)
+    assert categories.result("distinct_count") == pytest.approx(len(np.unique(ids)), rel=0.05)
+    top, counts = np.unique(ids, return_counts=True)
+    value, count = categories.result("heavy_hitters")[0]
+    assert value == top[counts.argmax()]
+    # Count-Min estimates never undercount
+    assert counts.max() <= count <= counts.max() * 1.01
+
+async def test_aggregator_sketches_merge_and_persist(tmp_path):
+    from app.data.storage import DataStorage
+
+    worker_a, worker_b = IncrementalAggregator(), IncrementalAggregator()
+    worker_a.update("src", [{"value": float(i), "user": f"u{i % 7}"} for i in range(100)])
+    worker_b.update_array("src", "value", np.arange(100, 200, dtype=float))
+
+    storage = DataStorage(f"sqlite:///{tmp_path / 'aggregates.db'}")
+    await worker_a.save(storage)
+    combined = IncrementalAggregator()
+    assert await combined.load(storage) == 2
+    combined.merge(worker_b.snapshot())
+
+    results = combined.query("src", "value", ["count", "p50", "distinct_count"])
+    assert results["count"] == 200
+    assert results["p50"] == pytest.approx(99.5, abs=2)
+    assert results["distinct_count"] == pytest.approx(200, abs=4)
+    assert combined.query("src", "user", ["distinct_count"]) == {"distinct_count": 7}
+
+def test_buffered_sketch_updates_are_visible_to_queries():
+    aggregator = IncrementalAggregator(sketch_batch=64)
+    for i in range(1000):
+        aggregator.update("src", {"value": float(i % 100), "user": f"u{i % 13}"})
+
+    # 1000 is not a multiple of the batch, so the last values are still buffered
+    assert aggregator.query("src", "value", ["count", "distinct_count", "p50"]) == pytest.approx(
+        {"count": 1000, "distinct_count": 100, "p50": 49.5}, abs=2)
+    assert aggregator.query("src", "user", ["distinct_count"]) == {"distinct_count": 13}
+    assert not aggregator._pending
+
+async def test_snapshots_are_kept_per_worker_and_restored_once(tmp_path):
+    from app.data.storage import DataStorage
+
+    storage = DataStorage(f"sqlite:///{tmp_path / 'aggregates.db'}")
+    worker_a, worker_b = IncrementalAggregator(worker_id="a"), IncrementalAggregator(worker_id="b")
+    worker_a.update("src", {"value": 1.0})
+    await worker_a.save(storage)
+    worker_a.update("src", {"value": 2.0})
+    await worker_a.save(storage)
+    worker_b.update("src", {"value": 4.0})
+    await worker_b.save(storage)
+
+    # The first snapshot of worker a was superseded by its second
+    saved = await storage.query("SELECT worker, COUNT(*) AS rows FROM data_aggregates GROUP BY worker")
+    assert dict(zip(saved["worker"], saved["rows"])) == {"a": 1, "b": 1}
+
+    restarted, late = IncrementalAggregator(), IncrementalAggregator()
+    assert await restarted.load(storage) == 2
+    assert restarted.query("src", "value", ["count", "sum"]) == {"count": 3, "sum": 7.0}
+    # Every snapshot is restored by one worker only
+    assert await late.load(storage) == 0
+    await storage.close()
@@ -0,0 +1,112 @@
+import asyncio
+import pytest
+from aiohttp import web
+from app.ai.client import AIClient
+from app.ai.claude_connector import ClaudeConnector
+from app.core.mcp_server import MCPServer
+from app.models.schema import AIModelConfig
+
+def message(text):
+    return {
+        "id": "msg_test",
+        "type": "message",
+        "role": "assistant",
+        "model": "claude-test",
+        "content": [{"type": "text", "text": text}],
+        "stop_reason": "end_turn",
+        "stop_sequence": None,
+        "usage": {"input_tokens": 10, "output_tokens": 5},
+    }
+
+@pytest.fixture
+async def mock_api():
+    """Local stand-in for the Messages API"""
+    state = {"requests": [], "rate_limited": 0, "active": 0, "peak": 0, "delay": 0.0}
+
+    async def handler(request):
+        body = await request.json()
+        state["requests"].append(body)
+        if state["rate_limited"]:
+            state["rate_limited"] -= 1
+            return web.json_response({"type": "error", "error": {"type": "rate_limit_error",
+                                                                  "message": "slow down"}},
+                                     status=429, headers={"retry-after": "0"})
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        try:
+            await asyncio.sleep(state["delay"])
+        finally:
+            state["active"] -= 1
+        return web.json_response(message(f"answer to: {body['messages'][-1]['content'][:20]}"))
+
+    app = web.Application()
+    app.router.add_post("/v1/messages", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    state["url"] = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+    yield state
+    await runner.cleanup()
+
+@pytest.fixture
+async def ai_client(mock_api):
+    client = AIClient(api_key="test", base_url=mock_api["url"], max_concurrency=2,
+                      timeout=5, max_retries=3, backoff=0.01)
+    yield client
+    await client.close()
+
+async def test_connector_sends_configured_request(mock_api, ai_client):
+    ai_config = AIModelConfig(model_name="claude-test", api_key="test", max_tokens=300)
+    connector = ClaudeConnector(ai_client=ai_client, ai_config=ai_config)
+
+    result = await connector.process_query("how many orders today?")
+
+    assert result["response"].startswith("answer to:")
+    request = mock_api["requests"][0]
+    assert request["model"] == "claude-test"
+    assert request["max_tokens"] == 300
+    assert "system" in request
+    assert [m["role"] for m in request["messages"]] == ["user"]
+
+async def test_concurrency_is_bounded(mock_api, ai_client):
+    mock_api["delay"] = 0.05
+
+    await asyncio.gather(*(ai_client.create_message(model="claude-test", max_tokens=10,
+                                                    messages=[{"role": "user", "content": str(i)}])
+                           for i in range(6)))
+
+    stats = ai_client.get_stats()
+    assert mock_api["peak"] == 2
+    assert stats["requests"] == 6
+    assert stats["in_flight"] == 0 and stats["waiting"] == 0
+    assert stats["queue_wait"]["max_ms"] >= 40
+
+async def test_rate_limits_are_retried(mock_api, ai_client):
+    mock_api["rate_limited"] = 2
+
+    response = await ai_client.create_message(model="claude-test", max_tokens=10,
+                                              messages=[{"role": "user", "content": "hi"}])
+
+    assert response.content[0].text == "answer to: hi"
+    assert ai_client.get_stats()["retries"] == 2
+
+async def test_retries_are_bounded(mock_api, ai_client):
+    mock_api["rate_limited"] = 10
+
+    with pytest.raises(Exception):
+        await ai_client.create_message(model="claude-test", max_tokens=10,
+                                       messages=[{"role": "user", "content": "hi"}])
+
+    assert len(mock_api["requests"]) == 4
+    assert ai_client.get_stats()["errors"] == 1
+
+async def test_query_data_tool_answers_through_claude(mock_api, ai_client):
+    connector = ClaudeConnector(ai_client=ai_client, ai_config=AIModelConfig(model_name="claude-test", api_key="test"))
+    server = MCPServer(ai_client=ai_client)
+    await server.initialize(data_processor=object(), analytics_engine=object(), claude_connector=connector)
+
+    result = await server.handle_tool_call("query_data", {"query": "orders by region", "limit": 5}, "rest-api")
+
+    assert result["response"].startswith("answer to:")
+    assert "orders by region" in mock_api["requests"][0]["messages"][0]["content"]
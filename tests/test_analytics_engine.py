@@ -1,3 +1,4 @@
+from datetime import datetime
 import pytest
 import pandas as pd
 import numpy as np
@@ -31,4 +32,33 @@ async def test_generate_insights(analytics_engine, sample_data):
     insights = await analytics_engine.generate_insights(sample_data['value'])
     assert len(insights) > 0
     assert 'type' in insights[0]
-    assert 'description' in insights[0]
\ No newline at end of file
+    assert 'description' in insights[0]
+
+async def test_analyze_history_over_columnar_chunks(tmp_path):
+    from app.data.columnar import ColumnarStorage
+    from app.data.storage import DataStorage
+    from app.models.schema import DataSource, StorageBackend
+
+    columnar = ColumnarStorage(str(tmp_path), file_format="arrow", batch_size=10,
+                               compaction_interval=None)
+    engine = AnalyticsEngine(storage=DataStorage(f"sqlite:///{tmp_path / 'test.db'}"),
+                             columnar_storage=columnar)
+    source = DataSource(name="src", type="stream", config={}, schema={},
+                        storage=StorageBackend.COLUMNAR)
+    values = np.arange(100, dtype=float)
+    await columnar.store([
+        {"timestamp": ts.isoformat(), "value": value}
+        for ts, value in zip(pd.date_range("2024-01-01", periods=100, freq="min"), values)
+    ], "src")
+
+    results = await engine.analyze_history(source, "value", ["count", "average", "std", "max"])
+    assert results["count"] == 100
+    assert results["average"] == pytest.approx(values.mean())
+    assert results["std"] == pytest.approx(values.std())
+    assert results["max"] == 99.0
+
+    # A range with no stored data has no min or max
+    empty = await engine.analyze_history(source, "value", ["count", "average", "min", "max", "p50"],
+                                         start=datetime(2025, 1, 1))
+    assert empty == {"count": 0, "average": None, "min": None, "max": None, "p50": None}
+    await columnar.close()
@@ -0,0 +1,52 @@
+import json
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from app.config import config
+from app.models.schema import DataSource
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    database = config.get_config().database
+    monkeypatch.setattr(database, "url", f"sqlite:///{tmp_path / 'app.db'}")
+    monkeypatch.setattr(database, "columnar_path", str(tmp_path / "columnar"))
+    from app.main import app
+    with TestClient(app) as client:
+        yield client
+
+def test_metrics_endpoints_are_served(client):
+    for name in ("storage", "ingestion", "clients", "ai"):
+        response = client.get(f"/api/v1/metrics/{name}")
+        assert response.status_code == 200, name
+        assert isinstance(response.json(), dict)
+
+def test_failed_start_surfaces_the_original_error(tmp_path, monkeypatch):
+    import app.main as main
+    from app.core.backplane import LocalBackplane
+
+    class BrokenBackplane(LocalBackplane):
+        async def start(self):
+            raise RuntimeError("backplane unreachable")
+
+    monkeypatch.setattr(main, "create_backplane", lambda url: BrokenBackplane())
+    with pytest.raises(RuntimeError, match="backplane unreachable"):
+        with TestClient(main.app):
+            pass
+
+def test_websocket_tool_calls(client, monkeypatch):
+    monkeypatch.setitem(config.get_config().data_sources, "events",
+                        DataSource(name="events", type="batch", config={}, schema={"value": "float"}))
+
+    async def load_data(source, columns=None, start=None, end=None):
+        return pd.DataFrame({"value": [1.0, 2.0, 3.0], "region": ["eu", "us", "eu"]})
+
+    monkeypatch.setattr(client.app.state.analytics_engine, "load_data", load_data)
+    with client.websocket_connect("/api/v1/ws") as websocket:
+        websocket.send_text(json.dumps({"type": "tool_call", "tool": "analyze_data",
+                                        "parameters": {"data_source": "events",
+                                                       "metrics": ["count", "average"]}}))
+        assert websocket.receive_json() == {"data_source": "events",
+                                            "results": {"value": {"count": 3, "average": 2.0}}}
+
+        websocket.send_text(json.dumps({"type": "tool_call", "tool": "unknown", "parameters": {}}))
+        assert websocket.receive_json() == {"error": "Unsupported tool: unknown"}
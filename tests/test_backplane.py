@@ -0,0 +1,175 @@
+import asyncio
+import pytest
+from app.analytics.insights import InsightGenerator
+from app.core.backplane import LocalBackplane, LocalHub
+from app.core.client_manager import ClientManager
+from tests.test_client_manager import FakeWebSocket
+
+@pytest.fixture
+async def workers():
+    """Two workers connected through one in-process hub"""
+    hub = LocalHub()
+    backplanes = [LocalBackplane(hub), LocalBackplane(hub)]
+    managers = []
+    for backplane in backplanes:
+        await backplane.start()
+        manager = ClientManager(backplane=backplane)
+        await manager.start()
+        managers.append(manager)
+    yield managers
+    for manager, backplane in zip(managers, backplanes):
+        await manager.close()
+        await backplane.close()
+
+async def settle(managers):
+    for manager in managers:
+        await manager.backplane.join()
+    for manager in managers:
+        await manager.join()
+
+async def test_broadcast_reaches_clients_on_every_worker_once(workers):
+    a, b = workers
+    on_a, on_b = FakeWebSocket(), FakeWebSocket()
+    await a.subscribe(await a.connect(on_a, "client-a"), "source.*.anomaly")
+    await b.subscribe(await b.connect(on_b, "client-b"), "source.orders.anomaly")
+
+    assert await b.broadcast({"type": "anomaly"}, topic="source.orders.anomaly") == 1
+    await a.broadcast({"type": "window"}, topic="source.orders.window")
+    await settle(workers)
+
+    assert on_a.received == ['{"type":"anomaly"}']
+    assert on_b.received == ['{"type":"anomaly"}']
+
+async def test_direct_message_is_relayed_to_the_owning_worker(workers):
+    a, b = workers
+    client = FakeWebSocket()
+    await a.connect(client, "client-a")
+
+    assert await b.send_message("client-a", {"type": "reply"})
+    assert not await b.send_message("unknown", {"type": "reply"})
+    await settle(workers)
+    assert client.received == ['{"type":"reply"}']
+
+    await a.disconnect("client-a")
+    assert not await b.send_message("client-a", {"type": "reply"})
+
+async def test_metric_history_is_shared_between_workers():
+    hub = LocalHub()
+    backplanes = [LocalBackplane(hub), LocalBackplane(hub)]
+    generators = []
+    for backplane in backplanes:
+        await backplane.start()
+        generator = InsightGenerator(backplane=backplane)
+        await generator.start()
+        generators.append(generator)
+
+    for value in range(10):
+        await generators[value % 2].generate_insights({"value": float(value)})
+    for backplane in backplanes:
+        await backplane.join()
+
+    assert [len(generator.metrics_history["value"]) for generator in generators] == [10, 10]
+    for backplane in backplanes:
+        await backplane.close()
+
+async def test_each_source_is_ingested_by_one_worker(tmp_path):
+    from app.analytics.windows import WindowAggregator
+    from app.data.processors import DataProcessor
+    from app.data.storage import DataStorage
+    from app.data.supervisor import IngestionSupervisor
+    from app.models.schema import DataSource, SourceType
+
+    hub = LocalHub()
+    storage = DataStorage(f"sqlite:///{tmp_path / 'shared.db'}")
+    source = DataSource(name="events", type=SourceType.STREAM, config={"read_batch_size": 10},
+                        schema={"timestamp": "datetime", "value": "float"})
+    workers = []
+    for _ in range(2):
+        backplane = LocalBackplane(hub)
+        await backplane.start()
+        manager = ClientManager(backplane=backplane)
+        await manager.start()
+        windows = WindowAggregator(size=60, allowed_lateness=0, client_manager=manager)
+        processor = DataProcessor(storage=storage, window_aggregator=windows)
+        supervisor = IngestionSupervisor(processor=processor, backplane=backplane)
+        await supervisor.start({"events": source})
+        workers.append((backplane, manager, supervisor))
+
+    owners = [supervisor for _, _, supervisor in workers if "events" in supervisor.pipelines]
+    assert len(owners) == 1
+    subscriber = FakeWebSocket()
+    other_manager = workers[1][1]
+    await other_manager.subscribe(await other_manager.connect(subscriber, "client"), "source.events.window")
+
+    adapter = owners[0].ingestion.adapters["events"]
+    for minute in range(3):
+        await adapter.put({"timestamp": f"2024-01-01T00:0{minute}:30", "value": 1.0})
+    await adapter.disconnect()
+    await asyncio.wait_for(owners[0].wait(), 5)
+    await settle([manager for _, manager, _ in workers])
+
+    assert len(await storage.scan("events")) == 3
+    # Two windows closed, each delivered once
+    assert len(subscriber.received) == 2
+    for backplane, manager, supervisor in workers:
+        await supervisor.stop()
+        await manager.close()
+        await backplane.close()
+    assert hub.hashes["insightflow:source_leases"] == {}
+    await storage.close()
+
+async def test_orphaned_source_is_taken_over():
+    from app.data.processors import DataProcessor
+    from app.data.supervisor import IngestionSupervisor
+    from app.models.schema import DataSource, SourceType
+
+    hub = LocalHub()
+    source = DataSource(name="events", type=SourceType.STREAM, config={}, schema={"value": "float"})
+    supervisors = []
+    for _ in range(2):
+        backplane = LocalBackplane(hub)
+        await backplane.start()
+        supervisor = IngestionSupervisor(processor=DataProcessor(storage=object()), backplane=backplane,
+                                         lease_seconds=0.3)
+        await supervisor.start({"events": source})
+        supervisors.append(supervisor)
+    first, second = supervisors
+    assert "events" in first.pipelines and "events" not in second.pipelines
+
+    await first.stop()
+    await asyncio.sleep(0.3)
+    assert "events" in second.pipelines
+    await second.stop()
+
+async def test_failed_source_releases_its_lease():
+    from app.data.processors import DataProcessor
+    from app.data.supervisor import LEASES_KEY, IngestionSupervisor
+    from app.models.schema import DataSource, SourceType
+
+    hub = LocalHub()
+    source = DataSource(name="events", type=SourceType.STREAM, config={"max_restarts": 0},
+                        schema={"value": "float"})
+    supervisors = []
+    for _ in range(2):
+        backplane = LocalBackplane(hub)
+        await backplane.start()
+        supervisor = IngestionSupervisor(processor=DataProcessor(storage=object()), backplane=backplane,
+                                         lease_seconds=0.3)
+        await supervisor.start({"events": source})
+        supervisors.append(supervisor)
+    owner = next(supervisor for supervisor in supervisors if "events" in supervisor.pipelines)
+    failed = owner.pipelines["events"]
+
+    # Reads fail and the pipeline gives up without restarting
+    owner.ingestion.adapters["events"].connected = False
+    await asyncio.wait_for(failed.wait(), 5)
+    assert failed.state == "failed"
+
+    await asyncio.sleep(0.3)
+    running = [supervisor for supervisor in supervisors if "events" in supervisor.pipelines]
+    assert len(running) == 1
+    assert running[0].pipelines["events"] is not failed
+    assert running[0].pipelines["events"].state == "running"
+    assert hub.hashes[LEASES_KEY]["events"].startswith(running[0].backplane.worker_id)
+    for supervisor in supervisors:
+        await supervisor.stop()
@@ -0,0 +1,62 @@
+import asyncio
+import pandas as pd
+import pytest
+from app.data.ingestion import BatchAdapter
+from app.data.processors import DataProcessor
+from app.data.storage import DataStorage
+from app.data.supervisor import IngestionSupervisor
+from app.models.schema import DataSource, SourceType
+
+ROWS = 2500
+
+@pytest.fixture
+def batch_dir(tmp_path):
+    df = pd.DataFrame({
+        "timestamp": pd.date_range("2024-01-01", periods=ROWS, freq="s").strftime("%Y-%m-%dT%H:%M:%S"),
+        "value": [float(i) for i in range(ROWS)],
+        "region": [f"r{i % 3}" for i in range(ROWS)],
+    })
+    df.to_csv(tmp_path / "events.csv", index=False)
+    df.to_json(tmp_path / "events.ndjson", orient="records", lines=True)
+    df.to_parquet(tmp_path / "events.parquet", row_group_size=700)
+    df.to_json(tmp_path / "events.json", orient="records")
+    df.to_json(tmp_path / "lines.json", orient="records", lines=True)
+    return tmp_path
+
+async def read_all(adapter: BatchAdapter):
+    await adapter.connect()
+    chunks = []
+    while len(chunk := await adapter.read_many(100)):
+        chunks.append(chunk)
+    await adapter.disconnect()
+    return chunks
+
+@pytest.mark.parametrize("file_name", ["events.csv", "events.ndjson", "events.parquet", "events.json",
+                                       "lines.json"])
+@pytest.mark.parametrize("parse_workers", [0, 2])
+async def test_batch_adapter_reads_files_in_chunks(batch_dir, file_name, parse_workers):
+    adapter = BatchAdapter({"path": str(batch_dir / file_name), "chunk_size": 1000,
+                            "chunk_bytes": 20000, "parse_workers": parse_workers})
+    chunks = await read_all(adapter)
+
+    assert len(chunks) > 1
+    assert max(len(chunk) for chunk in chunks) < ROWS
+    values = pd.concat(chunks)["value"].tolist()
+    assert values == [float(i) for i in range(ROWS)]
+    assert adapter.get_stats() == {"files": 1, "chunks": len(chunks), "rows": ROWS}
+
+async def test_batch_source_feeds_processor_chunks(batch_dir, tmp_path):
+    storage = DataStorage(f"sqlite:///{tmp_path / 'batch.db'}")
+    processor = DataProcessor(storage=storage)
+    supervisor = IngestionSupervisor(processor=processor)
+    source = DataSource(name="events", type=SourceType.BATCH,
+                        config={"path": str(batch_dir), "pattern": "*.csv", "chunk_size": 1000},
+                        schema={"timestamp": "datetime", "value": "float", "region": "string"})
+    await supervisor.add_source(source)
+    await asyncio.wait_for(supervisor.wait(), 10)
+
+    stages = supervisor.get_stats()["events"]["stages"]
+    assert (stages["ingest"]["batches"], stages["store"]["records"]) == (3, ROWS)
+    assert processor.aggregator.query("events", "value", ["count"]) == {"count": ROWS}
+    await supervisor.stop()
+    await storage.close()
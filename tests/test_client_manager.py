@@ -0,0 +1,118 @@
+import asyncio
+import pytest
+from app.core.client_manager import ClientManager, SlowConsumerPolicy
+
+class FakeWebSocket:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.received = []
+        self.closed = False
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, payload: str):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.received.append(payload)
+
+    async def close(self, code: int = 1000):
+        self.closed = True
+
+async def connect_clients(manager: ClientManager, count: int, delay: float = 0.0):
+    clients = [FakeWebSocket(delay) for _ in range(count)]
+    for client in clients:
+        client.id = await manager.connect(client)
+    return clients
+
+async def test_broadcast_encodes_once_and_fans_out_concurrently():
+    manager = ClientManager(send_timeout=1.0)
+    clients = await connect_clients(manager, 300, delay=0.01)
+
+    for value in range(5):
+        assert await manager.broadcast({"type": "window", "value": value}) == 300
+    # Broadcast only enqueues, without waiting on any socket
+    assert not any(client.received for client in clients)
+    assert all(connection.queue.qsize() == 5 for connection in manager.connections.values())
+    # 300 clients x 5 sends of 10 ms run in parallel
+    await asyncio.wait_for(manager.join(), 2)
+
+    assert all(len(client.received) == 5 for client in clients)
+    # Every client was sent the same encoded string
+    assert all(client.received[0] is clients[0].received[0] for client in clients)
+    stats = manager.get_stats()
+    assert (stats["sent"], stats["dropped"], stats["evicted"]) == (1500, 0, 0)
+    assert stats["fanout_latency"]["count"] == 5
+    assert stats["delivery_latency"]["count"] == 1500
+    await manager.close()
+
+async def test_slow_client_is_evicted_without_stalling_others():
+    manager = ClientManager(send_timeout=0.05, slow_consumer_policy=SlowConsumerPolicy.EVICT)
+    clients = await connect_clients(manager, 200)
+    slow = FakeWebSocket(delay=10)
+    slow_id = await manager.connect(slow, "slow")
+    await manager.subscribe(slow_id, "source.events.window")
+
+    await manager.broadcast({"type": "window"})
+    await asyncio.wait_for(manager.join(), 1)
+    await asyncio.sleep(0.1)
+
+    assert all(len(client.received) == 1 for client in clients)
+    assert slow.closed and slow_id not in manager.active_clients
+    assert manager.subscriptions.topics(slow_id) == set()
+    stats = manager.get_stats()
+    assert (stats["evicted"], stats["send_timeouts"], stats["clients"]) == (1, 1, 200)
+    await manager.close()
+
+async def test_eviction_does_not_wait_for_the_socket_to_close():
+    class HangingWebSocket(FakeWebSocket):
+        async def close(self, code: int = 1000):
+            await asyncio.Event().wait()
+
+    manager = ClientManager(queue_size=1, send_timeout=5.0, slow_consumer_policy=SlowConsumerPolicy.EVICT)
+    hanging = HangingWebSocket(delay=10)
+    client_id = await manager.connect(hanging)
+    await manager.broadcast({"value": 1})
+    await asyncio.sleep(0.01)
+    # The writer is stuck sending the first message; the second fills the queue
+    await manager.broadcast({"value": 2})
+
+    # so this broadcast evicts the client, without waiting up to
+    # send_timeout for its socket to close
+    assert await asyncio.wait_for(manager.broadcast({"value": 3}), 0.5) == 0
+    assert client_id not in manager.active_clients
+    assert manager.get_stats()["evicted"] == 1
+    await manager.close()
+
+@pytest.mark.parametrize("policy,kept", [
+    (SlowConsumerPolicy.DROP_OLDEST, [0, 4, 5]),
+    (SlowConsumerPolicy.DROP_NEWEST, [0, 1, 2]),
+])
+async def test_full_queue_degrades_by_policy(policy, kept):
+    manager = ClientManager(queue_size=2, slow_consumer_policy=policy)
+    client = FakeWebSocket(delay=0.05)
+    await manager.connect(client)
+    await manager.broadcast({"value": 0})
+    # Let the writer take the first message so the queue holds the rest
+    await asyncio.sleep(0.01)
+    for value in range(1, 6):
+        await manager.broadcast({"value": value})
+    await asyncio.wait_for(manager.join(), 1)
+
+    assert [int(payload.split(":")[1][:-1]) for payload in client.received] == kept
+    assert manager.get_stats()["dropped"] == 3
+    await manager.close()
+
+async def test_topic_broadcast_reaches_pattern_subscribers():
+    manager = ClientManager()
+    exact, pattern, other = await connect_clients(manager, 3)
+    await manager.subscribe(exact.id, "source.orders.anomaly")
+    await manager.subscribe(pattern.id, "source.*.anomaly")
+    await manager.subscribe(other.id, "source.orders.window")
+
+    assert await manager.broadcast({"type": "anomaly"}, topic="source.orders.anomaly") == 2
+    assert await manager.broadcast({"type": "anomaly"}, topic="source.users.anomaly") == 1
+    assert await manager.send_message(other.id, {"type": "reply"})
+    await asyncio.wait_for(manager.join(), 1)
+    assert [len(client.received) for client in (exact, pattern, other)] == [1, 2, 1]
+    await manager.close()
@@ -0,0 +1,54 @@
+import pytest
+from datetime import datetime
+from app.data.columnar import ColumnarStorage
+
+@pytest.fixture
+def storage(tmp_path):
+    return ColumnarStorage(str(tmp_path), partition_interval="hour", batch_size=2,
+                           flush_interval=60, compaction_interval=None, compaction_min_files=2)
+
+@pytest.fixture
+def sample_rows():
+    return [
+        {"timestamp": f"2024-01-01T{hour:02d}:30:00", "value": float(hour), "category": "a"}
+        for hour in range(4)
+    ]
+
+async def test_store_writes_hourly_partitions(storage, sample_rows, tmp_path):
+    await storage.store(sample_rows, "src")
+    await storage.flush()
+
+    partitions = sorted(path.name for path in (tmp_path / "src").iterdir())
+    assert partitions == [f"ts=2024-01-01T{hour:02d}" for hour in range(4)]
+    await storage.close()
+
+async def test_scan_prunes_and_projects(storage, sample_rows):
+    await storage.store(sample_rows, "src")
+
+    df = await storage.scan("src", columns=["value"],
+                            start=datetime(2024, 1, 1, 1), end=datetime(2024, 1, 1, 2, 45))
+    assert list(df.columns) == ["value"]
+    assert df["value"].tolist() == [1.0, 2.0]
+    await storage.close()
+
+async def test_compact_merges_partition_files(storage, sample_rows, tmp_path):
+    for row in sample_rows[:1] * 3:
+        await storage.store(row, "src")
+    await storage.flush()
+    partition = tmp_path / "src" / "ts=2024-01-01T00"
+    assert len(list(partition.glob("*.parquet"))) == 2
+
+    assert await storage.compact("src") == 2
+    assert len(list(partition.glob("*.parquet"))) == 1
+    assert len(await storage.scan("src")) == 3
+    await storage.close()
+
+async def test_scan_arrays_returns_memory_mapped_views(tmp_path, sample_rows):
+    storage = ColumnarStorage(str(tmp_path), file_format="arrow", batch_size=100,
+                              compaction_interval=None)
+    await storage.store(sample_rows, "src")
+
+    chunks = await storage.scan_arrays("src", ["value"], start=datetime(2024, 1, 1, 2, 45))
+    assert [chunk["value"].tolist() for chunk in chunks] == [[3.0]]
+    assert not chunks[0]["value"].flags.owndata
+    await storage.close()
@@ -34,4 +34,47 @@ async def test_invalid_data(data_processor, sample_source):
     }
     
     with pytest.raises(ValueError):
-        await data_processor.process_data(invalid_data, sample_source)
\ No newline at end of file
+        await data_processor.process_data(invalid_data, sample_source)
+
+async def test_process_data_updates_aggregates(data_processor, sample_source):
+    for value in (1.0, 2.0, 3.0):
+        await data_processor.process_data({"timestamp": "2024-01-01T00:00:00", "value": value}, sample_source)
+
+    results = data_processor.aggregator.query("test_source", "value", ["count", "average"])
+    assert results == {"count": 3, "average": 2.0}
+
+async def test_batch_rejects_invalid_rows(tmp_path):
+    from app.data.storage import DataStorage
+
+    storage = DataStorage(f"sqlite:///{tmp_path / 'batch.db'}")
+    processor = DataProcessor(storage=storage)
+    source = DataSource(name="orders", type=SourceType.BATCH, config={},
+                        schema={"timestamp": "datetime", "value": "float", "region": "string"})
+    batch = [
+        {"timestamp": "2024-01-01T00:00:00", "value": 1.5, "region": "eu"},
+        {"timestamp": "2024-01-01T00:01:00", "value": "2", "region": "us"},
+        {"timestamp": "not a date", "value": "abc", "region": "eu"},
+        {"timestamp": "2024-01-01T00:03:00", "region": "us"},
+    ]
+
+    processed = await processor.process_data(batch, source)
+    assert processed["value"].tolist() == [1.5, 2.0]
+    assert str(processed["timestamp"].dtype) == "datetime64[ns]"
+    assert processor.reject_counts == {"orders": 2}
+
+    stored = await storage.scan("orders")
+    assert stored["value"].tolist() == [1.5, 2.0]
+    rejects = await storage.get_latest("orders_rejects")
+    assert sorted(rejects["reason"]) == [
+        "Invalid datetime for field: timestamp; Invalid float for field: value",
+        "Missing required field: value",
+    ]
+    assert processor.aggregator.query("orders", "value", ["sum"]) == {"sum": 3.5}
+    await storage.close()
+
+async def test_numeric_strings_are_coerced_before_aggregation(data_processor, sample_source):
+    processed = await data_processor.process_data({"timestamp": "2024-01-01T00:00:00", "value": "2.5"},
+                                                  sample_source)
+
+    assert processed["value"] == 2.5
+    assert data_processor.aggregator.query("test_source", "value", ["count", "sum"]) == {"count": 1, "sum": 2.5}
@@ -0,0 +1,185 @@
+import asyncio
+import time
+import pytest
+from app.data.ingestion import (DataIngestion, DataSource, FileTailAdapter, StreamAdapter,
+                                WebSocketAdapter, create_stream_adapter, decode_frame)
+
+@pytest.fixture
+def stream_source():
+    return DataSource(name="events", type="stream", config={"queue_size": 10},
+                      schema={"value": "float"})
+
+async def test_read_many_drains_without_waiting():
+    adapter = StreamAdapter({"queue_size": 10})
+    await adapter.connect()
+    for value in range(5):
+        await adapter.put({"value": value})
+
+    assert [record["value"] for record in await adapter.read_many(3)] == [0, 1, 2]
+    assert len(await adapter.read_many(10)) == 2
+    assert await adapter.read(timeout=0.01) is None
+
+@pytest.mark.parametrize("policy,kept", [("drop_newest", [0, 1]), ("drop_oldest", [3, 4])])
+async def test_drop_policies_count_dropped_records(policy, kept):
+    adapter = StreamAdapter({"queue_size": 2, "drop_policy": policy})
+    await adapter.connect()
+    for value in range(5):
+        await adapter.put({"value": value})
+
+    assert adapter.get_stats()["dropped"] == 3
+    assert adapter.get_stats()["depth"] == 2
+    assert [record["value"] for record in await adapter.read_many(5)] == kept
+
+async def test_drop_oldest_keeps_the_disconnect_marker():
+    adapter = StreamAdapter({"queue_size": 2, "drop_policy": "drop_oldest"})
+    await adapter.connect()
+    await adapter.put({"value": 0})
+    await adapter.disconnect()
+    assert not await adapter.put({"value": 1})
+
+    # A reconnected stream evicts records, never the marker left before them
+    await adapter.connect()
+    await adapter.put({"value": 2})
+    await adapter.put({"value": 3})
+    assert adapter.get_stats()["dropped"] == 2
+    assert await adapter.read_many(5) == []
+    assert [record["value"] for record in await adapter.read_many(5)] == [3]
+
+async def test_blocking_policy_applies_backpressure():
+    adapter = StreamAdapter({"queue_size": 1})
+    await adapter.connect()
+    await adapter.put({"value": 1})
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(adapter.put({"value": 2}), 0.01)
+    assert adapter.get_stats()["dropped"] == 0
+
+async def test_start_streaming_ingests_without_polling_delay(stream_source):
+    ingestion = DataIngestion()
+    await ingestion.register_source(stream_source)
+    adapter = ingestion.adapters["events"]
+
+    async def produce():
+        # The queue holds 10 records, so the producer waits on the reader
+        for value in range(200):
+            await adapter.put({"value": float(value)})
+        await adapter.disconnect()
+
+    start = time.perf_counter()
+    await asyncio.wait_for(asyncio.gather(produce(), ingestion.start_streaming("events")), 1)
+    assert time.perf_counter() - start < 0.5
+    stats = adapter.get_stats()
+    assert (stats["received"], stats["depth"], stats["dropped"]) == (200, 0, 0)
+
+async def test_start_streaming_reads_batch_source_to_exhaustion(tmp_path):
+    rows = "\n".join(f"2024-01-01T00:00:{i:02d},{i}.5" for i in range(25))
+    (tmp_path / "events.csv").write_text("timestamp,value\n" + rows + "\n")
+    ingestion = DataIngestion()
+    await ingestion.register_source(DataSource(name="events", type="batch",
+                                               config={"path": str(tmp_path / "events.csv"), "chunk_size": 10},
+                                               schema={"value": "float"}))
+    ingestion.set_rate_limit("events", rate=1000, burst=1000)
+
+    await asyncio.wait_for(ingestion.start_streaming("events"), 5)
+
+    # Every chunk was ingested record by record
+    assert ingestion.get_rate_limit_stats()["events"]["acquired"] == 25
+    assert ingestion.adapters["events"].get_stats()["chunks"] == 3
+    await ingestion.cleanup()
+
+async def test_token_bucket_allows_bursts_and_charges_batches(stream_source):
+    ingestion = DataIngestion()
+    await ingestion.register_source(stream_source)
+    ingestion.set_rate_limit("events", rate=100, burst=50)
+
+    start = time.perf_counter()
+    for value in range(50):
+        await ingestion.ingest_data("events", {"value": float(value)})
+    assert time.perf_counter() - start < 0.1
+    assert ingestion.get_rate_limit_stats()["events"]["throttled"] == 0
+
+    # The bucket is empty, so a batch of 5 waits about 5 / 100 seconds
+    start = time.perf_counter()
+    result = await ingestion.ingest_data("events", [{"value": 1.0}] * 5)
+    assert 0.03 < time.perf_counter() - start < 0.5
+    assert len(result["data"]) == 5
+    stats = ingestion.get_rate_limit_stats()["events"]
+    assert (stats["acquired"], stats["throttled"], stats["capacity"]) == (55, 1, 50)
+
+def test_decode_frame_accepts_records_arrays_and_ndjson():
+    assert decode_frame('{"value": 1}') == [{"value": 1}]
+    assert decode_frame(b'[{"value": 1}, {"value": 2}]') == [{"value": 1}, {"value": 2}]
+    assert decode_frame('{"value": 1}\n{"value": 2}\n') == [{"value": 1}, {"value": 2}]
+    with pytest.raises(ValueError):
+        decode_frame("[1, 2]")
+
+async def test_websocket_adapter_decodes_batches_and_reconnects():
+    from aiohttp import web
+
+    connections = []
+
+    async def handler(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        connections.append(request.headers.get("Authorization"))
+        if len(connections) == 1:
+            await ws.send_str('[{"value": 1}, {"value": 2}, {"value": 3}]')
+            await ws.send_str("not json")
+            await ws.send_str('{"value": 4}\n{"value": 5}')
+        else:
+            await ws.send_str('{"value": 6}')
+        # Closing the connection makes the adapter reconnect
+        await ws.close()
+        return ws
+
+    app = web.Application()
+    app.router.add_get("/stream", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    adapter = create_stream_adapter({"url": f"ws://127.0.0.1:{port}/stream",
+                                     "auth_token": "secret", "reconnect_delay": 0.01})
+    assert isinstance(adapter, WebSocketAdapter)
+    await adapter.connect()
+    values = []
+    while len(values) < 6:
+        values += [record["value"] for record in await adapter.read_many(10, timeout=2)]
+    await adapter.disconnect()
+    await runner.cleanup()
+
+    assert values == [1, 2, 3, 4, 5, 6]
+    stats = adapter.get_stats()
+    assert stats["decode_errors"] == 1
+    assert stats["connects"] >= 2
+    assert connections[0] == "Bearer secret"
+
+async def test_file_tail_adapter_replays_ndjson(tmp_path):
+    path = tmp_path / "capture.ndjson"
+    path.write_text('{"value": 1}\n{"value": 2}\nnot json\n\n{"value": 3}')
+    source = DataSource(name="replay", type="stream", schema={"value": "float"},
+                        config={"path": str(path), "chunk_size": 8})
+    ingestion = DataIngestion()
+    await ingestion.register_source(source)
+
+    records = []
+    while batch := await ingestion.read("replay", 10, timeout=1):
+        records += batch
+    assert [record["value"] for record in records] == [1, 2, 3]
+    assert ingestion.adapters["replay"].get_stats()["decode_errors"] == 1
+
+async def test_file_tail_adapter_follows_appended_lines(tmp_path):
+    path = tmp_path / "live.ndjson"
+    path.write_text('{"value": 1}\n')
+    adapter = FileTailAdapter({"path": str(path), "follow": True, "poll_interval": 0.01})
+    await adapter.connect()
+    assert (await adapter.read(timeout=1))["value"] == 1
+
+    with open(path, "a") as f:
+        f.write('{"value": 2}\n{"val')
+    assert (await adapter.read(timeout=1))["value"] == 2
+    with open(path, "a") as f:
+        f.write('ue": 3}\n')
+    assert (await adapter.read(timeout=1))["value"] == 3
+    await adapter.disconnect()
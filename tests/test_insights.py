@@ -0,0 +1,106 @@
+import pytest
+import numpy as np
+from app.analytics.insights import InsightGenerator
+from app.analytics.rolling import RollingMatrix, RollingWindow
+
+@pytest.fixture
+def insight_generator():
+    return InsightGenerator(default_window_size=50)
+
+def test_rolling_window_matches_numpy_after_wraparound():
+    values = np.random.default_rng(1).normal(1e6, 3, 130)
+    window = RollingWindow(50)
+    for value in values:
+        window.append(float(value))
+
+    assert len(window) == 50
+    assert window.values().tolist() == values[-50:].tolist()
+    assert window.mean == pytest.approx(values[-50:].mean())
+    assert window.std == pytest.approx(values[-50:].std(), rel=1e-6)
+
+def test_rolling_matrix_keeps_each_capacity_in_its_own_block():
+    matrix = RollingMatrix(capacity=10)
+    matrix.set_capacity("wide", 5000)
+    windows = {"narrow": RollingWindow(10), "wide": RollingWindow(5000), "resized": RollingWindow(3)}
+    values = np.random.default_rng(2).normal(100, 5, (40, 3))
+    for i, tick in enumerate(values):
+        if i == 20:
+            matrix.set_capacity("resized", 3)
+            windows["resized"].resize(3)
+        rows = matrix.rows(list(windows))
+        matrix.append(rows, tick)
+        for window, value in zip(windows.values(), tick):
+            window.append(float(value))
+
+    # The wide row does not widen the default block
+    assert matrix._blocks[10].shape[1] == 10
+    rows = matrix.rows(list(windows))
+    for row, (metric, window) in zip(rows, windows.items()):
+        assert matrix.values(metric).tolist() == window.values().tolist()
+        assert matrix.mean(np.array([row]))[0] == pytest.approx(window.mean)
+
+async def test_detect_anomalies_flags_outlier(insight_generator):
+    for value in [10.0, 11.0, 9.0, 10.5, 9.5] * 4:
+        await insight_generator._detect_anomalies({"cpu": value})
+    assert await insight_generator._detect_anomalies({"cpu": 10.2}) == []
+
+    anomalies = await insight_generator._detect_anomalies({"cpu": 50.0})
+    assert len(anomalies) == 1
+    assert anomalies[0]["metric"] == "cpu"
+
+async def test_window_size_per_metric(insight_generator):
+    insight_generator.set_window_size("latency", 5)
+    for value in range(20):
+        await insight_generator._detect_anomalies({"latency": float(value), "cpu": float(value)})
+
+    assert len(insight_generator.metrics_history["latency"]) == 5
+    assert len(insight_generator.metrics_history["cpu"]) == 20
+
+async def test_vectorized_mode_matches_per_metric():
+    per_metric = InsightGenerator(default_window_size=20)
+    vectorized = InsightGenerator(default_window_size=20, vectorized=True)
+    for generator in (per_metric, vectorized):
+        generator.set_threshold("errors", 5.0)
+
+    rng = np.random.default_rng(7)
+    for tick in range(60):
+        data = {"cpu": float(rng.normal(50, 2)), "errors": float(tick % 8), "rising": tick * 0.5}
+        if tick == 40:
+            data["cpu"] = 500.0
+        expected = await per_metric.generate_insights(data)
+        actual = await vectorized.generate_insights(data)
+
+        key = lambda insight: (insight["type"], insight["metric"])
+        strip = lambda insights: [{name: value for name, value in insight.items() if name != "timestamp"}
+                                  for insight in sorted(insights, key=key)]
+        assert strip(actual) == [pytest.approx(insight) for insight in strip(expected)]
+
+def test_trend_estimator_matches_polyfit():
+    from app.analytics.trend import TrendEstimator
+
+    values = np.random.default_rng(3).normal(0, 1, 300) + np.arange(300) * 0.05 + 1e4
+    unbounded = TrendEstimator(sample_size=50)
+    unbounded.update_many(values[:100])
+    for value in values[100:]:
+        unbounded.update(float(value))
+    windowed = TrendEstimator(window=80)
+    for value in values:
+        windowed.update(float(value))
+
+    assert unbounded.slope == pytest.approx(np.polyfit(np.arange(300), values, 1)[0], rel=1e-6)
+    assert windowed.slope == pytest.approx(np.polyfit(np.arange(80), values[-80:], 1)[0], rel=1e-6)
+    assert unbounded.confidence > 0.99
+    assert unbounded.theil_sen_slope() == pytest.approx(0.05, abs=0.05)
+
+async def test_level_shift_reports_change_point(insight_generator):
+    rng = np.random.default_rng(5)
+    change_points = []
+    for tick in range(60):
+        level = 10.0 if tick < 40 else 20.0
+        insights = await insight_generator.generate_insights({"cpu": float(level + rng.normal(0, 0.5))})
+        change_points.extend((tick, insight) for insight in insights if insight["type"] == "change_point")
+
+    assert change_points
+    tick, insight = change_points[0]
+    assert 40 <= tick < 45
+    assert insight["direction"] == "up"
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+from app.ai.prompt import PromptBuilder, estimate_tokens
+from app.core.serialization import loads
+from app.models.schema import AIModelConfig
+
+HEADER = "Analyze the following data and generate insights:\n\n"
+
+@pytest.fixture
+def builder():
+    return PromptBuilder(AIModelConfig(model_name="claude-test", api_key="test",
+                                       context_window=4000, max_tokens=1000))
+
+def test_small_data_is_sent_whole(builder):
+    data = {"orders": [{"id": 1, "total": 9.5}], "region": "eu"}
+
+    prompt = builder.build_insight(data)
+
+    assert loads(prompt[len(HEADER):]) == data
+    assert builder.get_stats()["summarized"] == 0
+
+def test_large_frame_is_summarized_within_budget(builder):
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame({
+        "timestamp": pd.date_range("2024-01-01", periods=50_000, freq="s"),
+        "value": rng.normal(10, 1, 50_000),
+    })
+    frame.loc[1234, "value"] = 100.0
+
+    prompt = builder.build_insight({"events": frame}, {"source": "events"})
+
+    assert estimate_tokens(prompt) <= builder.budget
+    summary = loads(prompt[len(HEADER):prompt.index("\n\nContext:")])["events"]
+    assert summary["rows"] == 50_000
+    assert summary["stats"]["value"]["max"] == 100.0
+    assert summary["top_anomalies"][0]["value"] == 100.0
+    assert 0 < len(summary["sample"]) <= builder.sample_rows
+    assert builder.get_stats()["truncated"] == 0
+
+def test_long_record_lists_are_summarized(builder):
+    records = [{"user": f"u{i}", "amount": float(i)} for i in range(10_000)]
+
+    prompt = builder.build_insight({"purchases": records})
+
+    summary = loads(prompt[len(HEADER):])["purchases"]
+    assert summary["rows"] == 10_000
+    assert set(summary["columns"]) == {"user", "amount"}
+    assert estimate_tokens(prompt) <= builder.budget
+
+def test_prompt_is_cut_as_a_last_resort(builder):
+    data = {f"metric_{i}": i for i in range(5000)}
+
+    prompt = builder.build_insight(data)
+
+    assert estimate_tokens(prompt) <= builder.budget
+    assert prompt.endswith("[truncated to fit the context window]")
@@ -0,0 +1,88 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+from app.ai.cache import DiskCacheStore, ResponseCache, cache_key
+from app.ai.claude_connector import ClaudeConnector
+from app.models.schema import AIModelConfig
+
+class FakeAIClient:
+    def __init__(self, delay=0.0):
+        self.calls = 0
+        self.delay = delay
+
+    async def create_message(self, **params):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return SimpleNamespace(content=[SimpleNamespace(text=f"answer {self.calls}")])
+
+    def get_stats(self):
+        return {"requests": self.calls}
+
+@pytest.fixture
+def connector():
+    return ClaudeConnector(ai_client=FakeAIClient(delay=0.01),
+                           ai_config=AIModelConfig(model_name="claude-test", api_key="test"),
+                           cache=ResponseCache(ttl=60))
+
+def test_cache_key_is_canonical():
+    assert cache_key(data={"a": 1, "b": [1, 2]}, model="m") == cache_key(model="m", data={"b": [1, 2], "a": 1})
+    assert cache_key(data={"a": 1}, model="m") != cache_key(data={"a": 2}, model="m")
+
+async def test_identical_requests_hit_the_cache(connector):
+    data = {"orders": [1, 2, 3], "revenue": 10.5}
+
+    first = await connector.generate_insight(data)
+    second = await connector.generate_insight(dict(reversed(list(data.items()))))
+    await connector.process_query("Total  revenue today?")
+    await connector.process_query("total revenue today?")
+
+    assert first["insights"] == second["insights"]
+    assert connector.client.calls == 2
+    stats = connector.get_stats()["cache"]
+    assert stats["hits"] == 2 and stats["misses"] == 2
+    assert stats["hit_rate"] == 0.5
+
+async def test_concurrent_identical_requests_are_coalesced(connector):
+    results = await asyncio.gather(*(connector.generate_insight({"value": 1}) for _ in range(10)))
+
+    assert connector.client.calls == 1
+    assert len({result["insights"] for result in results}) == 1
+    assert connector.cache.get_stats()["coalesced"] == 9
+
+async def test_lru_eviction_and_ttl():
+    cache = ResponseCache(ttl=60, max_entries=2)
+    for key in ("a", "b"):
+        await cache.get_or_compute(key, lambda key=key: asyncio.sleep(0, {"value": key}))
+    await cache.get_or_compute("a", None)
+    await cache.get_or_compute("c", lambda: asyncio.sleep(0, {"value": "c"}))
+
+    assert set(cache._entries) == {"a", "c"}
+    assert cache.get_stats()["evictions"] == 1
+
+    cache.ttl = 0
+    await cache.get_or_compute("d", lambda: asyncio.sleep(0, {"value": "d"}))
+    assert cache._get("d") is None
+    assert cache.get_stats()["expirations"] == 1
+
+async def test_failures_are_not_cached():
+    cache = ResponseCache(ttl=60)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("upstream failed")
+        return {"value": 1}
+
+    with pytest.raises(RuntimeError):
+        await cache.get_or_compute("key", compute)
+    assert await cache.get_or_compute("key", compute) == {"value": 1}
+    assert len(calls) == 2
+
+async def test_disk_store_survives_restart(tmp_path):
+    first = ResponseCache(ttl=60, store=DiskCacheStore(tmp_path))
+    await first.get_or_compute("key", lambda: asyncio.sleep(0, {"value": 1}))
+
+    second = ResponseCache(ttl=60, store=DiskCacheStore(tmp_path))
+    assert await second.get_or_compute("key", None) == {"value": 1}
+    assert second.get_stats()["store_hits"] == 1
@@ -0,0 +1,65 @@
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import pytest
+from app.core import serialization
+from app.core.serialization import JSONSerializer, SERIALIZERS, dumps, dumps_str, loads, set_serializer
+from app.models.schema import SourceType
+
+RESULT = {
+    "count": np.int64(3),
+    "average": np.float64(2.5),
+    "flag": np.bool_(True),
+    "values": np.array([1.0, 2.0, 3.0]),
+    "series": pd.Series([1, 2]),
+    "timestamp": pd.Timestamp("2024-01-01 10:00:00"),
+    "created": datetime(2024, 1, 1, 12, 30),
+    "missing": pd.NaT,
+    "type": SourceType.BATCH,
+    "frame": pd.DataFrame({"value": [1.5], "at": [pd.Timestamp("2024-01-02")]}),
+}
+
+EXPECTED = {
+    "count": 3,
+    "average": 2.5,
+    "flag": True,
+    "values": [1.0, 2.0, 3.0],
+    "series": [1, 2],
+    "timestamp": "2024-01-01T10:00:00",
+    "created": "2024-01-01T12:30:00",
+    "missing": None,
+    "type": "batch",
+    "frame": [{"value": 1.5, "at": "2024-01-02T00:00:00"}],
+}
+
+@pytest.fixture(params=sorted(SERIALIZERS))
+def backend(request):
+    previous = serialization._serializer
+    yield set_serializer(request.param)
+    serialization._serializer = previous
+
+def test_encodes_numpy_and_pandas_results(backend):
+    assert loads(dumps(RESULT)) == EXPECTED
+    assert loads(dumps_str(RESULT, indent=True)) == EXPECTED
+    assert isinstance(dumps(RESULT), bytes)
+
+def test_backends_produce_the_same_document(backend):
+    assert dumps_str(EXPECTED) == JSONSerializer().dumps_str(EXPECTED)
+
+    # Non-finite floats become null rather than the invalid NaN/Infinity tokens
+    document = {**EXPECTED, "nan": float("nan"), "inf": float("inf"),
+                "values": np.array([1.0, np.nan, -np.inf]), "average": np.float64("nan")}
+    assert dumps_str(document) == JSONSerializer().dumps_str(document)
+    assert loads(dumps_str(document))["values"] == [1.0, None, None]
+    assert loads(dumps_str(document))["nan"] is None
+
+def test_unknown_backend_falls_back_to_stdlib():
+    previous = serialization._serializer
+    try:
+        assert set_serializer("missing").name == "json"
+    finally:
+        serialization._serializer = previous
+
+def test_unsupported_type_raises(backend):
+    with pytest.raises(TypeError):
+        dumps({"value": object()})
@@ -0,0 +1,44 @@
+import pytest
+from sqlalchemy import inspect
+from app.data.storage import DataStorage
+
+@pytest.fixture
+def storage(tmp_path):
+    return DataStorage(f"sqlite:///{tmp_path / 'test.db'}", batch_size=3, flush_interval=60)
+
+async def test_store_buffers_until_batch_size(storage):
+    await storage.store({"timestamp": "2024-01-01T00:00:00", "value": 1.0}, "src")
+    await storage.store({"timestamp": "2024-01-01T00:00:01", "value": 2.0}, "src")
+    assert not inspect(storage.engine).has_table("data_src")
+
+    await storage.store({"timestamp": "2024-01-01T00:00:02", "value": 3.0}, "src")
+    assert inspect(storage.engine).has_table("data_src")
+    await storage.close()
+
+async def test_query_sees_buffered_rows(storage):
+    await storage.store({"timestamp": "2024-01-01T00:00:00", "value": 1.0}, "src")
+    latest = await storage.get_latest("src")
+    assert len(latest) == 1
+    assert latest.iloc[0]["value"] == 1.0
+    await storage.close()
+
+async def test_close_flushes_pending_rows(tmp_path):
+    url = f"sqlite:///{tmp_path / 'test.db'}"
+    storage = DataStorage(url, batch_size=100, flush_interval=60)
+    await storage.store([{"timestamp": "2024-01-01T00:00:00", "value": float(i)} for i in range(5)], "src")
+    await storage.close()
+
+    reopened = DataStorage(url)
+    assert len(await reopened.query("SELECT * FROM data_src")) == 5
+    await reopened.close()
+
+async def test_pool_stats_track_operations(storage):
+    await storage.store({"timestamp": "2024-01-01T00:00:00", "value": 1.0}, "src")
+    await storage.get_latest("src")
+
+    stats = storage.storage_engine.get_pool_stats()
+    assert stats["operations"] == 2
+    assert stats["checked_out"] == 0
+    assert stats["peak_checked_out"] >= 1
+    assert stats["max_connections"] == stats["pool_size"] + stats["max_overflow"]
+    await storage.close()
@@ -0,0 +1,127 @@
+import asyncio
+import json
+import pandas as pd
+import pytest
+from aiohttp import web
+from app.ai.cache import ResponseCache
+from app.ai.claude_connector import ClaudeConnector
+from app.ai.client import AIClient
+from app.config import config
+from app.core.mcp_server import MCPServer
+from app.models.schema import AIModelConfig, DataSource
+
+def sse(event_type, **data):
+    return f"event: {event_type}\ndata: {json.dumps({'type': event_type, **data})}\n\n".encode()
+
+@pytest.fixture
+async def streaming_api():
+    """Local stand-in for the streaming Messages API"""
+    state = {"chunks": ["Revenue ", "is ", "up ", "12%."], "delay": 0.0, "sent": 0, "completed": False}
+
+    async def handler(request):
+        body = await request.json()
+        assert body["stream"] is True
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        await response.write(sse("message_start", message={
+            "id": "msg_test", "type": "message", "role": "assistant", "model": body["model"],
+            "content": [], "stop_reason": None, "stop_sequence": None,
+            "usage": {"input_tokens": 10, "output_tokens": 0}}))
+        await response.write(sse("content_block_start", index=0, content_block={"type": "text", "text": ""}))
+        try:
+            for chunk in state["chunks"]:
+                await asyncio.sleep(state["delay"])
+                await response.write(sse("content_block_delta", index=0,
+                                         delta={"type": "text_delta", "text": chunk}))
+                state["sent"] += 1
+            await response.write(sse("content_block_stop", index=0))
+            await response.write(sse("message_delta", delta={"stop_reason": "end_turn", "stop_sequence": None},
+                                     usage={"output_tokens": len(state["chunks"])}))
+            await response.write(sse("message_stop"))
+            state["completed"] = True
+        except ConnectionResetError:
+            pass
+        return response
+
+    app = web.Application()
+    app.router.add_post("/v1/messages", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    state["url"] = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+    yield state
+    await runner.cleanup()
+
+@pytest.fixture
+async def ai_client(streaming_api):
+    client = AIClient(api_key="test", base_url=streaming_api["url"], timeout=5)
+    yield client
+    await client.close()
+
+class FakeAnalyticsEngine:
+    async def load_data(self, source):
+        return pd.DataFrame({"value": [1.0, 2.0, 3.0]})
+
+@pytest.fixture
+async def mcp_server(ai_client, monkeypatch):
+    monkeypatch.setitem(config.get_config().data_sources, "events",
+                        DataSource(name="events", type="batch", config={}, schema={"value": "float"}))
+    connector = ClaudeConnector(ai_client=ai_client, ai_config=AIModelConfig(model_name="claude-test", api_key="test"),
+                                cache=ResponseCache(ttl=60))
+    server = MCPServer(ai_client=ai_client)
+    await server.initialize(data_processor=object(), analytics_engine=FakeAnalyticsEngine(),
+                            claude_connector=connector)
+    return server
+
+async def test_stream_yields_text_as_it_arrives(ai_client):
+    chunks = [text async for text in ai_client.stream_message(
+        model="claude-test", max_tokens=10, messages=[{"role": "user", "content": "hi"}])]
+
+    assert chunks == ["Revenue ", "is ", "up ", "12%."]
+    stats = ai_client.get_stats()
+    assert stats["first_token"]["count"] == 1
+    assert stats["in_flight"] == 0
+
+async def test_tool_call_streams_partial_results(mcp_server):
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    await mcp_server.register_client(object(), "client-1")
+    await mcp_server.stream_tool_call({"type": "tool_call", "id": "r1", "tool": "generate_insight",
+                                       "parameters": {"data_source": "events"}}, "client-1", send)
+
+    assert [m["type"] for m in sent] == ["tool_result_partial"] * 4 + ["tool_result"]
+    assert "".join(m["delta"] for m in sent[:-1]) == sent[-1]["result"]["insights"] == "Revenue is up 12%."
+    assert all(m["id"] == "r1" for m in sent)
+
+    # A repeated call is answered from the cache in one message
+    sent.clear()
+    await mcp_server.stream_tool_call({"type": "tool_call", "id": "r2", "tool": "generate_insight",
+                                       "parameters": {"data_source": "events"}}, "client-1", send)
+    assert [m["type"] for m in sent] == ["tool_result"]
+
+async def test_disconnect_cancels_the_stream(mcp_server, streaming_api, ai_client):
+    streaming_api["chunks"] = [f"token{i} " for i in range(100)]
+    streaming_api["delay"] = 0.02
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    await mcp_server.register_client(object(), "client-1")
+    task = mcp_server.stream_tool_call({"type": "tool_call", "id": "r1", "tool": "generate_insight",
+                                        "parameters": {"data_source": "events"}}, "client-1", send)
+    while len(sent) < 2:
+        await asyncio.sleep(0.01)
+    await mcp_server.unregister_client("client-1")
+
+    assert task.cancelled()
+    assert ai_client.get_stats()["in_flight"] == 0
+    await asyncio.sleep(0.1)
+    assert not streaming_api["completed"]
+    assert streaming_api["sent"] < 100
+    # The partial answer is not cached
+    assert mcp_server.claude_connector.cache.get_stats()["entries"] == 0
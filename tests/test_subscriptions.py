@@ -0,0 +1,35 @@
+import pytest
+from app.core.subscriptions import SubscriptionRegistry
+
+def test_exact_and_wildcard_topics_match():
+    registry = SubscriptionRegistry()
+    registry.subscribe("a", "source.orders.anomaly")
+    registry.subscribe("b", "source.*.anomaly")
+    registry.subscribe("c", "source.#")
+    registry.subscribe("d", "*.orders.*")
+    registry.subscribe("e", "source.orders")
+
+    assert registry.match("source.orders.anomaly") == {"a", "b", "c", "d"}
+    assert registry.match("source.users.anomaly") == {"b", "c"}
+    assert registry.match("source.orders") == {"c", "e"}
+    assert registry.match("source") == {"c"}
+    assert registry.match("metrics.cpu") == set()
+    with pytest.raises(ValueError):
+        registry.subscribe("f", "source.#.anomaly")
+
+def test_remove_client_drops_only_its_subscriptions():
+    registry = SubscriptionRegistry()
+    for topic in ("source.orders.anomaly", "source.*.window", "source.#"):
+        registry.subscribe("a", topic)
+    registry.subscribe("b", "source.*.window")
+
+    registry.remove_client("a")
+    assert registry.topics("a") == set()
+    assert registry.match("source.orders.window") == {"b"}
+    assert registry.match("source.orders.anomaly") == set()
+    assert registry.get_stats() == {"clients": 1, "subscriptions": 1, "exact_topics": 0, "patterns": 1}
+
+    registry.unsubscribe("b", "source.*.window")
+    # Emptied trie branches are pruned
+    assert registry._root.children == {}
+    assert registry.get_stats()["patterns"] == 0
@@ -0,0 +1,70 @@
+import asyncio
+import pytest
+from app.data.processors import DataProcessor
+from app.data.storage import DataStorage
+from app.data.supervisor import IngestionSupervisor
+from app.models.schema import DataSource, SourceType
+
+@pytest.fixture
+async def processor(tmp_path):
+    storage = DataStorage(f"sqlite:///{tmp_path / 'pipeline.db'}")
+    yield DataProcessor(storage=storage)
+    await storage.close()
+
+def stream_source(name="events", **config):
+    return DataSource(name=name, type=SourceType.STREAM, config={"read_batch_size": 10, **config},
+                      schema={"timestamp": "datetime", "value": "float"})
+
+async def test_pipeline_processes_and_stores_every_source(processor):
+    supervisor = IngestionSupervisor(processor=processor, workers=2)
+    sources = {
+        "a": stream_source("a"),
+        "b": stream_source("b", workers=3, pipeline_queue_size=2),
+        "off": DataSource(name="off", type=SourceType.STREAM, config={}, schema={}, enabled=False),
+    }
+    await supervisor.start(sources)
+    assert set(supervisor.pipelines) == {"a", "b"}
+
+    for name in ("a", "b"):
+        adapter = supervisor.ingestion.adapters[name]
+        for value in range(50):
+            await adapter.put({"timestamp": "2024-01-01T00:00:00", "value": float(value)})
+        await adapter.put({"timestamp": "2024-01-01T00:00:00", "value": "bad"})
+        await adapter.disconnect()
+    await asyncio.wait_for(supervisor.wait(), 5)
+
+    stats = supervisor.get_stats()
+    for name in ("a", "b"):
+        stages = stats[name]["stages"]
+        assert stats[name]["state"] == "finished"
+        assert stages["ingest"]["records"] == 51
+        assert stages["validate"]["rejected"] == 1
+        assert stages["store"]["records"] == 50
+        assert stages["store"]["errors"] == 0
+        assert processor.aggregator.query(name, "value", ["count", "sum"]) == {"count": 50, "sum": 1225.0}
+    await supervisor.stop()
+    stored = await processor.storage.scan("a")
+    assert len(stored) == 50
+
+async def test_failed_adapter_is_restarted_with_backoff(processor):
+    supervisor = IngestionSupervisor(processor=processor, backoff=0.01, max_restarts=2)
+    await supervisor.add_source(stream_source())
+    adapter = supervisor.ingestion.adapters["events"]
+    connects = []
+    original_connect = adapter.connect
+
+    async def connect():
+        connects.append(True)
+        await original_connect()
+        await adapter.put({"timestamp": "2024-01-01T00:00:00", "value": 1.0})
+        await adapter.disconnect()
+
+    adapter.connect = connect
+    # Reads fail until the adapter is reconnected
+    adapter.connected = False
+    await asyncio.wait_for(supervisor.wait("events"), 5)
+
+    stats = supervisor.get_stats()["events"]
+    assert (stats["restarts"], len(connects), stats["state"]) == (1, 1, "finished")
+    assert stats["stages"]["store"]["records"] == 1
+    await supervisor.stop()
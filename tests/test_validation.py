@@ -0,0 +1,33 @@
+import pytest
+from datetime import datetime
+from app.data.validation import ValidatorCache, compile_schema
+
+SCHEMA = {"timestamp": "datetime", "value": "float", "region": "string", "extra": "json"}
+
+def test_compiled_validator_checks_presence_and_types():
+    validator = compile_schema(SCHEMA)
+    validator.validate({"timestamp": "2024-01-01T00:00:00", "value": 1, "region": "eu", "extra": {}})
+
+    with pytest.raises(ValueError, match="Missing required field: value"):
+        validator.validate({"timestamp": "2024-01-01T00:00:00", "region": "eu", "extra": 1})
+    with pytest.raises(ValueError, match="Invalid datetime for field: timestamp"):
+        validator.validate({"timestamp": "yesterday", "value": 1.0, "region": "eu", "extra": 1})
+    with pytest.raises(ValueError, match="Invalid float for field: value"):
+        validator.validate({"timestamp": datetime(2024, 1, 1), "value": True, "region": "eu", "extra": 1})
+
+def test_compiled_validator_coerces_copy():
+    record = {"timestamp": "2024-01-01T00:00:00", "value": "2.5", "region": 7, "extra": [1]}
+    coerced = compile_schema(SCHEMA).coerce(record)
+
+    assert coerced == {"timestamp": datetime(2024, 1, 1), "value": 2.5, "region": "7", "extra": [1]}
+    assert record["value"] == "2.5"
+
+def test_validator_cache_recompiles_on_schema_change():
+    cache = ValidatorCache()
+    first = cache.get("src", {"value": "float"})
+    assert cache.get("src", {"value": "float"}) is first
+
+    changed = cache.get("src", {"value": "float", "timestamp": "datetime"})
+    assert changed is not first
+    with pytest.raises(ValueError):
+        changed.validate({"value": 1.0})
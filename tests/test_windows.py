@@ -0,0 +1,47 @@
+import pytest
+from app.analytics.windows import WindowAggregator
+
+class RecordingClientManager:
+    def __init__(self):
+        self.messages = []
+
+    async def broadcast(self, message, topic=None):
+        self.messages.append((topic, message))
+
+@pytest.fixture
+def client_manager():
+    return RecordingClientManager()
+
+async def test_tumbling_window_closes_on_watermark(client_manager):
+    windows = WindowAggregator(size=60, allowed_lateness=0, client_manager=client_manager)
+    assert await windows.process("src", {"timestamp": "2024-01-01T00:00:10", "value": 1.0}) == []
+    assert await windows.process("src", {"timestamp": "2024-01-01T00:00:50", "value": 3.0}) == []
+
+    closed = await windows.process("src", {"timestamp": "2024-01-01T00:01:05", "value": 10.0})
+    assert len(closed) == 1
+    assert closed[0]["window_start"] == "2024-01-01T00:00:00"
+    assert closed[0]["metrics"]["value"]["average"] == 2.0
+    assert client_manager.messages[0][0] == "source.src.window"
+
+async def test_sliding_windows_overlap():
+    windows = WindowAggregator(size=60, slide=30, allowed_lateness=0)
+    await windows.process("src", {"timestamp": "2024-01-01T00:00:45", "value": 1.0})
+
+    closed = await windows.process("src", {"timestamp": "2024-01-01T00:02:00", "value": 2.0})
+    assert [window["window_start"] for window in closed] == [
+        "2024-01-01T00:00:00", "2024-01-01T00:00:30"
+    ]
+    assert windows.get_stats()["src"]["open_windows"] == 2
+
+async def test_late_records_are_dropped():
+    windows = WindowAggregator(size=60, allowed_lateness=10)
+    await windows.process("src", {"timestamp": "2024-01-01T00:00:30", "value": 1.0})
+    await windows.process("src", {"timestamp": "2024-01-01T00:01:05", "value": 1.0})
+
+    # Still within the allowed lateness of the first window
+    await windows.process("src", {"timestamp": "2024-01-01T00:00:55", "value": 5.0})
+    closed = await windows.process("src", {"timestamp": "2024-01-01T00:02:30", "value": 1.0})
+    assert closed[0]["metrics"]["value"]["count"] == 2
+
+    await windows.process("src", {"timestamp": "2024-01-01T00:00:20", "value": 9.0})
+    assert windows.get_stats()["src"]["late_records"] == 1